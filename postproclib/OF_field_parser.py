@@ -5,10 +5,15 @@ parser for field data
 
 
 import os
+import io
 import struct
 import numpy as np
 
 
+# Parentheses around vector and tensor entries blanked by bytes.translate
+BLANK_PARENTHESES = bytes.maketrans(b'()', b'  ')
+
+
 def parse_field_all(fn):
     """
     parse internal field, extract data to numpy.array
@@ -19,8 +24,12 @@ def parse_field_all(fn):
         print("Can not open file " + fn)
         return None
     with open(fn, "rb") as f:
-        content = f.readlines()
-        return parse_internal_field_content(content), parse_boundary_content(content)
+        buf = f.read()
+    content = io.BytesIO(buf).readlines()
+    internal = parse_internal_field_bulk(buf)
+    if internal is None:
+        internal = parse_internal_field_content(content)
+    return internal, parse_boundary_content(content)
 
 
 def parse_internal_field(fn):
@@ -33,8 +42,57 @@ def parse_internal_field(fn):
         print("Can not open file " + fn)
         return None
     with open(fn, "rb") as f:
-        content = f.readlines()
-        return parse_internal_field_content(content)
+        buf = f.read()
+    data = parse_internal_field_bulk(buf)
+    if data is not None:
+        return data
+    return parse_internal_field_content(io.BytesIO(buf).readlines())
+
+
+def parse_internal_field_bulk(buf):
+    """
+    parse a nonuniform ascii internal field from the whole file content,
+    locating the list by byte offset, blanking the parentheses in one
+    bytes.translate pass and converting all the values with numpy's C
+    parser rather than line by line
+    :param buf: file content as bytes
+    :return: numpy array of internal field, or None if the field is not
+             a nonuniform ascii list (use parse_internal_field_content)
+    """
+    if buf.startswith(b'internalField'):
+        start = 0
+    else:
+        start = buf.find(b'\ninternalField') + 1
+        if start == 0:
+            return None
+    if is_binary_format(buf[:start].splitlines()):
+        return None
+
+    lineend = buf.find(b'\n', start)
+    if lineend < 0:
+        lineend = len(buf)
+    if b'nonuniform' not in buf[start:lineend]:
+        return None
+    nn = n_components(buf[start:lineend])
+
+    # internalField nonuniform List<type> N ( ... ) ;
+    typeend = buf.find(b'>', start, lineend)
+    opening = buf.find(b'(', typeend)
+    closing = buf.find(b';', opening)
+    if typeend < 0 or opening < 0 or closing < 0:
+        return None
+    try:
+        num = int(buf[typeend+1:opening])
+    except ValueError:
+        return None
+
+    values = np.fromstring(buf[opening:closing].translate(BLANK_PARENTHESES),
+                           sep=' ')
+    if values.size != num*nn:
+        return None
+    if nn > 1:
+        return values.reshape((num, nn))
+    return values
 
 
 def parse_internal_field_content(content):
@@ -126,13 +184,7 @@ def parse_data_nonuniform(content, n, n2, is_binary):
         else:
             data = np.array([ln[1:-2].split() for ln in content[n + 3:n + 3 + num]], dtype=float)
     else:
-        nn = 1
-        if b'vector' in content[n]:
-            nn = 3
-        elif b'symmTensor' in content[n]:
-            nn = 6
-        elif b'tensor' in content[n]:
-            nn = 9
+        nn = n_components(content[n])
         buf = b''.join(content[n+2:n2+1])
         vv = np.array(struct.unpack('{}d'.format(num*nn),
                                     buf[struct.calcsize('c'):num*nn*struct.calcsize('d')+struct.calcsize('c')]))
@@ -143,6 +195,21 @@ def parse_data_nonuniform(content, n, n2, is_binary):
     return data
 
 
+def n_components(line):
+    """
+    number of components of the type of a field entry
+    :param line: line declaring the entry, eg. "internalField nonuniform List<vector>"
+    :return: components per value
+    """
+    if b'vector' in line:
+        return 3
+    elif b'symmTensor' in line:
+        return 6
+    elif b'tensor' in line:
+        return 9
+    return 1
+
+
 def split_boundary_content(content):
     """
     split each boundary from boundaryField
@@ -1,15 +1,33 @@
 import numpy as np
-import pyvista as pv
 import glob
 
 from .rawdata import RawData
 from .pplexceptions import DataNotAvailable
+from .vtrreader import VTR_Layout, decode_errors
+
+def load_pyvista():
+
+    """
+        pyvista, imported only when a file needs it as the import
+        is slow, or None if it is not installed
+    """
+
+    try:
+        import pyvista
+    except ImportError:
+        return None
+    return pyvista
+
 
 class VTK_RawData(RawData):
     """
         A reader for vtk objects assuming
         a RectilinearGrid, example tested is as
         written by LAMMPS grid system 
+
+        Files are decoded by VTR_Layout, with the layout of the
+        series read once from the first file. pyvista, if installed,
+        is used for files it can't decode.
     """
 
     def __init__(self, fdir, fname):
@@ -20,6 +38,7 @@ class VTK_RawData(RawData):
         self.filelist = glob.glob(self.fdir+self.fname+'.*.vtr')
         self.filelist = sorted(self.filelist)
         self.plotfreq = self.get_plotfreq()
+        self.layout = self.get_layout()
         self.nperbin = self.get_nperbin()
         if self.nperbin == 1:
             self.key = 'Scalar'
@@ -55,11 +74,29 @@ class VTK_RawData(RawData):
         else:
             return None
 
+    def get_layout(self):
+
+        """
+            Layout of the series from the first file, None if it
+            can only be read with pyvista
+        """
+
+        try:
+            return VTR_Layout(self.filelist[0])
+        except decode_errors as e:
+            if (load_pyvista() is None):
+                raise IOError("Unable to read " + self.filelist[0] + ", "
+                              + str(e) + ", and pyvista is not installed")
+            return None
+
     def get_nperbin(self):
-        fdata = pv.read(self.filelist[0])
-        if fdata.cell_data.keys()[0] == "Scalar":
+        if (self.layout is not None):
+            keys = self.layout.cellarrays
+        else:
+            keys = load_pyvista().read(self.filelist[0]).cell_data.keys()
+        if keys[0] == "Scalar":
             return 1
-        elif fdata.cell_data.keys()[0] == "Vector":
+        elif keys[0] == "Vector":
             return 3
         else:
             raise IOError("VTK format is not Scalar or Vector")
@@ -81,15 +118,18 @@ class VTK_RawData(RawData):
         """
         
         #Read any file as grid should be the same
-        fdata = pv.read(self.filelist[0])
-        #gnbins  = (fdata.extent[1], fdata.extent[3], fdata.extent[5])
-        gnbins  = (fdata.x.shape[0]-1, fdata.y.shape[0]-1, fdata.z.shape[0]-1)
+        if (self.layout is not None):
+            x, y, z = self.layout.coordinates
+        else:
+            fdata = load_pyvista().read(self.filelist[0])
+            x, y, z = fdata.x, fdata.y, fdata.z
+        gnbins  = (x.shape[0]-1, y.shape[0]-1, z.shape[0]-1)
 
-        self.domain = [fdata.x[-1], fdata.y[-1], fdata.z[-1]]
+        self.domain = [x[-1], y[-1], z[-1]]
 
-        binspaces = [0.5*(fdata.x[:-1] + fdata.x[1:]), 
-                     0.5*(fdata.y[:-1] + fdata.y[1:]),
-                     0.5*(fdata.z[:-1] + fdata.z[1:])]
+        binspaces = [0.5*(x[:-1] + x[1:]), 
+                     0.5*(y[:-1] + y[1:]),
+                     0.5*(z[:-1] + z[1:])]
 
         binsizes = []
         for ixyz in range(3):
@@ -119,9 +159,6 @@ class VTK_RawData(RawData):
                 
         """
 
-        #return_zeros or skip_rec if data cannot be obtained?
-        return_zeros = False; skip_rec = False; skiprecs = []
-
         # Store how many records are to be read
         startrec = int(startrec)
         endrec = int(endrec)
@@ -129,52 +166,34 @@ class VTK_RawData(RawData):
         # Allocate enough memory in the C library to efficiently insert
         # into bindata
         recitems = np.product(self.nbins)
-        bindata  = np.empty([int(nrecs*recitems), self.nperbin])
-
-        # Check whether the records are written separately
-        # If so
-
-        # Loop through files and append data
-        for plusrec in range(0,nrecs):
-            filepath = (self.fdir + self.fname + '.' 
-                        + "%08d"%((startrec+plusrec)*self.plotfreq)+".vtr")
-            try: 
-                #Use PyVTK plotting library
-                fobj = pv.read(filepath)
-            except:
-                if missingrec is 'raise':
-                    print(('Unable to find file ' + filepath))    
-                    raise DataNotAvailable
-                elif missingrec is 'returnzeros':
-                    print(('Unable to find file ' + filepath, '. Returning zeros'))
-                    return_zeros = True
-                elif missingrec is 'skip':
-                    print(('Unable to find file ' + filepath, '. Reducing returned records by one'))
-                    skip_rec = True
-
-            istart = plusrec*recitems
-            iend = istart + recitems
-            if (verbose):
-                print(('Reading {0:s} rec {1:5d}'.format(
-                      self.fname,startrec+plusrec)))
-            if return_zeros:
-                bindata = np.zeros([ self.nbins[0],self.nbins[1],
-                                     self.nbins[2],self.nperbin, nrecs])
-            elif skip_rec:
-                skiprecs.append(plusrec)
-            else:
-                try:
-                    if self.key == "Scalar":
-                        bindata[istart:iend,0] = fobj.cell_data.get_array(self.key)
-                    elif self.key == "Vector":
-                        bindata[istart:iend,:] = fobj.cell_data.get_array(self.key)
+        bindata  = np.empty([nrecs, recitems, self.nperbin], dtype=self.workdtype)
 
-                except ValueError:
-                    raise
+        filepaths = [self.fdir + self.fname + '.' 
+                     + "%08d"%((startrec+plusrec)*self.plotfreq)+".vtr"
+                     for plusrec in range(0,nrecs)]
 
-            #Reset ready for next record
-            return_zeros = False
-            skip_rec = False
+        def readrec(filepath, plusrec):
+            # Decode straight into this record's slot
+            if (self.layout is not None):
+                try:
+                    self.layout.read_cell_array(filepath, self.key,
+                                                out=bindata[plusrec,:,:])
+                    return
+                except decode_errors as e:
+                    if (load_pyvista() is None):
+                        raise IOError("Unable to read " + filepath + ", " + str(e))
+            #Use PyVTK plotting library
+            fobj = load_pyvista().read(filepath)
+            if self.key == "Scalar":
+                bindata[plusrec,:,0] = fobj.cell_data.get_array(self.key)
+            elif self.key == "Vector":
+                bindata[plusrec,:,:] = fobj.cell_data.get_array(self.key)
+
+        # Read files concurrently, each into its own record
+        bindata = self.read_records(filepaths, readrec, bindata, recaxis=0,
+                                    missingrec=missingrec, verbose=verbose)
+        nrecs = bindata.shape[0]
+        bindata = bindata.reshape([nrecs*recitems, self.nperbin])
 
         if (verbose):
             print(('Reshaping and transposing {0:s} '.format(self.fname)))
@@ -189,10 +208,6 @@ class VTK_RawData(RawData):
                               ],
                               order='F')
 
-        #If records were missing and skip record requested
-        if skiprecs != []:
-            bindata = np.delete(bindata,skiprecs,axis=3)
-
         # If bin limits are specified, return only those within range
         if (binlimits):
 
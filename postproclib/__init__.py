@@ -15,6 +15,8 @@ from .serial_cfdfields import *
 from .cplfields import *
 from .cplpostproc import *
 from .pplexceptions import *
+from .archiverawdata import archive_results
+from .fieldgraph import FieldGraph
 
 from .vmdfields import *
 from .build_vmd_polymer_psf import *
@@ -8,13 +8,14 @@ from .channelflowpostproc import channelflow_PostProc
 from .openfoampostproc import OpenFOAM_PostProc
 from .serial_cfdpostproc import Serial_CFD_PostProc
 from .pplexceptions import NoResultsInDir
+from .postproc import PostProc
 try:
     from .VTKpostproc import VTK_PostProc
     vispyfound = True
 except ImportError:
     vispyfound = False
 
-class All_PostProc:
+class All_PostProc(PostProc):
     
     def __init__(self, fdir):
 
@@ -22,6 +23,7 @@ class All_PostProc:
             print(("Requested directory ", fdir, " does not exist."))
             fdir = './'
 
+        self.resultsdir = fdir
         self.plotlist = {}
 
         try:
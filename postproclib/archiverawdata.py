@@ -0,0 +1,420 @@
+#! /usr/bin/env python
+import numpy as np
+import threading
+import zlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+from .rawdata import RawData
+from .mdrawdata import MD_RawData
+from .serial_cfdrawdata import Serial_CFD_RawData
+from .pplexceptions import DataNotAvailable
+from .dirindex import DirectoryIndex
+
+"""
+
+    Chunked, compressed archive of a results directory
+
+    archive_results converts the binned output files of an MD or serial
+    CFD results directory into a single HDF5 file,
+
+        outdir/results.h5
+            /headers/simulation_header    header variables as attributes
+            /data/<fname>                 [nrecs, nx, ny, nz, nperbin]
+
+    Each dataset is split into chunks of one record and a block of at
+    most chunkedge bins along each axis with all items of a bin, so
+    profiles read whole records and a contour slab through the domain
+    only decompresses the chunks it crosses. Data is compressed with
+    the shuffle and deflate (gzip) filters.
+
+    Fields read an archived file transparently when the original
+    binary files are not present (see archived), through the archive
+    RawData classes below. Chunks are read from the file in turn and
+    decompressed in parallel on a thread pool.
+
+"""
+
+archivename = 'results.h5'
+
+# Headers copied into the archive for each type of results directory
+headernames = ['simulation_header', 'continuum_header']
+
+H5Z_FILTER_DEFLATE = 1
+H5Z_FILTER_SHUFFLE = 2
+
+
+def archived(fdir, fname):
+
+    """
+        True if fname is to be read from the archive in fdir, i.e.
+        there is no fname or fname.* binary output but the archive
+        holds a dataset for it
+    """
+
+    if (fdir[-1] != '/'): fdir += '/'
+    if (DirectoryIndex.for_dir(fdir).present(fname)):
+        return False
+    return (fname in archived_fnames(fdir))
+
+
+def archived_fnames(fdir):
+
+    """
+        Names of the output files stored in the archive in fdir
+    """
+
+    if (fdir[-1] != '/'): fdir += '/'
+    if (h5py is None or not os.path.isfile(fdir+archivename)):
+        return []
+    with h5py.File(fdir+archivename, 'r') as f:
+        if ('data' not in f):
+            return []
+        return list(f['data'].keys())
+
+
+def read_archived_header(fdir, headername):
+
+    """
+        Lines of header headername stored in the archive in fdir, in
+        the "description ; variable ; value" form read by HeaderData.
+        Raises IOError if it is not archived.
+    """
+
+    if (fdir[-1] != '/'): fdir += '/'
+    if (h5py is None or not os.path.isfile(fdir+archivename)):
+        raise IOError('No archive in ' + fdir)
+    with h5py.File(fdir+archivename, 'r') as f:
+        try:
+            attrs = f['headers/'+headername].attrs
+        except KeyError:
+            raise IOError(headername + ' not archived in ' + fdir)
+        return [' ; ' + name + ' ; ' + str(attrs[name]) for name in attrs]
+
+
+def archive_results(fdir, outdir, compression_opts=4, chunkedge=32,
+                    recsperread=16, verbose=False):
+
+    """
+        Convert the binned output of the MD or serial CFD results
+        directory fdir into an archive in outdir
+
+        Required inputs:
+
+            fdir     - results directory to convert, string
+            outdir   - directory to write results.h5 to, string
+
+        Optional inputs:
+
+            compression_opts - deflate level from 0 to 9
+            chunkedge        - maximum bins along each axis of a chunk
+            recsperread      - records read from fdir at a time
+    """
+
+    if (h5py is None):
+        print('h5py package not available -- unable to write archive')
+        raise DataNotAvailable
+
+    if (fdir[-1] != '/'): fdir += '/'
+    if (outdir[-1] != '/'): outdir += '/'
+    if (os.path.abspath(fdir) == os.path.abspath(outdir)
+        and os.path.isfile(fdir+archivename)):
+        print(('Archive ' + fdir + archivename + ' already exists'))
+        raise IOError
+
+    # Every binary output read by a field of the results directory
+    if (os.path.isfile(fdir+'simulation_header')):
+        from .mdpostproc import MD_PostProc
+        PP = MD_PostProc(fdir)
+    else:
+        from .serial_cfdpostproc import Serial_CFD_PostProc
+        PP = Serial_CFD_PostProc(fdir)
+    raws = {}
+    for field in PP.plotlist.values():
+        for sub in [field] + field.subfields():
+            Raw = sub.Raw
+            if (type(Raw) in (MD_RawData, Serial_CFD_RawData) and Raw.fname
+                and DirectoryIndex.for_dir(fdir).present(Raw.fname)):
+                raws[Raw.fname] = Raw
+
+    if (not os.path.isdir(outdir)):
+        os.makedirs(outdir)
+
+    with h5py.File(outdir+archivename+'.tmp', 'w') as f:
+
+        for headername in headernames:
+            if (not os.path.isfile(fdir+headername)):
+                continue
+            group = f.create_group('headers/'+headername)
+            with open(fdir+headername, 'r') as fobj:
+                for line in fobj:
+                    items = line.split(';')
+                    if (len(items) < 3):
+                        continue
+                    varname = items[1].strip().replace('(','').replace(')','')
+                    group.attrs[varname] = items[2].strip()
+
+        for fname, Raw in sorted(raws.items()):
+            write_dataset(f, Raw, compression_opts, chunkedge,
+                          recsperread, verbose)
+
+    os.replace(outdir+archivename+'.tmp', outdir+archivename)
+
+
+def write_dataset(f, Raw, compression_opts=4, chunkedge=32,
+                  recsperread=16, verbose=False):
+
+    """
+        Copy all records read by Raw into dataset data/<Raw.fname> of
+        the open archive f. Records without a file are stored as zeros
+        and listed in the missingrecs attribute.
+    """
+
+    nrecs = int(Raw.maxrec) + 1
+    first = Raw.read(0, 0, missingrec='returnzeros')
+    shape = list(first.shape[0:3]) + [first.shape[4]]
+    chunks = tuple([1] + [min(n, chunkedge) for n in shape[0:3]] + [shape[3]])
+    dtype = np.dtype(Raw.dtype)
+
+    ds = f.create_dataset('data/'+Raw.fname, shape=tuple([nrecs] + shape),
+                          maxshape=tuple([None] + shape), dtype=dtype,
+                          chunks=chunks, shuffle=True, compression='gzip',
+                          compression_opts=compression_opts)
+    ds.attrs['dtype'] = Raw.dtype
+    ds.attrs['nperbin'] = int(Raw.nperbin)
+
+    missingrecs = []
+    if (Raw.separate_outfiles):
+        present = DirectoryIndex.for_dir(Raw.fdir).recnos(Raw.fname)
+        missingrecs = np.setdiff1d(np.arange(nrecs), present).tolist()
+
+    for startrec in range(0, nrecs, recsperread):
+        endrec = min(startrec + recsperread, nrecs) - 1
+        if (verbose):
+            print(('Archiving {0:s} recs {1:5d} to {2:5d}'.format(
+                  Raw.fname, startrec, endrec)))
+        data = Raw.read(startrec, endrec, missingrec='returnzeros')
+        ds[startrec:endrec+1] = np.transpose(data, (3,0,1,2,4))
+    ds.attrs['missingrecs'] = np.array(missingrecs, dtype='i')
+
+
+class ResultsArchive(object):
+
+    """
+        Reads records of one dataset of an archive, see archive_results
+    """
+
+    # Number of chunks decompressed concurrently
+    nthreads = 8
+
+    def __init__(self, fdir, fname):
+
+        if (h5py is None):
+            print('h5py package not available -- unable to read archive')
+            raise DataNotAvailable
+
+        if (fdir[-1] != '/'): fdir += '/'
+        self.filepath = fdir + archivename
+        self.fname = fname
+        try:
+            self.h5file = h5py.File(self.filepath, 'r')
+            self.ds = self.h5file['data/'+fname]
+        except (IOError, OSError, KeyError):
+            print(('Unable to find ' + fname + ' in ' + self.filepath))
+            raise DataNotAvailable
+
+        self.dtype = str(self.ds.attrs['dtype'])
+        self.nperbin = int(self.ds.attrs['nperbin'])
+        self.missingrecs = [int(r) for r in self.ds.attrs['missingrecs']]
+        self.lock = threading.Lock()
+
+        plist = self.ds.id.get_create_plist()
+        self.filters = [plist.get_filter(i)[0]
+                        for i in range(plist.get_nfilters())]
+
+    @property
+    def nrecs(self):
+        return self.ds.shape[0]
+
+    def read(self, startrec, endrec, box):
+
+        """
+            Records startrec to endrec of the bins in box (a tuple of
+            three slices) as an array [nrecs, nx, ny, nz, nperbin]
+        """
+
+        sel = (slice(startrec, endrec+1),) + box + (slice(None),)
+        if (self.nthreads > 1 and self.ds.chunks is not None and
+            set(self.filters) <= set([H5Z_FILTER_DEFLATE, H5Z_FILTER_SHUFFLE])):
+            return self.read_chunks(sel)
+        else:
+            return self.ds[sel]
+
+    def read_chunks(self, sel):
+
+        """
+            Read the selection sel chunk by chunk, reading compressed
+            chunks straight from the file and decompressing them on a
+            thread pool (zlib releases the GIL while inflating)
+        """
+
+        ds = self.ds
+        lower = [s.indices(n)[0] for s, n in zip(sel, ds.shape)]
+        upper = [max(s.indices(n)[0], s.indices(n)[1])
+                 for s, n in zip(sel, ds.shape)]
+        out = np.empty([u - l for l, u in zip(lower, upper)], dtype=ds.dtype)
+        if (out.size == 0):
+            return out
+
+        # Offsets of every chunk crossing the selection
+        ranges = [range(l - l%c, u, c) for l, u, c in zip(lower, upper, ds.chunks)]
+        offsets = np.stack(np.meshgrid(*ranges, indexing='ij'), axis=-1)
+        offsets = [tuple(int(o) for o in offset)
+                   for offset in offsets.reshape([-1, len(ds.shape)])]
+
+        def readchunk(offset):
+            with self.lock:
+                filtermask, raw = ds.id.read_direct_chunk(offset)
+            chunk = self.decode(raw, filtermask)
+            src = []; dst = []
+            for o, c, l, u in zip(offset, ds.chunks, lower, upper):
+                start = max(o, l); stop = min(o + c, u)
+                src.append(slice(start - o, stop - o))
+                dst.append(slice(start - l, stop - l))
+            out[tuple(dst)] = chunk[tuple(src)]
+
+        nthreads = max(1, min(self.nthreads, len(offsets)))
+        with ThreadPoolExecutor(max_workers=nthreads) as pool:
+            list(pool.map(readchunk, offsets))
+
+        return out
+
+    def decode(self, raw, filtermask):
+
+        """
+            Undo the filters applied to a stored chunk, filters are
+            undone in reverse order and skipped where their bit of
+            filtermask is set
+        """
+
+        itemsize = self.ds.dtype.itemsize
+        for i in reversed(range(len(self.filters))):
+            if (filtermask & (1 << i)):
+                continue
+            if (self.filters[i] == H5Z_FILTER_DEFLATE):
+                raw = zlib.decompress(raw)
+            elif (self.filters[i] == H5Z_FILTER_SHUFFLE):
+                raw = np.frombuffer(raw, dtype=np.uint8)
+                raw = raw.reshape([itemsize, -1]).T.tobytes()
+
+        return np.frombuffer(raw, dtype=self.ds.dtype).reshape(self.ds.chunks)
+
+    def read_records(self, startrec, endrec, binlimits=None,
+                     missingrec='raise'):
+
+        """
+            Read as RawData.read, returning [nx, ny, nz, nrecs, nperbin]
+            with records that were missing when archived handled as
+            requested by missingrec
+        """
+
+        box = []
+        for axis in range(3):
+            if (binlimits and binlimits[axis] != None):
+                box.append(slice(*binlimits[axis]))
+            else:
+                box.append(slice(None))
+        bindata = self.read(startrec, endrec, tuple(box))
+        bindata = np.transpose(bindata, (1,2,3,0,4))
+
+        skiprecs = []
+        for rec in self.missingrecs:
+            if (rec < startrec or rec > endrec):
+                continue
+            filepath = self.filepath + ':' + self.fname + '.' + "%07d"%rec
+            if missingrec == 'raise':
+                print(('Unable to find file ' + filepath))
+                raise DataNotAvailable
+            elif missingrec == 'returnzeros':
+                print(('Unable to find file ' + filepath, '. Returning zeros'))
+            elif missingrec == 'skip':
+                print(('Unable to find file ' + filepath, '. Reducing returned records by one'))
+                skiprecs.append(rec - startrec)
+
+        if skiprecs != []:
+            bindata = np.delete(bindata, skiprecs, axis=3)
+
+        return bindata
+
+
+class MD_ArchiveRawData(MD_RawData):
+
+    """
+        MD_RawData reading an output file from the archive in fdir
+    """
+
+    def __init__(self, fdir, fname, dtype, nperbin, memmap=False):
+        self.archive = ResultsArchive(fdir, fname)
+        MD_RawData.__init__(self, fdir, fname, dtype, nperbin, memmap=False)
+
+    def find_outfiles(self, fdir, fname):
+        self.separate_outfiles = False
+
+    def get_maxrec(self):
+        return self.archive.nrecs - 1
+
+    def refresh(self):
+        # Archives are complete when written
+        return 0
+
+    def source_files(self, startrec, endrec):
+        return [self.archive.filepath]
+
+    def source_stamps(self, startrec, endrec):
+        # The archive is complete, stamped as a whole file
+        return RawData.source_stamps(self, startrec, endrec)
+
+    def adopt_stamps(self, stamps, since):
+        return RawData.adopt_stamps(self, stamps, since)
+
+    def read(self, startrec, endrec, binlimits=None, verbose=False,
+             missingrec='raise', memmap=None):
+
+        if (verbose):
+            print(('Reading {0:s} recs {1:5d} to {2:5d} from {3:s}'.format(
+                  self.fname, startrec, endrec, self.archive.filepath)))
+        bindata = self.archive.read_records(int(startrec), int(endrec),
+                                            binlimits, missingrec)
+        return self.to_workdtype(bindata)
+
+
+class Serial_CFD_ArchiveRawData(Serial_CFD_RawData):
+
+    """
+        Serial_CFD_RawData reading an output file from the archive in fdir
+    """
+
+    def __init__(self, fdir, fname, dtype, nperbin):
+        self.archive = ResultsArchive(fdir, fname)
+        Serial_CFD_RawData.__init__(self, fdir, fname, dtype, nperbin)
+        self.separate_outfiles = False
+
+    def get_maxrec(self):
+        return self.archive.nrecs - 1
+
+    def source_files(self, startrec, endrec):
+        return [self.archive.filepath]
+
+    def read(self, startrec, endrec, binlimits=None, verbose=False,
+             missingrec='raise'):
+
+        if (verbose):
+            print(('Reading {0:s} recs {1:5d} to {2:5d} from {3:s}'.format(
+                  self.fname, startrec, endrec, self.archive.filepath)))
+        bindata = self.archive.read_records(int(startrec), int(endrec),
+                                            binlimits, missingrec)
+        return self.to_workdtype(bindata)
@@ -97,16 +97,19 @@ class CFD_RawData(RawData):
         npercell = filesize / (dprealbytes*ngridpoints) 
         return npercell
 
-    def read(self,startrec,endrec,binlimits=None,verbose=False,**kwargs):
+    def read(self,startrec,endrec,binlimits=None,verbose=False,
+             missingrec='raise',**kwargs):
 
         nrecs = endrec - startrec + 1
         # Efficient memory allocation
-        subdata = np.empty((self.nrx,self.nry,self.nrz,nrecs,self.npercell))
+        subdata = np.empty((self.nrx,self.nry,self.nrz,nrecs,self.npercell),
+                           dtype=self.workdtype)
 
-        # Loop through files and insert data
-        for plusrec in range(0,nrecs):
+        subdoms = self.get_subdomlist()
+        filepaths = [self.fdir + subdoms[startrec+plusrec] 
+                     for plusrec in range(0,nrecs)]
 
-            fpath = self.fdir + self.get_subdomlist().pop(startrec+plusrec)
+        def readrec(fpath, plusrec):
             with open(fpath,'rb') as fobj:
                 data = np.fromfile(fobj,dtype='d')
                 # zxy ordered in file
@@ -130,6 +133,10 @@ class CFD_RawData(RawData):
                 # insert into array
                 subdata[:,:,:,plusrec,:] = data 
 
+        # Read files concurrently into their record of subdata
+        subdata = self.read_records(filepaths, readrec, subdata, recaxis=3,
+                                    missingrec=missingrec, verbose=verbose)
+
         # If bin limits are specified, return only those within range
         if (binlimits):
 
@@ -55,14 +55,8 @@ class Channelflow_strainField(Channelflow_complexField,Channelflow_vField):
         vdata = self.vField.read(startrec, endrec, 
                                  binlimits=None)
 
-        grid = self.vField.Raw.grid
-        x, y, z = grid
-        dx = np.gradient(x)
-        dy = np.gradient(y)
-        dz = np.gradient(z)
-        dX,dY,dZ = np.meshgrid(dx,dy,dz,indexing='ij')
-
-        straindata = self.grad(vdata,dX,dY,dZ)
+        # Derivatives on the non-uniform grid coordinates
+        straindata = self.grad(vdata, usegrid=True)
 
 #        straindata = np.zeros((vdata.shape[0],vdata.shape[1],vdata.shape[2],vdata.shape[3],9))
 #        print(vdata.shape)
@@ -2,10 +2,10 @@
 import numpy as np
 import subprocess as sp
 import os
-import sys
 try:
     import h5py
-except:
+except ImportError:
+    h5py = None
     print("h5py package not avilable -- using ascii conversion")
 
 from .rawdata import RawData
@@ -21,10 +21,12 @@ class Channelflow_RawData(RawData):
         self.header = None
         self.grid = self.get_gridtopology()
         self.maxrec = len(self.subdomlist)-1 # count from 0
-        try:
+        if (h5py is not None):
             self.read_field = self.read_h5field
-        except:
-            self.read_field = self.asciiread_field
+            self.read_slab = self.read_h5slab
+        else:
+            self.read_field = self.read_asciifield
+            self.read_slab = self.read_asciislab
 
     def get_channelflow_utils(self):
 
@@ -167,21 +169,52 @@ class Channelflow_RawData(RawData):
 
     def convert(self,filename):
         """
-            Convert *.h5 format to ascii *.ff format
+            Convert *.h5 format to ascii *.ff format, reusing a
+            previous conversion unless the *.h5 file is newer
         """
         filebase = filename.replace('.h5','')
-        if (os.path.isfile(filebase + '.asc')):
+        fileasc = filebase + '.asc'
+        try:
+            if (os.path.getmtime(fileasc) >= os.path.getmtime(filebase + '.h5')):
+                return fileasc
+        except OSError:
             pass
-        else: 
-            syscall = self.ascii2field + ' -p ' + filebase + '.h5 ' + filebase + '.asc'
-            print(("Output file in ascii format not founts, " + 
-                  "attempting to convert using field2ascii routine"))
-            try:
-                os.system(syscall)
-            except:
-                raise
 
-        return filebase + '.asc'
+        print(("Output file in ascii format not founts, " + 
+              "attempting to convert using field2ascii routine"))
+        try:
+            sp.check_call([self.ascii2field, '-p', filebase + '.h5', fileasc])
+        except (OSError, sp.CalledProcessError) as e:
+            raise IOError("Unable to convert " + filename + ", " + str(e))
+
+        return fileasc
+
+    def asciicache(self,fpath):
+        """
+            Binary copy of the field converted to ascii from fpath,
+            stored as fdir/.ppl/channelflow/<name>.asc.npy when first
+            read so each file is only converted and parsed once.
+            Returns the field, memory mapped if cached.
+        """
+        fileasc = self.convert(fpath)
+        cachedir = os.path.join(os.path.dirname(fileasc), '.ppl', 'channelflow')
+        cachepath = os.path.join(cachedir, os.path.basename(fileasc) + '.npy')
+        try:
+            if (os.path.getmtime(cachepath) >= os.path.getmtime(fileasc)):
+                return np.load(cachepath, mmap_mode='r')
+        except (OSError, ValueError):
+            pass
+
+        data = self.read_asciifield(fpath)
+        tmppath = cachepath + '.tmp' + str(os.getpid()) + '.npy'
+        try:
+            if (not os.path.isdir(cachedir)):
+                os.makedirs(cachedir)
+            np.save(tmppath, data)
+            os.replace(tmppath, cachepath)
+        except (IOError, OSError):
+            pass
+        return data
 
     def linear2cosinegrid(self,lingrid):
 
@@ -219,11 +252,8 @@ class Channelflow_RawData(RawData):
     def read(self,startrec,endrec, binlimits=None, verbose=False, 
                 missingrec='raise',wallnormaldir=1):
 
-        return_zeros = False
-
+        startrec = int(startrec); endrec = int(endrec)
         nrecs = endrec - startrec + 1
-        nbins = [self.nx, self.ny, self.nz]
-        lower = np.empty(3); upper = np.empty(3)
 
         if nrecs > len(self.subdomlist):
             print(('Number of records ', nrecs , ' greater than ', len(self.subdomlist) ,
@@ -233,68 +263,48 @@ class Channelflow_RawData(RawData):
                   startrec, ' to ', len(self.subdomlist)+startrec,
                   ' available:', self.subdomlist))
 
-        def add_laminar(vin,lims):
-            v_laminar = self.cosinegrid(a=-1.0, b=1.0, Npoints=self.nry)
-            return vin[:] - v_laminar[lims[0]:lims[1]]
-
         # If bin limits are specified, return only those within range
-        for axis in range(3):
-            if (binlimits):
-                if (binlimits[axis] == None):
-                    lower[axis] = 0
-                    upper[axis] = int(nbins[axis])
-                else:
+        nbins = [int(self.nx), int(self.ny), int(self.nz)]
+        lower = [0]*3; upper = list(nbins)
+        if (binlimits):
+            for axis in range(3):
+                if (binlimits[axis] != None):
                     lower[axis] = int(binlimits[axis][0]) 
                     upper[axis] = int(binlimits[axis][1])
-            else:
-                lower[axis] = 0
-                upper[axis] = int(nbins[axis])
-
-        # Efficient memory allocation
-        subdata = np.empty((upper[0]-lower[0],
+        slab = tuple(slice(l, u) for l, u in zip(lower, upper))
+
+        # Records are stored in the order of the files, components 
+        # first, so each is one contiguous block which the hyperslab
+        # of a file is read straight into. subdata is a view of them 
+        # in the usual [nx, ny, nz, nrecs, npercell] order.
+        recdata = np.empty((nrecs, self.npercell,
+                            upper[0]-lower[0],
                             upper[1]-lower[1],
-                            upper[2]-lower[2],nrecs,self.npercell))
-
-        data =  np.empty((self.nx,
-                          self.ny,
-                          self.nz,nrecs,self.npercell))
-
-        # Loop through files and insert data
-        for plusrec in range(0,nrecs):
+                            upper[2]-lower[2]),
+                           dtype=self.workdtype)
+        subdata = np.transpose(recdata, (2, 3, 4, 0, 1))
 
+        filepaths = []
+        for rec in range(startrec, endrec+1):
             try:
-                #fpath = self.fdir + self.subdomlist.pop(startrec+plusrec)
-                fpath = self.fdir + self.subdomlist[startrec+plusrec]
+                filepaths.append(self.fdir + self.subdomlist[rec])
             except IndexError:
-                if missingrec is 'raise':
-                    raise DataNotAvailable
-                elif missingrec is 'returnszeros':
-                    return_zeros = True
-                elif missingrec is 'skip':
-                    sys.exit("Skip not developed in Channelflow_rawdata class")
-
-            if return_zeros:
-                data = np.zeros((self.nx,
-                                 self.ny,
-                                 self.nz,self.npercell))
-            else:
-                data = self.read_field(fpath)
-
-            # insert into array
-            subdata[:,:,:,plusrec,:] = data[lower[0]:upper[0],
-                                            lower[1]:upper[1],
-                                            lower[2]:upper[2], :]
-
-
-            #Add u component of laminar flow in wallnormal direction
-            lims = (lower[wallnormaldir],upper[wallnormaldir])
-            subdata[:,:,:,plusrec,0] = np.apply_along_axis(add_laminar,wallnormaldir, 
-                                                            subdata[:,:,:,plusrec,0],lims)
-
-
-            #Reset return zero flag
-            return_zeros = False
-         
+                filepaths.append(self.fdir + 'u' + str(rec*self.plotfreq) + '.h5')
+
+        def readrec(fpath, plusrec):
+            if (not os.path.isfile(fpath)):
+                raise IOError
+            self.read_slab(fpath, slab, recdata[plusrec])
+
+        subdata = self.read_records(filepaths, readrec, subdata, recaxis=3,
+                                    missingrec=missingrec, verbose=verbose)
+
+        #Add u component of laminar flow in wallnormal direction
+        v_laminar = self.cosinegrid(a=-1.0, b=1.0, Npoints=self.nry)
+        shape = [1]*4; shape[wallnormaldir] = -1
+        subdata[:,:,:,:,0] -= np.reshape(
+            v_laminar[lower[wallnormaldir]:upper[wallnormaldir]], shape)
+
         return subdata
 
     # Read channelflow field
@@ -303,7 +313,7 @@ class Channelflow_RawData(RawData):
         fileasc = self.convert(fpath)
         with open(fileasc,'r') as fobj:
             data = np.fromfile(fobj,sep='\n')
-            return np.reshape(data,[self.nx,self.ny,self.nz,self.npercell])
+            return np.reshape(data,[int(self.nx),int(self.ny),int(self.nz),self.npercell])
 
 #            for nx in range(self.nx):
 #                for ny in range(self.ny):
@@ -325,5 +335,16 @@ class Channelflow_RawData(RawData):
             data = list(fobj['data'].items())[0][1]
             return np.transpose(np.array(data),(1,2,3,0))
 
+    # Read the cells slab = (xslice, yslice, zslice) of a channelflow 
+    # field into out[npercell, nx, ny, nz]
+    def read_h5slab(self,fpath,slab,out):
+        with h5py.File(fpath,'r') as fobj:
+            data = list(fobj['data'].items())[0][1]
+            data.read_direct(out, source_sel=(slice(0, self.npercell),) + slab)
+
+    def read_asciislab(self,fpath,slab,out):
+        data = self.asciicache(fpath)
+        out[...] = np.moveaxis(data[slab + (slice(0, self.npercell),)], -1, 0)
+
 
 
@@ -0,0 +1,241 @@
+#! /usr/bin/env python
+import numpy as np
+import threading
+import json
+import os
+
+"""
+
+    Index of the output files in a results directory
+
+    Binned outputs are written either to a single file fname or to one
+    file per record, fname.%07d, so a long run can leave 10^5 files in
+    a directory. Rather than globbing the directory for each potential
+    output and again in every reader, the directory is listed once with
+    os.scandir into a table of
+
+        files      {name: size} of files without a record number
+        records    {fname: (sorted record numbers, sizes)}
+
+    which is shared by all readers of the directory in the process and,
+    for a directory large enough to be slow to list (or already holding
+    a .ppl directory), saved to fdir/.ppl/dirindex.json, so reopening
+    an unchanged case doesn't list the directory at all. Looking up a
+    directory never creates anything in it. The modification time of the
+    directory, which changes whenever a file is added or removed, is
+    checked on each lookup (one stat) and the directory rescanned if it
+    differs from the time the table was built.
+
+    Sizes are those at the time of the scan, files still being appended
+    to should be checked directly.
+
+    Obtain the shared index with DirectoryIndex.for_dir(fdir).
+
+"""
+
+class DirectoryIndex(object):
+
+    # Files listed before the index is worth saving in a new .ppl 
+    # directory, smaller directories are listed again each session
+    minsavefiles = 1000
+
+    # Shared index objects, one per directory
+    registry = {}
+    registrylock = threading.Lock()
+
+    @classmethod
+    def for_dir(cls, fdir, indexfile='.ppl/dirindex.json'):
+
+        """
+            Return the index of fdir, up to date with its contents
+        """
+
+        if (fdir[-1] != '/'): fdir += '/'
+        key = os.path.abspath(fdir)
+        with cls.registrylock:
+            try:
+                index = cls.registry[key]
+            except KeyError:
+                index = cls(fdir, fdir + indexfile)
+                cls.registry[key] = index
+        index.validate()
+        return index
+
+    def __init__(self, fdir, path):
+
+        """
+            fdir       -  results directory, string
+            path       -  location of the saved index, string
+        """
+
+        if (fdir[-1] != '/'): fdir += '/'
+        self.fdir = fdir
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.files = {}
+        self.records = {}
+
+    def dir_mtime(self):
+        try:
+            return os.stat(self.fdir).st_mtime_ns
+        except OSError:
+            return None
+
+    def validate(self):
+
+        """
+            Rescan the directory if files have been added or removed
+            since the index was built, loading a saved index on first
+            use if it is still current
+        """
+
+        with self.lock:
+            mtime = self.dir_mtime()
+            if (mtime is not None and mtime == self.mtime):
+                return
+            if (self.mtime is None and mtime is not None
+                and self.load(mtime)):
+                return
+            self.scan()
+            self.mtime = mtime
+            if (mtime is not None):
+                self.save()
+
+    def scan(self):
+
+        """
+            List the directory in a single pass
+        """
+
+        files = {}
+        records = {}
+        try:
+            entries = list(os.scandir(self.fdir))
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            try:
+                if (not entry.is_file()):
+                    continue
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            stem, dot, suffix = entry.name.rpartition('.')
+            if (dot and stem and suffix.isdigit()):
+                records.setdefault(stem, []).append((int(suffix), size))
+            else:
+                files[entry.name] = size
+
+        self.files = files
+        self.records = {}
+        for stem, recs in records.items():
+            recs = np.array(sorted(recs), dtype=np.int64)
+            self.records[stem] = (recs[:,0], recs[:,1])
+
+    def load(self, mtime):
+
+        """
+            Read the saved index if it was built at mtime, returns
+            False if it is missing or out of date
+        """
+
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (IOError, ValueError):
+            return False
+
+        if (saved.get('mtime') != mtime):
+            return False
+
+        self.files = saved['files']
+        self.records = {}
+        for stem, (recnos, sizes) in saved['records'].items():
+            self.records[stem] = (np.array(recnos, dtype=np.int64),
+                                  np.array(sizes, dtype=np.int64))
+        self.mtime = mtime
+        return True
+
+    def nfiles(self):
+        return len(self.files) + sum([recnos.size for recnos, sizes 
+                                      in self.records.values()])
+
+    def save(self):
+
+        """
+            Write the index, silently skipped if the directory is read
+            only or too small to need it
+        """
+
+        indexdir = os.path.dirname(self.path)
+        if (not os.path.isdir(indexdir)):
+            if (self.nfiles() < self.minsavefiles 
+                or not os.access(self.fdir, os.W_OK)):
+                return
+            try:
+                os.makedirs(indexdir)
+            except OSError:
+                return
+            # Which changes the modification time of the results 
+            # directory, so list it again to save a matching index
+            self.mtime = self.dir_mtime()
+            self.scan()
+
+        saved = {'mtime': self.mtime, 'files': self.files,
+                 'records': {stem: [recnos.tolist(), sizes.tolist()]
+                             for stem, (recnos, sizes) in self.records.items()}}
+        tmppath = self.path + '.tmp' + str(os.getpid())
+        try:
+            with open(tmppath, 'w') as f:
+                json.dump(saved, f)
+            os.replace(tmppath, self.path)
+        except (IOError, OSError):
+            try:
+                os.remove(tmppath)
+            except OSError:
+                pass
+
+    def has_file(self, name):
+        """
+            True if the single file name is present, an empty name is
+            the directory itself (as glob.glob(fdir+name))
+        """
+        return (name == '' or name in self.files)
+
+    def has_records(self, fname):
+        """
+            True if any separate record files fname.* are present
+        """
+        return (fname in self.records)
+
+    def present(self, fname):
+        return (self.has_file(fname) or self.has_records(fname))
+
+    def recnos(self, fname):
+        """
+            Sorted record numbers of the files fname.*
+        """
+        try:
+            return self.records[fname][0]
+        except KeyError:
+            return np.zeros(0, dtype=np.int64)
+
+    def sizes(self, fname):
+        """
+            Sizes of the files fname.* in the order of recnos
+        """
+        try:
+            return self.records[fname][1]
+        except KeyError:
+            return np.zeros(0, dtype=np.int64)
+
+    def maxrec(self, fname):
+        """
+            Last record number of the files fname.*, None if none
+        """
+        recnos = self.recnos(fname)
+        if (recnos.size == 0):
+            return None
+        return int(recnos[-1])
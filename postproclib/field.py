@@ -1,8 +1,29 @@
 #! /usr/bin/env python
 import numpy as np
 import sys
+import os
 
 from .pplexceptions import OutsideRecRange
+from .reducedcache import ReducedCache
+from .indexes import CumulativeIndex, PlaneSumIndex
+from .gradients import gradient
+from .staggered import cellcentre_to_vertex, cellcentre_to_surface
+from .remap import lineartocosine, cosinetolinear, cosine_points
+from .writers import write_records, write_dx, write_vtk, write_ascii
+from .spectra import (energy_spectrum, fold_negatives, welch_segments,
+                      map_segments)
+
+
+def sum_dtype(data):
+
+    """
+        Type to accumulate sums of data in, double precision for 
+        reduced precision floating point data, otherwise None (as data)
+    """
+
+    if (data.dtype.kind == 'f' and data.dtype.itemsize < 8):
+        return np.float64
+    return None
 
 
 class Field():
@@ -40,6 +61,24 @@ class Field():
 
     """
     
+    # Number of records read at a time when averaging over the record
+    # axis, None reads the whole range in one go
+    chunksize = None
+    # Fields whose read already averages over records (e.g. before
+    # taking a gradient) can't be summed a chunk of records at a time
+    streamable = True
+    # On-disk cache of reduced data used by profile and contour,
+    # switched on with enable_cache
+    cache = None
+    # Sidecar index of running sums over records used to average 
+    # over record windows, switched on with enable_cumulative_index
+    cumulative_index = None
+    # Sidecar index of plane sums along each axis used by profiles,
+    # switched on with enable_plane_index
+    plane_index = None
+    # FieldGraph evaluating this field, set only during evaluation
+    graph = None
+
     def __init__(self, RawDataObj):
         self.Raw = RawDataObj
         self.fdir = self.Raw.fdir
@@ -59,6 +98,7 @@ class Field():
                   'available (' + str(self.maxrec) + ').'))
             raise OutsideRecRange
 
+        kwargs.pop('chunksize', None)
         grid_data = self.Raw.read(startrec,endrec,**kwargs)
         return grid_data
     
@@ -72,7 +112,100 @@ class Field():
         except AttributeError:
             raise
 
-    def averaged_data(self,startrec,endrec,avgaxes=(),**kwargs):
+    def streamed_sums(self, readfn, startrec, endrec, avgaxes=(), 
+                      chunksize=None):
+
+        """
+            Sum each of the arrays returned by readfn(startrec, endrec) 
+            over avgaxes. When the record axis (3) is in avgaxes, records
+            are read chunksize at a time and added to running totals, so 
+            only one chunk is ever held in memory.
+
+            Returns a list of sums, one per array from readfn, and the 
+            number of values summed into each output cell.
+        """
+
+        if (chunksize is None):
+            chunksize = self.chunksize
+
+        nrecs = endrec - startrec + 1
+        if (chunksize is None or not self.streamable 
+            or 3 not in avgaxes or chunksize >= nrecs):
+            chunks = [(startrec, endrec)]
+        else:
+            chunks = [(rec, min(rec+chunksize-1, endrec)) 
+                      for rec in range(startrec, endrec+1, chunksize)]
+
+        sums = None; count = 0
+        for srec, erec in chunks:
+            data = readfn(srec, erec)
+            count += int(np.prod([data[0].shape[a] for a in avgaxes]))
+            if (avgaxes != ()):
+                data = [np.sum(d, axis=avgaxes, dtype=sum_dtype(d)) 
+                        for d in data]
+            if (sums is None):
+                sums = data
+            else:
+                for d, s in zip(data, sums):
+                    s += d
+
+        return sums, count
+
+    def summed_data(self, startrec, endrec, avgaxes=(), chunksize=None, 
+                    **kwargs):
+
+        """
+            Sum of the data over avgaxes and the number of values summed
+            in each output cell, see streamed_sums. Used by averaged_data 
+            and by complex fields which form ratios of summed quantities.
+        """
+
+        if (type(self).read is Field.read
+            and set(kwargs) <= set(['binlimits', 'missingrec', 'verbose'])):
+            indexed = self.indexed_sums(startrec, endrec, avgaxes, 
+                                        kwargs.get('binlimits', None))
+            if (indexed is not None):
+                return indexed
+
+        def readfn(srec, erec):
+            return [self.read(srec, erec, **kwargs)]
+
+        sums, count = self.streamed_sums(readfn, startrec, endrec, 
+                                         avgaxes=avgaxes, chunksize=chunksize)
+        return sums[0], count
+
+    def indexed_sums(self, startrec, endrec, avgaxes, binlimits=None):
+
+        """
+            Sum of the data over avgaxes and the number of values summed
+            from any enabled sidecar index able to answer the request,
+            or None to read the data itself
+        """
+
+        # Profiles from sums over the planes normal to the profile axis
+        spatial = [a for a in (0, 1, 2) if a not in avgaxes]
+        if (self.plane_index is not None and len(spatial) == 1
+            and (binlimits is None 
+                 or all(b is None for b in binlimits))):
+            data = self.plane_index.plane_sums(spatial[0], startrec, endrec)
+            if (data is not None):
+                shape = self.plane_index.nbins + [endrec - startrec + 1]
+                count = int(np.prod([shape[a] for a in avgaxes]))
+                return np.sum(data, axis=avgaxes), count
+
+        # Sum over records from the difference of two running sums
+        if (self.cumulative_index is not None and 3 in avgaxes):
+            data = self.cumulative_index.window_sum(startrec, endrec)
+            if (data is not None):
+                if (binlimits):
+                    data = self.trim_binlimits(binlimits, data)
+                count = (endrec - startrec + 1)*int(np.prod([data.shape[a] 
+                                                    for a in avgaxes if a != 3]))
+                return np.sum(data, axis=avgaxes), count
+
+        return None
+
+    def averaged_data(self,startrec,endrec,avgaxes=(),chunksize=None,**kwargs):
 
         """
             TO BE OVERRIDDEN IN ALL COMPLICATED FIELDS.
@@ -80,15 +213,240 @@ class Field():
         """
 
         # Read 4D time series from startrec to endrec
-        grid_data = self.read(startrec, endrec, **kwargs)
+        if (avgaxes == ()):
+            return self.read(startrec, endrec, **kwargs)
            
-        # Average over axes
-        if (avgaxes != ()):
-            grid_data = np.mean(grid_data, axis=avgaxes) 
+        # Average over axes, reading chunksize records at a time
+        grid_data, count = self.summed_data(startrec, endrec, avgaxes=avgaxes,
+                                            chunksize=chunksize, **kwargs)
+        grid_data = np.divide(grid_data, float(count))
 
         #return avg_data
         return grid_data 
 
+    def inputs(self):
+
+        """
+            Fields this one is computed from, by default every Field 
+            held as an attribute. Fields built from inputs in other 
+            ways should override this. See FieldGraph.
+        """
+
+        found = []
+        for obj in vars(self).values():
+            if (isinstance(obj, Field) and obj is not self 
+                and not any(obj is f for f in found)):
+                found.append(obj)
+        return found
+
+    def subfields(self):
+
+        """
+            All Field objects contained in this one, found recursively
+        """
+
+        found = []
+        for obj in self.inputs():
+            for sub in [obj] + obj.subfields():
+                if (not any(sub is f for f in found)):
+                    found.append(sub)
+        return found
+
+    def source_files(self, startrec, endrec):
+
+        """
+            Files read to obtain records startrec to endrec of this field
+            and any fields it contains, an empty list if not known
+        """
+
+        files = []
+        for field in [self] + self.subfields():
+            try:
+                fieldfiles = field.Raw.source_files(startrec, endrec)
+            except AttributeError:
+                return []
+            if (fieldfiles == []):
+                return []
+            files += fieldfiles
+        return files
+
+    def source_stamps(self, startrec, endrec):
+
+        """
+            Stamps of the source_files of records startrec to endrec, 
+            see RawData.source_stamps, an empty list if not known
+        """
+
+        stamps = []
+        for field in [self] + self.subfields():
+            try:
+                fieldstamps = field.Raw.source_stamps(startrec, endrec)
+            except AttributeError:
+                return []
+            if (fieldstamps == []):
+                return []
+            stamps += fieldstamps
+        return stamps
+
+    def adopt_stamps(self, stamps, since):
+
+        """
+            Adopt stamps stored at time since still valid for the source
+            files of this field and its subfields, see 
+            MD_RawData.adopt_stamps
+        """
+
+        adopted = False
+        for field in [self] + self.subfields():
+            try:
+                adopted = field.Raw.adopt_stamps(stamps, since) or adopted
+            except AttributeError:
+                pass
+        return adopted
+
+    def set_workdtype(self, workdtype):
+
+        """
+            Floating point type of the data read by this field and the
+            fields it contains, e.g. 'f' to read in single precision or
+            None (default) for double precision. Sums over axes are
+            still accumulated in double precision.
+        """
+
+        for field in [self] + self.subfields():
+            try:
+                field.Raw.workdtype = workdtype
+            except AttributeError:
+                pass
+
+    def set_memmap(self, memmap):
+
+        """
+            Read records of this field and the fields it contains as 
+            memory mapped views where the reader supports it, so 
+            profiles and contours only page in the data they use
+        """
+
+        for field in [self] + self.subfields():
+            if (hasattr(field, 'memmap')):
+                field.memmap = memmap
+            try:
+                if (hasattr(field.Raw, 'memmap')):
+                    field.Raw.memmap = memmap
+            except AttributeError:
+                pass
+
+    def enable_cumulative_index(self):
+
+        """
+            Sum over records of this field and the fields it contains 
+            using a sidecar index of running sums, so averages over any
+            window of records cost two reads. See CumulativeIndex.
+        """
+
+        for field in [self] + self.subfields():
+            try:
+                field.cumulative_index = CumulativeIndex.for_raw(field.Raw)
+            except AttributeError:
+                pass
+
+    def disable_cumulative_index(self):
+        for field in [self] + self.subfields():
+            field.cumulative_index = None
+
+    def enable_plane_index(self):
+
+        """
+            Answer profiles of this field and the fields it contains 
+            from a sidecar index of plane sums along each axis, without
+            reading the 3D data. See PlaneSumIndex.
+        """
+
+        for field in [self] + self.subfields():
+            try:
+                field.plane_index = PlaneSumIndex.for_raw(field.Raw)
+            except AttributeError:
+                pass
+
+    def disable_plane_index(self):
+        for field in [self] + self.subfields():
+            field.plane_index = None
+
+    def refresh(self):
+
+        """
+            Pick up records written since this field was opened, e.g.
+            by a running simulation, extending maxrec of the field and
+            the fields it contains in place. Enabled sidecar indexes 
+            are extended over the new records only. Returns the number
+            of new records of this field.
+        """
+
+        oldmaxrec = self.maxrec
+        maxrecs = []
+        for field in self.inputs():
+            field.refresh()
+            maxrecs.append(field.maxrec)
+        try:
+            self.Raw.refresh()
+            maxrecs.append(self.Raw.maxrec)
+        except AttributeError:
+            pass
+        if (maxrecs == []):
+            return 0
+
+        maxrec = min(maxrecs)
+        if (maxrec <= oldmaxrec):
+            return 0
+        self.maxrec = maxrec
+        for index in (self.cumulative_index, self.plane_index):
+            if (index is not None):
+                index.update(int(maxrec))
+        return int(maxrec - oldmaxrec)
+
+    def enable_cache(self, cachedir='.ppl/cache'):
+
+        """
+            Store reduced results from profile and contour on disk 
+            under the results directory, see ReducedCache
+        """
+
+        if (self.cache is None):
+            self.cache = ReducedCache(self.fdir, cachedir=cachedir)
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
+    def cached_averaged_data(self, startrec, endrec, avgaxes=(), **kwargs):
+
+        """
+            averaged_data, loaded from the on-disk cache if enabled and 
+            the source files are unchanged, otherwise computed and stored
+        """
+
+        if (self.cache is None or avgaxes == ()):
+            return self.averaged_data(startrec, endrec, avgaxes=avgaxes, 
+                                      **kwargs)
+
+        stamps = self.source_stamps(startrec, endrec)
+        if (stamps == []):
+            return self.averaged_data(startrec, endrec, avgaxes=avgaxes, 
+                                      **kwargs)
+
+        key = self.cache.key(self, startrec, endrec, avgaxes, kwargs)
+        data = self.cache.load(key, stamps)
+        # Stored from a file since appended to, e.g. in an earlier session
+        if (data is None and self.adopt_stamps(*self.cache.stored_stamps(key))):
+            stamps = self.source_stamps(startrec, endrec)
+            data = self.cache.load(key, stamps)
+        if (data is None):
+            data = self.averaged_data(startrec, endrec, avgaxes=avgaxes, 
+                                      **kwargs)
+            self.cache.save(key, stamps, data)
+
+        return data
+
     def contour(self,axes,startrec=0,endrec=None,**kwargs):
 
         """
@@ -104,7 +462,8 @@ class Field():
         if (endrec==None): 
             endrec = self.maxrec
 
-        data = self.averaged_data(startrec, endrec, avgaxes=avgaxes, **kwargs)
+        data = self.cached_averaged_data(startrec, endrec, avgaxes=avgaxes, 
+                                         **kwargs)
         # Need version 1.7.1 of numpy or higher
         X, Y = np.meshgrid(self.grid[axes[0]],self.grid[axes[1]],indexing='ij')
         return X, Y, data 
@@ -123,7 +482,8 @@ class Field():
         if (endrec==None): 
             endrec = self.maxrec
 
-        data = self.averaged_data(startrec,endrec,avgaxes=avgaxes,**kwargs)
+        data = self.cached_averaged_data(startrec,endrec,avgaxes=avgaxes,
+                                         **kwargs)
         return self.grid[axis], data
 
     def quiver(self,axes,components=None,startrec=0,endrec=None,**kwargs):
@@ -184,7 +544,7 @@ class Field():
         newaxes = axismanager.current_axes_numbers(avgaxes)
         if (None in newaxes):
             sys.exit("Can't average over an axis that has been reduced")
-        avgdata = np.mean(data, axis=newaxes) 
+        avgdata = np.mean(data, axis=newaxes, dtype=sum_dtype(data)) 
         axismanager.reduce_axes(avgaxes)
         return avgdata
 
@@ -196,12 +556,11 @@ class Field():
         return fftdata
 
     def managed_energyfield(self,axismanager, data, fftaxes):
-        
-        def add_negatives(a):
-            b = a
-            for i in range(1,len(b)/2):
-                b[i] += a[-i]
-            return b
+
+        """
+            Energy in each non-negative wavenumber of fftdata, a full 
+            transform over fftaxes, with negative wavenumbers folded in
+        """
 
         newfftaxes = axismanager.current_axes_numbers(fftaxes)
 
@@ -214,28 +573,24 @@ class Field():
         E = np.abs(data)**2.0
          
         #Add negative contributions to positive wavenumbers
-        nd = len(E.shape)
-        slicer = [slice(None)]*nd
         for axis in newfftaxes:
+            E = fold_negatives(E, axis)
 
-            E = np.apply_along_axis(add_negatives,axis,E)
-            # Discard negative parts after adding to positive
-            k = E.shape[axis]
-            mid = int(np.ceil(float(k)/2.0))
-            cutout = np.s_[0:mid+1:1]
-            slicer[axis] = cutout
-            E = E[slicer]
+        return E/N
 
-            # Refresh slice for new axis calculation
-            slicer[axis] = slice(None)
+    def managed_spectrum(self, axismanager, data, fftaxes):
 
-        return E/N
+        """
+            Energy in each non-negative wavenumber over fftaxes of data,
+            using a real-to-complex transform for real data
+        """
 
-    def managed_window(self,axismanager, data, windowaxis):
+        newfftaxes = axismanager.current_axes_numbers(fftaxes)
+        if (None in newfftaxes):
+            sys.exit("Can't fft over an axis that has been reduced")
+        return energy_spectrum(data, newfftaxes)
 
-        def window_axis_function(a, window):
-            a = a * window
-            return a
+    def managed_window(self,axismanager, data, windowaxis):
 
         newaxis = axismanager.current_axis_number(windowaxis)
 
@@ -246,8 +601,9 @@ class Field():
         wss = np.sum(window**2.0)/float(N)
 
         # Apply window
-        windoweddata = np.apply_along_axis(window_axis_function, 
-                                           newaxis, data, window)
+        shape = [1]*data.ndim
+        shape[newaxis] = N
+        windoweddata = data * np.reshape(window, shape)
 
         return windoweddata, wss
 
@@ -276,10 +632,22 @@ class Field():
     def power_spectrum(self,data=None,startrec=None,endrec=None,
                        preavgaxes=(), fftaxes=(),postavgaxes=(), 
                        windowaxis=None, verify_Parseval=True,
-                       savefile=None,**kwargs):
+                       savefile=None, nperseg=None, noverlap=None, 
+                       nthreads=1, **kwargs):
 
         """
-            Calculates power spectrum
+            Calculates power spectrum, the energy in each non-negative 
+            wavenumber over fftaxes
+
+            Optional inputs:
+
+                nperseg  - average the spectra of segments of nperseg
+                           records (Welch's method) rather than 
+                           transforming all records at once
+                noverlap - records shared by consecutive segments 
+                           (default nperseg//2)
+                nthreads - number of segments read and transformed
+                           concurrently
         """
 
         # ---------------------------------------------------------------- 
@@ -317,6 +685,13 @@ class Field():
                 message += "that won't be Fourier transformed. This makes no "
                 message += "sense. Aborting."
         
+        if (nperseg is not None and data is None
+            and 3 not in fftaxes and 3 not in postavgaxes):
+            message = "Warning: you're asking me to average spectra over "
+            message += "segments of records without transforming or "
+            message += "averaging over the record axis. Aborting."
+            sys.exit(message)
+
         # ---------------------------------------------------------------- 
         # Do the process 
         if (startrec==None):
@@ -324,33 +699,57 @@ class Field():
 
         if (endrec==None):
             endrec = self.maxrec
-         
-        axisman = self.AxisManager()
-        if data == None:
-            data = self.read(startrec, endrec,**kwargs)
 
-        data = self.managed_mean(axisman, data, preavgaxes)
+        # Spectra of overlapping segments of records are averaged
+        # (Welch), so only nthreads segments are in memory at once
+        if (data is not None or nperseg is None):
+            segments = [(startrec, endrec)]
+        else:
+            segments = welch_segments(startrec, endrec, nperseg, noverlap)
 
-        if (windowaxis):
-            data, wss = self.managed_window(axisman, data, windowaxis)
+        def segment_spectrum(segment):
 
-        if (verify_Parseval):
-            Esumreal = np.sum(np.abs(data)**2.0)
+            axisman = self.AxisManager()
+            if data is None:
+                segdata = self.read(segment[0], segment[1], **kwargs)
+            else:
+                segdata = data
+
+            segdata = self.managed_mean(axisman, segdata, preavgaxes)
 
-        fftdata = self.managed_fft(axisman, data, fftaxes)
-        energy = self.managed_energyfield(axisman, fftdata, fftaxes)
+            if (windowaxis):
+                segdata, wss = self.managed_window(axisman, segdata, windowaxis)
+
+            Esumreal = 0.; Esumfft = 0.
+            if (verify_Parseval):
+                Esumreal = np.sum(np.abs(segdata)**2.0)
+
+            energy = self.managed_spectrum(axisman, segdata, fftaxes)
+            del segdata
+            if (verify_Parseval):
+                Esumfft = np.sum(energy)
+
+            if (windowaxis):
+                energy = energy / wss
+
+            energy = self.managed_mean(axisman, energy, postavgaxes)
+            return energy, Esumreal, Esumfft
+
+        energy = None; Esumreal = 0.; Esumfft = 0.
+        for segenergy, segreal, segfft in map_segments(segment_spectrum, 
+                                                       segments, nthreads):
+            if (energy is None):
+                energy = segenergy
+            else:
+                energy += segenergy
+            Esumreal += segreal; Esumfft += segfft
+        energy /= float(len(segments))
 
         if (verify_Parseval):
-            Esumfft = np.sum(energy)
             ratio = abs(Esumreal - Esumfft)/Esumreal 
             perc = (1. - ratio)*100.
             print(('Parseval thm (discounting window): ' + "%9.6f"%perc + '%'))
 
-        if (windowaxis):
-            energy = energy / wss
-
-        energy = self.managed_mean(axisman, energy, postavgaxes)
-
         if (savefile):
             with open(savefile,'w') as f:
                 f.write(energy)
@@ -360,10 +759,23 @@ class Field():
 
     def grad(self, data, dx=None, 
                          dy=None, 
-                         dz=None, preavgaxes=()):
+                         dz=None, preavgaxes=(), boundary='onesided',
+                         usegrid=False):
 
         """
-            Return the gradient of a vector field
+            Return the gradient of a field, with component 3*i + j 
+            holding d data_i / d x_j, see gradients.gradient
+
+            Optional inputs:
+
+                dx, dy, dz - bin size, or 1D array of bin coordinates for 
+                             non-uniform grids, along each axis (default
+                             Raw.dx, Raw.dy, Raw.dz)
+                preavgaxes - axes averaged over before differentiating
+                boundary   - 'onesided' or 'periodic', or a list of 
+                             one for each axis
+                usegrid    - take coordinates from Raw.grid rather 
+                             than using a uniform bin size
         """
 
         # ---------------------------------------------------------------- 
@@ -374,35 +786,25 @@ class Field():
             except:
                 print('Failed to make preavgaxes in grad')
 
-        #if (dxyz is None):
-        #    dxyz=[self.Raw.dx,self.Raw.dy,self.Raw.dz]
-
         data = np.mean(data,axis=preavgaxes,keepdims=True)
 
-        if (dx is None):
-            dx=self.Raw.dx
-        if (dy is None):
-            dy=self.Raw.dy
-        if (dz is None):
-            dz=self.Raw.dz
-        dxyz = (dx, dy, dz)
-
-        ndims = data.shape[4]
-        nonsingleton = [i!=1 for i in data.shape[0:3]]
-        dxyz = [elem for i,elem in enumerate(dxyz) if nonsingleton[i]]
-
-        gradv = np.zeros(list(data.shape[:-1]) + [3*ndims])
-        for rec in range(gradv.shape[-2]):
-            for ixyz in range(ndims):
-
-                grad_temp = np.gradient(np.squeeze(data[:,:,:,rec,ixyz]), 
-                                        dx, dy, dz)
+        if (usegrid):
+            dxyz = list(self.Raw.grid)
+        else:
+            dxyz = [self.Raw.dx, self.Raw.dy, self.Raw.dz]
+        for ixyz, d in enumerate([dx, dy, dz]):
+            if (d is not None):
+                dxyz[ixyz] = d
 
-                for jxyz in range(np.sum(nonsingleton)):
-                    c = 3*ixyz + jxyz   
-                    gradv[:,:,:,rec,c] = grad_temp[jxyz]
+        # Cylindrical polar bins, with radius at the centre of each bin
+        radius = None
+        if (getattr(self, 'cpol_bins', False)):
+            radius = (self.Raw.grid[0] + 0.5*self.Raw.domain[0] 
+                      + float(self.Raw.header.r_oi))
+            if (0 in preavgaxes):
+                radius = np.mean(radius, keepdims=True)
 
-        return gradv
+        return gradient(data, dxyz, boundary=boundary, radius=radius)
 
 
     def write(self, data, fdir, fname, startrec=0, endrec=None, **kwargs):
@@ -431,7 +833,8 @@ class Field():
                        endrec=endrec, **kwargs)
 
     def write_dx_file(self, startrec, endrec, writedir=None, 
-                            component=0, norm=False, origin=None, **kwargs):
+                            component=0, norm=False, origin=None, nprocs=1,
+                            **kwargs):
 
         """
            Write MD field to dx file format which is primarily
@@ -441,120 +844,104 @@ class Field():
            NOTE -- VMD dx format assumes data points are located at the
                    cell vertices while Field class and it's children contain
                    cell centred data
+           Files for each record are written by a pool of nprocs processes
         """
 
+        #Get file name
+        if (writedir == None):
+            writedir = self.fdir + '/vmd/vol_data/'
+        name = str(self).split('.')[1].split(' ')[0]
+
         #Get field data
         datamin = []; datamax = []
-        for rec in range(startrec,endrec):
-
-            data = self.read(startrec=rec,endrec=rec,**kwargs)
-
-            if norm:
-                if ((np.max(data[:,:,:,:,component])) > 1e-14):
-                    data = (data-np.min(data[:,:,:,:,component])
-                            /( np.max(data[:,:,:,:,component])
-							  -np.min(data[:,:,:,:,component])))
-
-
-            #Return minimum and maximum values
-            datamin.append(np.min(data[:,:,:,:,component]))
-            datamax.append(np.max(data[:,:,:,:,component]))
-
-            Nx, Ny, Nz = data.shape[0], data.shape[1], data.shape[2]
-            dx,dy,dz = [(self.grid[i][1] - self.grid[i][0]) for i in range(3)]
-            Lx = float(Nx) * dx; Ly = float(Ny) * dy; Lz = float(Nz) * dz
-            originx = np.min(self.grid[0])
-            originy = np.min(self.grid[1])
-            originz = np.min(self.grid[2])
-            if origin != None:
-                assert len(origin) == 3
-                originx = origin[0] #-Ly/2
-                originy = origin[1] #-Ly/2.0
-                originz = origin[2] #-Lz/2.0
-            data = self.cellcentre2vertex(data[:,:,:,0,component])
-
-            Nx_v, Ny_v, Nz_v = data.shape[0], data.shape[1], data.shape[2]
-
-            #Get file name
-            if (writedir == None):
-                writedir = self.fdir + '/vmd/vol_data/'
-
-            dxFileName = writedir + 'DATA' + str(rec) + '.dx'
-
-            #Write data
-            with open(dxFileName,'w+') as f:
-
-                # - - Write Header - -
-                #dx_ = dx*1.25; dy_ = dy*1.25; dz_ = dz*1.25
-                f.write("object 1 class gridpositions counts%8.0f%8.0f%8.0f\n" % (Nx_v,Ny_v,Nz_v))
-                f.write("origin%16g%16g%16g\n" % (originx,originy,originz))
-                f.write("delta %16g 0 0\n" % dx)
-                f.write("delta 0 %16g 0\n" % dy)
-                f.write("delta 0 0 %16g\n" % dz)
-                f.write("object 2 class gridconnections counts%8.0f%8.0f%8.0f\n" % (Nx_v,Ny_v,Nz_v))
-                f.write("object 3 class array type double rank 0 items%8.0f follows\n" % (Nx_v*Ny_v*Nz_v))
-
-                # - - Write Data - -
-                col=1
-                for i in range(Nx_v):
-                    for j in range(Ny_v):
-                        for k in range(Nz_v):
-                            f.write("%16E" %  data[i,j,k])
-                            col=col+1
-                            if (col>3):
-                                f.write(' \n')
-                                col=1
-
-                # - - Write Footer - - 
-                if (col != 1):
-                    f.write('           \n')
-                f.write('object "'+str(self).split('.')[1].split(' ')[0]+'" class field \n')
+        def jobs():
+            for rec in range(int(startrec),int(endrec)):
+
+                data = self.read(startrec=rec,endrec=rec,**kwargs)
+
+                if norm:
+                    if ((np.max(data[:,:,:,:,component])) > 1e-14):
+                        data = (data-np.min(data[:,:,:,:,component])
+                                /( np.max(data[:,:,:,:,component])
+                                  -np.min(data[:,:,:,:,component])))
+
+                #Return minimum and maximum values
+                datamin.append(np.min(data[:,:,:,:,component]))
+                datamax.append(np.max(data[:,:,:,:,component]))
+
+                dx,dy,dz = [(self.grid[i][1] - self.grid[i][0]) for i in range(3)]
+                originxyz = [np.min(self.grid[i]) for i in range(3)]
+                if origin != None:
+                    assert len(origin) == 3
+                    originxyz = origin
+                data = self.cellcentre2vertex(data[:,:,:,0,component])
+
+                dxFileName = writedir + 'DATA' + str(rec) + '.dx'
+                yield (dxFileName, data, originxyz, (dx,dy,dz), name)
+
+        write_records(write_dx, jobs(), nprocs)
 
         return np.mean(datamin), np.mean(datamax)
 
+    def write_vtk_file(self, startrec, endrec, writedir=None, binary=True,
+                       nprocs=1, **kwargs):
+
+        """
+           Write each record from startrec to endrec to a legacy VTK
+           file writedir/<field>.<rec>.vtk holding the cell data on a
+           uniform grid, binary by default. Files are written by a pool
+           of nprocs processes. Returns the list of files written.
+        """
+
+        if (writedir == None):
+            writedir = self.fdir + 'vtk/'
+        if (not os.path.isdir(writedir)):
+            os.makedirs(writedir)
+        name = type(self).__name__
+
+        spacing = [(self.grid[i][1] - self.grid[i][0]) for i in range(3)]
+        origin = [self.grid[i][0] - 0.5*spacing[i] for i in range(3)]
+
+        def jobs():
+            for rec in range(int(startrec), int(endrec)+1):
+                data = self.read(startrec=rec, endrec=rec, **kwargs)
+                vtkFileName = writedir + name + '.' + "%07d"%rec + '.vtk'
+                yield (vtkFileName, data[:,:,:,0,:], origin, spacing, 
+                       name, binary)
+
+        return write_records(write_vtk, jobs(), nprocs)
+
     # Write ascii type field
     def write_asciifield(self,startrec,endrec,
                         writedir=None,maptocosine=True,
-                        flipdir=[False,True,False],**kwargs):
+                        flipdir=[False,True,False],nprocs=1,**kwargs):
+
+        """
+            Write each record to writedir/u<rec>.asc, one value per line
+            ordered x, y, z, component, mapping the wall normal (y) 
+            direction to a cosine grid if maptocosine. Directions in 
+            flipdir are written in reverse. Files are written by a pool
+            of nprocs processes.
+        """
 
         #Get file name
         if (writedir == None):
             writedir = self.fdir
 
-        Nx, Ny, Nz = data.shape[0], data.shape[1], data.shape[2]
-        Nxyz = [Nx,Ny,Nz]
-        for n,flip in enumerate(flipdir):
-            if flip:
-                mindir[n] = Nxyz[n]
-                maxdir[n] = 0
-            else:
-                mindir[n] = 0
-                maxdir[n] = Nxyz[n] 
-
         data = self.read(startrec=startrec,endrec=endrec,**kwargs)
 
-        outfiles =[]
-        for rec in range(startrec,endrec):
-
-            FileName = writedir + 'u' + str(rec) + '.asc'
-            outfiles.append(FileName)
-            with open(FileName,'w+') as f:
-                for nx in range(mindir[0],maxdir[0]):
-                    for ny in range(mindir[1],maxdir[1]):
-                        for nz in range(mindir[2],maxdir[2]):
-                            for ixyz in data.shape[4]:
-                                if maptocosine:
-                                    f.write(str(
-                                                self.map_data_lineartocosine(
-                                                data[nx,ny,nz,rec,ixyz],
-                                                self.Raw.Ny,
-                                                self.Raw.a,
-                                                self.Raw.b))
-                                            +"\n")
-                                else:
-                                    f.write(str(
-                                                data[nx,ny,nz,rec,ixyz])
-                                            +"\n")
+        # Remap every column at once
+        if maptocosine:
+            data = lineartocosine(data, self.Raw.Ny, self.Raw.a, self.Raw.b,
+                                  axis=1)
+
+        flipaxes = tuple([n for n, flip in enumerate(flipdir) if flip])
+        if (flipaxes != ()):
+            data = np.flip(data, axis=flipaxes)
+
+        jobs = [(writedir + 'u' + str(startrec+plusrec) + '.asc', 
+                 data[:,:,:,plusrec,:]) for plusrec in range(data.shape[3])]
+        outfiles = write_records(write_ascii, jobs, nprocs)
 
         return outfiles
 
@@ -562,44 +949,26 @@ class Field():
     # Write ascii type field
     def map_3Ddata_cosinetolinear(self,data,flipdir=[False,True,False],**kwargs):
 
-        Nx, Ny, Nz = data.shape[0], data.shape[1], data.shape[2]
-        Nxyz = [Nx,Ny,Nz]
-        mindir = [0,0,0]; maxdir = [Nx,Ny,Nz]
-        for n,flip in enumerate(flipdir):
-            if flip:
-                mindir[n] = Nxyz[n]
-                maxdir[n] = 0
-            else:
-                mindir[n] = 0
-                maxdir[n] = Nxyz[n] 
-
-        lindata = np.empty(data.shape)
-        for nx in range(mindir[0],maxdir[0]):
-            for nz in range(mindir[2],maxdir[2]):
-                for rec in range(data.shape[3]):
-                    for ixyz in range(data.shape[4]):
-                        print((nx,nz,rec,ixyz))
-                        lindata[nx,:,nz,rec,ixyz] = self.map_data_cosinetolinear(
-                                            data[nx,:,nz,rec,ixyz],
-                                            self.Raw.Ny,
-                                            self.Raw.a,
-                                            self.Raw.b)
+        """
+            Map 5D data on the cosine grid in the wall normal (y) 
+            direction to a linear grid, all columns at once. flipdir
+            is not used and kept for existing callers.
+        """
+
+        lindata = cosinetolinear(data, self.Raw.Ny, self.Raw.a, self.Raw.b,
+                                 axis=1)
 
         return lindata
 
     def map_data_lineartocosine(self, values_on_linear_grid, Ny, a, b, plot=False):
         """
-            Map data on a linear grid to a cosine grid 
+            Map data on a linear grid to a cosine grid, along the first
+            axis of values_on_linear_grid
         """
-        import scipy.interpolate as interp
-        ycells = np.linspace(0, Ny, Ny)
-        ylin = np.linspace(a, b, Ny)
-        ycos = 0.5*(b+a) - 0.5*(b-a)*np.cos((ycells*np.pi)/(Ny-1))
-        values_on_cosine_grid = interp.griddata(ylin, values_on_linear_grid, 
-                                                ycos, method='cubic',
-                                                fill_value=values_on_linear_grid[-1])
+        values_on_cosine_grid = lineartocosine(values_on_linear_grid, Ny, a, b)
         if plot:
             import matplotlib.pyplot as plt
+            ylin, ycos = cosine_points(Ny, a, b)
             plt.plot(ylin,values_on_linear_grid,'o-',alpha=0.4,label='lineartocosine Before')
 
             plt.plot(ycos,values_on_cosine_grid,'x-',label='lineartocosine After')
@@ -609,23 +978,10 @@ class Field():
 
     def map_data_cosinetolinear(self,values_on_cosine_grid,Ny,a,b):
             """
-                Map data on a cosine grid to a linear grid 
+                Map data on a cosine grid to a linear grid, along the 
+                first axis of values_on_cosine_grid
             """
-            import scipy.interpolate as interp
-            ycells = np.linspace(0, Ny, Ny)
-            ylin = np.linspace(a, b, Ny)
-            ycos = 0.5*(b+a) - 0.5*(b-a)*np.cos((ycells*np.pi)/(Ny-1))
-            #print(ycos.shape,values_on_cosine_grid.shape)
-            #plt.plot(ycos,values_on_cosine_grid,'x-',label='cosinetolinear Before')
-            values_on_linear_grid = interp.griddata(ycos, values_on_cosine_grid, 
-                                                    ylin, method='cubic',
-                                                    fill_value=values_on_cosine_grid[-1])
-            #from scipy.ndimage import map_coordinates
-            #values_on_linear_grid = interp2.map_coordinates(values_on_cosine_grid,ycos,output=ylin)
-            #plt.plot(ylin,values_on_linear_grid,'o-',alpha=0.4,label='cosinetolinear After')
-            #plt.legend()
-            #plt.show()
-            return values_on_linear_grid
+            return cosinetolinear(values_on_cosine_grid, Ny, a, b)
 
     def field_interpolator(self, celldata):
 
@@ -638,20 +994,14 @@ class Field():
         return fn
 
     def interp_3Darrays(self, fn, x, y, z):
+
             """
-                We need array data as a list of lists
+                Evaluate interpolator fn at every point of the grid x, y, z
             """
 
-            #We need array data as a list of lists
-            pts = []
-            for i, xp in enumerate(x):
-                for j, yp in enumerate(y):
-                    for k, zp in enumerate(z):
-                        pts.append([xp, yp, zp])
-   
-            #Interpolate and reshape
-            data = fn(pts)
-            interpdata = data.reshape(x.size, y.size, z.size)
+            pts = np.stack(np.meshgrid(x, y, z, indexing='ij'), axis=-1)
+            data = fn(pts.reshape(-1, 3))
+            interpdata = data.reshape((x.size, y.size, z.size) + data.shape[1:])
             return interpdata
 
 
@@ -659,90 +1009,48 @@ class Field():
 
         """
            Routine to return grid data on an array one larger than the existing
-           cell centred data - currently uses zoom for simplicity
+           cell centred data in each spatial direction, either by zoom or by
+           linear interpolation (method="interp"), which accepts any trailing
+           record and component axes, see staggered.cellcentre_to_vertex
 
         """
-        if method is "zoom":
+        if method == "zoom":
             import scipy.ndimage
             Nx, Ny, Nz = celldata.shape[0], celldata.shape[1], celldata.shape[2]
             vertexdata = scipy.ndimage.zoom(celldata,((Nx+1)/float(Nx),
                                                       (Ny+1)/float(Ny),
                                                       (Nz+1)/float(Nz)))
 
-        elif method is "interp":
-
-            #Define values
-            xg = self.grid[0]
-            yg = self.grid[1]
-            zg = self.grid[2]
-            dx = xg[1]-xg[0]
-            dy = yg[1]-yg[0]
-            dz = zg[1]-zg[0]
-
-            #Get interpolator
-            fn = self.field_interpolator(celldata)
-
-            #Get grid of courner nodes
-            Nx, Ny, Nz = celldata.shape[0], celldata.shape[1], celldata.shape[2]
+        elif method == "interp":
 
-            assert Nx == self.grid[0].size
-            assert Ny == self.grid[1].size
-            assert Nz == self.grid[2].size
-            x = np.linspace(self.grid[0][0]-0.5*dx, self.grid[0][-1]+0.5*dx, Nx+1)
-            y = np.linspace(self.grid[1][0]-0.5*dy, self.grid[1][-1]+0.5*dy, Ny+1)
-            z = np.linspace(self.grid[2][0]-0.5*dz, self.grid[2][-1]+0.5*dz, Nz+1)
+            assert celldata.shape[0] == self.grid[0].size
+            assert celldata.shape[1] == self.grid[1].size
+            assert celldata.shape[2] == self.grid[2].size
+            vertexdata = cellcentre_to_vertex(celldata, self.grid)
 
-            vertexdata = self.interp_3Darrays(fn, x, y, z)
         else:
-            raise exception("Unknown method")
-
+            raise ValueError("Unknown method " + str(method))
 
         return vertexdata
 
     def cellcentre2surface(self, celldata, method="interp"):
 
-        if method is "interp":
+        """
+           Interpolate cell centred data onto the 6 surfaces of each cell,
+           returning [nx, ny, nz, 6] or, for data [nx, ny, nz, ..., ndata],
+           [nx, ny, nz, ..., 6*ndata], see staggered.cellcentre_to_surface
 
-            surfacedata = np.zeros((celldata.shape[0], 
-                                    celldata.shape[1], 
-                                    celldata.shape[2],6))
+        """
 
-            #Get grid of centre abd surface values
-            Nx, Ny, Nz = celldata.shape[0], celldata.shape[1], celldata.shape[2]
-            assert Nx == self.grid[0].size
-            assert Ny == self.grid[1].size
-            assert Nz == self.grid[2].size
-            xg = self.grid[0]
-            yg = self.grid[1]
-            zg = self.grid[2]
-            dx = xg[1]-xg[0]
-            dy = yg[1]-yg[0]
-            dz = zg[1]-zg[0]
-            xs = np.linspace(self.grid[0][0]-0.5*dx, self.grid[0][-1]+0.5*dx, Nx+1)
-            ys = np.linspace(self.grid[1][0]-0.5*dy, self.grid[1][-1]+0.5*dy, Ny+1)
-            zs = np.linspace(self.grid[2][0]-0.5*dz, self.grid[2][-1]+0.5*dz, Nz+1)
-
-            #Get interpolator
-            fn = self.field_interpolator(celldata)
-
-            # x surfaces   xs, y, z
-            data = self.interp_3Darrays(fn, xs, yg, zg)
-            surfacedata[:,:,:,0] = data[:-1,:,:] #Bottom
-            surfacedata[:,:,:,3] = data[1:,:,:]  #Top
-
-
-            # y surfaces   x, ys, z
-            data = self.interp_3Darrays(fn, xg, ys, zg)
-            surfacedata[:,:,:,1] = data[:,:-1,:] #Bottom
-            surfacedata[:,:,:,4] = data[:,1:,:]  #Top
-
-            # z surfaces   x, y, zs
-            data = self.interp_3Darrays(fn, xg, yg, zs)
-            surfacedata[:,:,:,2] = data[:,:,:-1] #Bottom
-            surfacedata[:,:,:,5] = data[:,:,1:]  #Top
+        if method == "interp":
+
+            assert celldata.shape[0] == self.grid[0].size
+            assert celldata.shape[1] == self.grid[1].size
+            assert celldata.shape[2] == self.grid[2].size
+            surfacedata = cellcentre_to_surface(celldata, self.grid)
 
         else:
-            raise exception("Unknown method")
+            raise ValueError("Unknown method " + str(method))
 
         return surfacedata
 
@@ -0,0 +1,206 @@
+#! /usr/bin/env python
+import numpy as np
+
+"""
+
+    FieldGraph Class
+
+    Derived fields are computed from other fields, e.g.
+
+        dissipation -> strain rate -> velocity -> mass, momentum
+
+    and each Field reads its inputs independently, so asking for
+    several derived fields over the same records reads and combines
+    the same inputs many times. A FieldGraph evaluates a set of fields
+    together. The inputs declared by each field (Field.inputs) form a
+    dependency graph in which equivalent nodes, i.e. fields of the same
+    class and settings reading the same output file, are merged. While
+    the graph is evaluated each node is computed once per request and
+    its result kept only until every node depending on it has used it,
+    or has gone on to later records without it.
+
+    Example:
+
+        PP = MD_PostProc(fdir)
+        graph = FieldGraph({name: PP.plotlist[name]
+                            for name in ['T', 'u', 'rho u u', 'pVA']})
+        profiles = graph.profile(1, startrec=0, endrec=100)
+
+    Shared results are made read-only, so the arrays returned should be
+    copied before being modified in place. The fields must not be used
+    from another thread while a graph containing them is evaluated.
+
+"""
+
+def node_key(field):
+
+    """
+        Key identifying equivalent fields, made from the class, the
+        file read, any simple settings and the keys of its inputs
+    """
+
+    settings = []
+    for name, value in sorted(vars(field).items()):
+        if (isinstance(value, (str, int, float, bool, type(None)))):
+            settings.append((name, value))
+    try:
+        rawfile = field.Raw.fdir + field.Raw.fname
+    except AttributeError:
+        rawfile = None
+
+    return (type(field).__module__, type(field).__name__, rawfile,
+            tuple(settings), tuple([node_key(f) for f in field.inputs()]))
+
+
+class FieldGraph(object):
+
+    def __init__(self, fields):
+
+        """
+            fields - dictionary of Field objects to evaluate together,
+                     results are returned under the same keys
+        """
+
+        self.fields = fields
+
+        # Instances making up each node, the nodes each node is computed
+        # from and the nodes using the result of each node. An output 
+        # uses its own node, and reads by the method called on it (e.g.
+        # profile) are made on behalf of its node
+        self.nodes = {}
+        self.inputkeys = {}
+        self.consumers = {}
+        self.outputs = {}
+        for name, field in fields.items():
+            key = self.add_node(field)
+            self.consumers[key].add(key)
+            self.outputs[name] = key
+
+    def add_node(self, field):
+
+        key = node_key(field)
+        newnode = (key not in self.nodes)
+        if (newnode):
+            self.nodes[key] = []
+            self.inputkeys[key] = set()
+            self.consumers[key] = set()
+        elif (any(field is f for f in self.nodes[key])):
+            return key
+
+        # Inputs of every instance are shared too
+        self.nodes[key].append(field)
+        for inputfield in field.inputs():
+            inputkey = self.add_node(inputfield)
+            self.inputkeys[key].add(inputkey)
+            self.consumers[inputkey].add(key)
+        return key
+
+    def release(self, results, pending, callkey, consumer):
+
+        """
+            Record that consumer has used (or won't use) the result for
+            callkey, which is dropped once no consumer is left to use it
+        """
+
+        pending[callkey].discard(consumer)
+        if (not pending[callkey]):
+            del results[callkey]
+            del pending[callkey]
+
+    def finished(self, results, pending, consumer, keys, endrec=None):
+
+        """
+            Release results of nodes keys for records up to endrec (all
+            records if None) which consumer has finished with. Records
+            are read in increasing order, so any it hasn't read by now
+            it won't, e.g. an input read in other chunks or not at all
+        """
+
+        for callkey in list(pending.keys()):
+            if (callkey[0] in keys and (endrec is None or callkey[2] <= endrec)):
+                self.release(results, pending, callkey, consumer)
+
+    def shared_read(self, key, read, results, pending, current, done):
+
+        """
+            Wrap the read method of a node so each request is computed
+            once and released as soon as the last node using it has 
+            read it. current is the stack of nodes being computed, the
+            first being the output being evaluated, and done the outputs
+            already evaluated, which won't use any new result
+        """
+
+        def memoread(startrec, endrec, **kwargs):
+            # Arguments passed as None are left at their default
+            callkey = (key, startrec, endrec, 
+                       repr(sorted([(k, v) for k, v in kwargs.items()
+                                    if v is not None])))
+            consumer = current[-1]
+            try:
+                data = results[callkey]
+            except KeyError:
+                current.append(key)
+                try:
+                    data = read(startrec, endrec, **kwargs)
+                finally:
+                    current.pop()
+                if (isinstance(data, np.ndarray)):
+                    data.flags.writeable = False
+                results[callkey] = data
+                pending[callkey] = self.consumers[key] - done
+                self.finished(results, pending, key, self.inputkeys[key], 
+                              endrec)
+
+            if (callkey in pending):
+                self.release(results, pending, callkey, consumer)
+            return data
+
+        return memoread
+
+    def evaluate(self, method, *args, **kwargs):
+
+        """
+            Call method (e.g. 'read', 'averaged_data', 'profile') of
+            every field with the given arguments, returning a dictionary
+            of the results
+        """
+
+        results = {}; pending = {}; current = []; done = set()
+        patched = []
+        try:
+            for key, instances in self.nodes.items():
+                for field in instances:
+                    field.read = self.shared_read(key, field.read, results,
+                                                  pending, current, done)
+                    field.graph = self
+                    patched.append(field)
+
+            out = {}
+            for name, field in self.fields.items():
+                key = self.outputs[name]
+                current[:] = [key]
+                out[name] = getattr(field, method)(*args, **kwargs)
+                self.finished(results, pending, key, self.nodes)
+                done.add(key)
+
+        finally:
+            for field in patched:
+                del field.read
+                del field.graph
+
+        return out
+
+    def read(self, startrec, endrec, **kwargs):
+        return self.evaluate('read', startrec, endrec, **kwargs)
+
+    def averaged_data(self, startrec, endrec, avgaxes=(), **kwargs):
+        return self.evaluate('averaged_data', startrec, endrec,
+                             avgaxes=avgaxes, **kwargs)
+
+    def profile(self, axis, startrec=0, endrec=None, **kwargs):
+        return self.evaluate('profile', axis, startrec=startrec,
+                             endrec=endrec, **kwargs)
+
+    def contour(self, axes, startrec=0, endrec=None, **kwargs):
+        return self.evaluate('contour', axes, startrec=startrec,
+                             endrec=endrec, **kwargs)
@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+import threading
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+"""
+
+    Following the output of running simulations
+
+    A Follower refreshes a PostProc or Field (see Field.refresh) as new
+    records are written, extending maxrec in place and any enabled
+    sidecar indexes over the new records only, so nothing already read
+    is globbed or parsed again.
+
+    If inotify_simple is installed the results directories are watched
+    with inotify and fields are only refreshed after files in them
+    change. Otherwise, or if the watch can't be set up (e.g. on some
+    network filesystems), fields are refreshed every interval seconds,
+    which costs a stat of the next record file of each field.
+
+    Either call poll periodically, e.g. from a GUI timer, or start a
+    background thread which polls and calls callback with the result
+    of each refresh which found new records:
+
+        PP = MD_PostProc('./results')
+        follower = PP.follow(callback=print)
+        follower.start()
+
+"""
+
+class Follower(object):
+
+    def __init__(self, target, callback=None, interval=2.0, watchdirs=None):
+
+        """
+            target    - PostProc or Field to refresh
+            callback  - called with the result of target.refresh()
+                        whenever new records are found
+            interval  - seconds between polls of the background thread
+            watchdirs - directories to watch, default results directory
+        """
+
+        self.target = target
+        self.callback = callback
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+        if (watchdirs is None):
+            watchdirs = [self.resultsdir(target)]
+
+        self.inotify = None
+        if (INotify is not None):
+            mask = (flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE
+                    | flags.MOVED_TO)
+            try:
+                self.inotify = INotify()
+                for watchdir in watchdirs:
+                    self.inotify.add_watch(watchdir, mask)
+            except (OSError, TypeError) as e:
+                print(('Unable to watch ' + str(watchdirs) + ', ' + str(e)
+                       + ', polling instead'))
+                self.close()
+
+    def resultsdir(self, target):
+        try:
+            return target.resultsdir
+        except AttributeError:
+            return target.fdir
+
+    def changed(self, timeout=0.):
+
+        """
+            Wait up to timeout seconds for files to change, returns
+            False if none have. Always True when polling.
+        """
+
+        if (self.inotify is None):
+            if (timeout > 0.):
+                self.stopped.wait(timeout)
+            return True
+
+        events = self.inotify.read(timeout=int(1000*timeout))
+        return (len(events) > 0)
+
+    def poll(self, timeout=0.):
+
+        """
+            Refresh the target if files have changed within timeout
+            seconds, returns the new records found as target.refresh
+        """
+
+        if (not self.changed(timeout)):
+            return None
+
+        grown = self.target.refresh()
+        if (grown and self.callback is not None):
+            self.callback(grown)
+        return grown
+
+    def run(self):
+        while (not self.stopped.is_set()):
+            self.poll(self.interval)
+
+    def start(self):
+
+        """
+            Poll on a background thread until stop is called. The
+            callback is then called from that thread.
+        """
+
+        if (self.thread is not None):
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if (self.thread is not None):
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        self.stop()
+        if (self.inotify is not None):
+            self.inotify.close()
+            self.inotify = None
@@ -0,0 +1,129 @@
+#! /usr/bin/env python
+import numpy as np
+
+"""
+
+    Batched finite difference gradients of 5D field data
+
+    gradient differentiates a whole [nx, ny, nz, nrecs, ndims] block at
+    once along each spatial axis, writing every derivative straight
+    into its components of a preallocated output
+
+        out[nx, ny, nz, nrecs, 3*ndims],  out[..., 3*i + j] = d f_i / d x_j
+
+    Interior points use second order central differences, the same
+    stencils as numpy.gradient for uniform and non-uniform spacing.
+    Boundaries are either one-sided (first order, as numpy.gradient)
+    or periodic. Axes of length one have zero gradient.
+
+"""
+
+def gradient(data, spacing, boundary='onesided', radius=None, out=None):
+
+    """
+        Required inputs:
+
+            data     - 5D array [nx, ny, nz, nrecs, ndims]
+            spacing  - length-3 list with, for each spatial axis, either
+                       the (uniform) bin size or a 1D array of the bin
+                       centre coordinates for non-uniform grids
+
+        Optional inputs:
+
+            boundary - 'onesided' or 'periodic', or a length-3 list
+                       giving the boundary treatment of each axis
+            radius   - for cylindrical polar (r, theta, z) bins, 1D
+                       array of the radius of each bin along axis 0.
+                       The theta derivative is divided by r and, for
+                       vector data (ndims = 3), the terms from the
+                       rotation of the unit vectors are included
+            out      - preallocated output [nx, ny, nz, nrecs, 3*ndims]
+
+        Return:
+
+            out - gradient of data
+    """
+
+    if (isinstance(boundary, str)):
+        boundary = [boundary]*3
+
+    ndims = data.shape[4]
+    if (out is None):
+        out = np.empty(data.shape[0:4] + (3*ndims,))
+
+    for axis in range(3):
+        axis_derivative(data, axis, spacing[axis], boundary[axis],
+                        out[..., axis::3])
+
+    if (radius is not None):
+        r = np.reshape(radius, [-1, 1, 1, 1])
+        out[..., 1::3] /= r[..., np.newaxis]
+        if (ndims == 3):
+            out[..., 1] -= data[..., 1]/r
+            out[..., 4] += data[..., 0]/r
+
+    return out
+
+
+def axis_derivative(f, axis, h, boundary, out):
+
+    """
+        Derivative of f along axis written into out (same shape as f),
+        h is the uniform spacing or 1D array of coordinates
+    """
+
+    def sl(start, stop):
+        index = [slice(None)]*f.ndim
+        index[axis] = slice(start, stop)
+        return tuple(index)
+
+    n = f.shape[axis]
+    if (n < 2):
+        out[...] = 0.
+        return out
+
+    uniform = (np.ndim(h) == 0)
+    if (uniform):
+        h = float(h)
+        np.subtract(f[sl(2, None)], f[sl(None, -2)], out=out[sl(1, -1)])
+        np.divide(out[sl(1, -1)], 2.*h, out=out[sl(1, -1)])
+        dx = np.full(n-1, h)
+    else:
+        x = np.asarray(h, dtype=float)
+        if (x.shape != (n,)):
+            raise ValueError('Coordinates along axis ' + str(axis) +
+                             ' do not match data of length ' + str(n))
+        dx = np.diff(x)
+        if (n > 2):
+            shape = [1]*f.ndim
+            shape[axis] = n - 2
+            dx1 = dx[0:-1]; dx2 = dx[1:]
+            a = np.reshape(-(dx2)/(dx1 * (dx1 + dx2)), shape)
+            b = np.reshape((dx2 - dx1) / (dx1 * dx2), shape)
+            c = np.reshape(dx1 / (dx2 * (dx1 + dx2)), shape)
+            interior = out[sl(1, -1)]
+            scratch = np.empty(interior.shape)
+            np.multiply(f[sl(None, -2)], a, out=interior)
+            interior += np.multiply(f[sl(1, -1)], b, out=scratch)
+            interior += np.multiply(f[sl(2, None)], c, out=scratch)
+
+    if (boundary == 'onesided'):
+        np.subtract(f[sl(1, 2)], f[sl(0, 1)], out=out[sl(0, 1)])
+        np.divide(out[sl(0, 1)], dx[0], out=out[sl(0, 1)])
+        np.subtract(f[sl(-1, None)], f[sl(-2, -1)], out=out[sl(-1, None)])
+        np.divide(out[sl(-1, None)], dx[-1], out=out[sl(-1, None)])
+
+    elif (boundary == 'periodic'):
+        # Spacing across the boundary taken from the cells either side
+        gap = 0.5*(dx[0] + dx[-1])
+        edges = [(sl(0, 1), sl(-1, None), sl(1, 2), gap, dx[0]),
+                 (sl(-1, None), sl(-2, -1), sl(0, 1), dx[-1], gap)]
+        for edge, below, above, hl, hr in edges:
+            out[edge] = (-(hr)/(hl * (hl + hr)) * f[below]
+                         + (hr - hl) / (hl * hr) * f[edge]
+                         + hl / (hr * (hl + hr)) * f[above])
+
+    else:
+        raise ValueError('Unknown boundary ' + str(boundary))
+
+    return out
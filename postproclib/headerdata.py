@@ -23,18 +23,31 @@ class HeaderData:
 			varval =line.split(';')[2].strip()
 			vars(self)[varname] = varval
 
+def open_header(fdir, headername):
+
+	"""
+		Open a header file, or the copy of it held in an archive of 
+		the results directory if the file itself is not present
+	"""
+
+	try:
+		return open(fdir+headername,'r')
+	except IOError:
+		from .archiverawdata import read_archived_header
+		return read_archived_header(fdir, headername)
+
 class MDHeaderData(HeaderData):
 
     def __init__(self, fdir):
         if (fdir[-1] != '/'): fdir += '/'
-        fobj = open(fdir+'simulation_header','r')
+        fobj = open_header(fdir,'simulation_header')
         HeaderData.__init__(self,fobj)
 
 class Serial_CFD_HeaderData(HeaderData):
 
     def __init__(self, fdir):
         if (fdir[-1] != '/'): fdir += '/'
-        fobj = open(fdir+'continuum_header','r')
+        fobj = open_header(fdir,'continuum_header')
         HeaderData.__init__(self,fobj)
 
 class FEA_HeaderData(HeaderData):
@@ -0,0 +1,395 @@
+#! /usr/bin/env python
+import numpy as np
+import threading
+import json
+import os
+
+from .pplexceptions import DataNotAvailable, OutsideRecRange
+
+"""
+
+    Sidecar indexes of binned output files
+
+    A sidecar index stores a fixed size row of reduced data for each
+    record of a binned output file (mbins, vbins, pVA, ...) in the
+    results directory,
+
+        fdir/.ppl/index/<fname>.<suffix>        rows of float64
+        fdir/.ppl/index/<fname>.<suffix>.json   layout, rows stored and
+                                                source file stamps
+
+    Rows are appended as new records appear, so an index is built in
+    one pass over the data and then only extended while a run
+    progresses. The index is rebuilt if the layout (bins, items per
+    bin) no longer matches or the source file has been truncated.
+    The stamps (see RawData.source_stamps) of the files the rows were
+    built from are all checked the first time the index is used, and
+    then only the stamp of the last record indexed (of the single file,
+    or the last of a file per record) while it is kept in memory. With
+    a file per record, rows from the first changed file on are dropped
+    and rebuilt, otherwise a change to the source rebuilds the index.
+
+    One index object is kept per sidecar file in each process, obtain
+    them with the class method for_raw(Raw).
+
+"""
+
+class SidecarIndex(object):
+
+    # File extension of the sidecar, set by derived classes
+    suffix = None
+
+    # Records read at a time when building or extending the index
+    chunksize = 100
+
+    # Shared index objects, one per sidecar file
+    registry = {}
+    registrylock = threading.Lock()
+
+    @classmethod
+    def for_raw(cls, Raw, indexdir='.ppl/index'):
+
+        """
+            Return the index of this type for the file read by Raw
+        """
+
+        path = Raw.fdir + indexdir + '/' + Raw.fname + '.' + cls.suffix
+        with cls.registrylock:
+            try:
+                index = cls.registry[path]
+            except KeyError:
+                index = cls(Raw, path)
+                cls.registry[path] = index
+        return index
+
+    def __init__(self, Raw, path):
+
+        """
+            Raw        -  RawData object reading the indexed file, which
+                          must define fdir, fname, nbins and nperbin
+            path       -  location of the sidecar file, string
+        """
+
+        self.Raw = Raw
+        self.path = path
+        self.metapath = path + '.json'
+        self.lock = threading.Lock()
+        self.nbins = [int(n) for n in Raw.nbins]
+        self.nperbin = int(Raw.nperbin)
+        self.rowitems = self.get_rowitems()
+        self.meta = None
+
+    def get_rowitems(self):
+        """
+            Number of values stored per row
+        """
+        raise NotImplementedError
+
+    def initial_rows(self):
+        """
+            Rows written when the sidecar is created
+        """
+        return np.empty([0, self.rowitems])
+
+    def rows_from_records(self, data, lastrow):
+        """
+            Rows for each record in the 5D array data, lastrow is the
+            final row already stored (or None)
+        """
+        raise NotImplementedError
+
+    def layout(self):
+        return {'suffix': self.suffix, 'nbins': self.nbins,
+                'nperbin': self.nperbin, 'rowitems': self.rowitems}
+
+    def records_per_row_offset(self):
+        """
+            Difference between rows stored and records indexed
+        """
+        return len(self.initial_rows())
+
+    def read_meta(self):
+
+        try:
+            with open(self.metapath, 'r') as f:
+                meta = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        if (meta.get('layout') != self.layout()):
+            return None
+
+        # Sidecar shorter than recorded, e.g. interrupted write
+        try:
+            if (os.path.getsize(self.path) < 8*meta['nrows']*self.rowitems):
+                return None
+        except OSError:
+            return None
+
+        self.meta = meta
+        return meta
+
+    def source_stamps(self, nrows):
+        """
+            Stamps of the source files of the records in nrows rows
+        """
+        nrecs = nrows - self.records_per_row_offset()
+        if (nrecs <= 0):
+            return []
+        return self.Raw.source_stamps(0, nrecs-1)
+
+    def valid_rows(self, meta, full=True):
+
+        """
+            Number of stored rows built from records which are 
+            unchanged in the source. Unless full, only the stamp of the
+            last record is checked where there is a file per record, so
+            each use of an index already checked in full costs the same
+            whatever the number of records
+        """
+
+        offset = self.records_per_row_offset()
+        nrows = meta['nrows']
+        stored = meta.get('stamps')
+        nrecs = nrows - offset
+        if (not full and stored and len(stored) == nrecs
+            and stored[-1:] == self.Raw.source_stamps(nrecs-1, nrecs-1)):
+            return nrows
+
+        current = self.source_stamps(nrows)
+        if (stored == current):
+            return nrows
+
+        # Rows up to the first changed file are kept where there is
+        # a file per record, otherwise nothing can be
+        if (stored is None or len(stored) != len(current)
+            or len(current) != nrows - offset):
+            return offset
+        changed = [s != c for s, c in zip(stored, current)]
+        return offset + changed.index(True)
+
+    def validate(self, meta, full=True):
+
+        """
+            Drop rows of records changed in the source since they were
+            indexed, returns the (possibly new) meta data. See valid_rows
+            for full
+        """
+
+        nrows = self.valid_rows(meta, full)
+        if (nrows == meta['nrows']):
+            return meta
+        if (nrows <= self.records_per_row_offset()):
+            return self.create()
+        os.truncate(self.path, 8*nrows*self.rowitems)
+        self.write_meta(nrows)
+        return self.meta
+
+    def write_meta(self, nrows, stamps=None):
+        if (stamps is None):
+            stamps = self.source_stamps(nrows)
+        self.meta = {'layout': self.layout(), 'nrows': nrows, 
+                     'stamps': stamps}
+        with open(self.metapath + '.tmp', 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(self.metapath + '.tmp', self.metapath)
+
+    def create(self):
+
+        indexdir = os.path.dirname(self.path)
+        if (not os.path.isdir(indexdir)):
+            os.makedirs(indexdir)
+        rows = self.initial_rows()
+        with open(self.path, 'wb') as f:
+            rows.astype('d').tofile(f)
+        self.write_meta(len(rows))
+        return self.meta
+
+    def read_rows(self, first, last):
+
+        """
+            Rows first to last (inclusive) as a 2D array
+        """
+
+        n = last - first + 1
+        return np.fromfile(self.path, dtype='d', count=n*self.rowitems,
+                           offset=8*first*self.rowitems).reshape([n, self.rowitems])
+
+    def read_full_precision(self, startrec, endrec):
+
+        """
+            Records read from Raw in double precision, whatever working
+            type it is set to, as the index outlives the current session
+        """
+
+        workdtype = self.Raw.workdtype
+        self.Raw.workdtype = None
+        try:
+            return self.Raw.read(startrec, endrec, missingrec='raise')
+        finally:
+            self.Raw.workdtype = workdtype
+
+    def update(self, endrec, verbose=False):
+
+        """
+            Extend the index to cover records up to endrec, returns
+            False if these records can't be read
+        """
+
+        with self.lock:
+
+            # Layout and every record checked on first use, then only 
+            # the last record indexed
+            meta = self.meta
+            full = (meta is None)
+            if (meta is None):
+                meta = self.read_meta()
+                # Stamps of a file only appended to when stored still hold
+                if (meta is not None):
+                    self.Raw.adopt_stamps(meta.get('stamps') or [],
+                                          os.stat(self.metapath).st_mtime_ns)
+            try:
+                if (meta is None):
+                    meta = self.create()
+                else:
+                    meta = self.validate(meta, full)
+            except (IOError, OSError) as e:
+                print(('Unable to create index ' + self.path + ' ' + str(e)))
+                return False
+
+            offset = self.records_per_row_offset()
+            nrows = meta['nrows']
+            stamps = meta['stamps']
+            startrec = nrows - offset
+            if (endrec < startrec):
+                return True
+
+            if (nrows > 0):
+                lastrow = self.read_rows(nrows-1, nrows-1)[0]
+            else:
+                lastrow = None
+
+            if (verbose):
+                print(('Extending index {0:s} from rec {1:d} to {2:d}'.format(
+                      self.path, startrec, endrec)))
+
+            for srec in range(startrec, endrec+1, self.chunksize):
+                erec = min(srec+self.chunksize-1, endrec)
+                try:
+                    data = self.read_full_precision(srec, erec)
+                except (DataNotAvailable, OutsideRecRange, IOError, ValueError):
+                    return False
+                if (data is None or data.shape[3] != erec-srec+1):
+                    return False
+
+                rows = self.rows_from_records(data, lastrow)
+                with open(self.path, 'ab') as f:
+                    rows.astype('d').tofile(f)
+
+                # Only the new files are stamped with a file per record
+                newstamps = self.Raw.source_stamps(srec, erec)
+                if (len(stamps) == srec and len(newstamps) == erec-srec+1):
+                    stamps = stamps + newstamps
+                else:
+                    stamps = None
+                nrows += rows.shape[0]
+                self.write_meta(nrows, stamps)
+                stamps = self.meta['stamps']
+                lastrow = rows[-1]
+
+            return True
+
+
+class CumulativeIndex(SidecarIndex):
+
+    """
+        Running (prefix) sum over records of every bin. Row k holds
+        the sum of records 0 to k-1, so the sum over any window of
+        records startrec to endrec is the difference of two rows,
+
+            C[endrec+1] - C[startrec]
+
+        independent of the width of the window. Sums are accumulated
+        in double precision, so windows far from the first record
+        have a rounding error relative to the running total.
+    """
+
+    suffix = 'cumsum'
+
+    def get_rowitems(self):
+        return int(np.prod(self.nbins))*self.nperbin
+
+    def initial_rows(self):
+        return np.zeros([1, self.rowitems])
+
+    def rows_from_records(self, data, lastrow):
+        rows = np.moveaxis(data, 3, 0).reshape([data.shape[3], self.rowitems])
+        rows = np.cumsum(rows, axis=0, dtype='d')
+        if (lastrow is not None):
+            rows += lastrow
+        return rows
+
+    def window_sum(self, startrec, endrec, verbose=False):
+
+        """
+            Sum over records startrec to endrec of every bin, returned
+            as a 5D array [nx, ny, nz, 1, nperbin], or None if the
+            records are not available to the index
+        """
+
+        if (not self.update(endrec, verbose=verbose)):
+            return None
+
+        first = self.read_rows(startrec, startrec)[0]
+        last = self.read_rows(endrec+1, endrec+1)[0]
+        data = (last - first).reshape(self.nbins + [self.nperbin])
+        return np.expand_dims(data, 3)
+
+
+class PlaneSumIndex(SidecarIndex):
+
+    """
+        Sums over the planes normal to each spatial axis for every
+        record. Each row holds the nx, ny and nz plane sums of every
+        item in a bin, so a profile along any axis is obtained from
+        (nx + ny + nz)*nperbin values per record instead of the full
+        3D grid of the record. Rows of records rewritten since they
+        were summed are rebuilt before plane_sums returns them, see
+        SidecarIndex.validate.
+    """
+
+    suffix = 'planesum'
+
+    def get_rowitems(self):
+        return sum(self.nbins)*self.nperbin
+
+    def rows_from_records(self, data, lastrow):
+        nrecs = data.shape[3]
+        rows = []
+        for axis in range(3):
+            others = tuple([a for a in range(3) if a != axis])
+            sums = np.sum(data, axis=others, dtype='d')
+            rows.append(np.moveaxis(sums, 1, 0).reshape([nrecs, -1]))
+        return np.concatenate(rows, axis=1)
+
+    def plane_sums(self, axis, startrec, endrec, verbose=False):
+
+        """
+            Sums over planes normal to spatial axis for records startrec
+            to endrec, returned as a 5D array of unit length in the other
+            spatial axes, e.g. [nx, 1, 1, nrecs, nperbin] for axis 0, or 
+            None if the records are not available to the index
+        """
+
+        if (not self.update(endrec, verbose=verbose)):
+            return None
+
+        nrecs = endrec - startrec + 1
+        n = self.nbins[axis]
+        first = sum(self.nbins[:axis])*self.nperbin
+        rows = self.read_rows(startrec, endrec)
+        sums = rows[:, first:first+n*self.nperbin].reshape([nrecs, n, 
+                                                            self.nperbin])
+        shape = [1, 1, 1, nrecs, self.nperbin]
+        shape[axis] = n
+        return np.moveaxis(sums, 0, 1).reshape(shape)
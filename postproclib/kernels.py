@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+import numpy as np
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+"""
+
+    Fused kernels for fields formed from ratios of binned sums
+
+    Velocity, temperature, energy and similar fields divide one binned
+    sum by another, patch the NaNs left by empty bins and may remove
+    the kinetic energy of the streaming velocity, e.g.
+
+        T = KE/(3m) - |p/m|^2/3
+
+    Written as separate numpy operations each step allocates a full
+    size temporary. These kernels evaluate them writing into a single
+    output array: in one pass with numexpr if it is installed, and
+    otherwise component by component with numpy out= arguments, so only
+    single component scratch arrays are needed. Results are identical
+    to the plain numpy expressions: 0/0 gives zero and x/0 gives inf.
+
+    Set use_numexpr = False to always use numpy.
+
+"""
+
+use_numexpr = (numexpr is not None)
+
+def fusable(*arrays):
+
+    """
+        True if the arrays can be evaluated by numexpr, which differs
+        from numpy on integer division
+    """
+
+    return (use_numexpr and
+            all([np.issubdtype(a.dtype, np.floating) for a in arrays]))
+
+
+def ratio(num, den, denscale=1.0, out=None):
+
+    """
+        num/(denscale*den) with NaNs (from 0/0) set to zero
+    """
+
+    if (fusable(num, den)):
+        # Scalars in the type of the arrays, as numexpr would
+        # otherwise evaluate single precision inputs in double
+        scalar = np.result_type(num, den).type
+        expr = 'num/(denscale*den)' if (denscale != 1.0) else 'num/den'
+        return numexpr.evaluate('where({0} != {0}, zero, {0})'.format(expr),
+                                local_dict={'num': num, 'den': den,
+                                            'denscale': scalar(denscale),
+                                            'zero': scalar(0.)},
+                                out=out)
+
+    shape = np.broadcast(num, den).shape
+    if (out is None):
+        out = np.empty(shape, dtype=np.result_type(num, den, 1.0))
+    if (denscale != 1.0):
+        np.multiply(denscale, den, out=out)
+        np.divide(num, out, out=out)
+    else:
+        np.divide(num, den, out=out)
+    np.copyto(out, 0., where=np.isnan(out))
+    return out
+
+
+def square_sum(v, out=None):
+
+    """
+        Sum of squares of the components (last axis) of v, keeping a
+        last axis of length one, i.e. |v|^2
+    """
+
+    ndims = v.shape[-1]
+    if (fusable(v)):
+        names = {'v'+str(i): v[..., i:i+1] for i in range(ndims)}
+        expr = ' + '.join([n + '*' + n for n in sorted(names)])
+        return numexpr.evaluate(expr, local_dict=names, out=out)
+
+    if (out is None):
+        out = np.empty(v.shape[:-1] + (1,), dtype=np.result_type(v, 1.0))
+    np.multiply(v[..., 0:1], v[..., 0:1], out=out)
+    if (ndims > 1):
+        scratch = np.empty_like(out)
+        for i in range(1, ndims):
+            out += np.multiply(v[..., i:i+1], v[..., i:i+1], out=scratch)
+    return out
+
+
+def peculiar_ratio(num, den, v=None, denscale=1.0, vscale=1.0, out=None):
+
+    """
+        num/(denscale*den), with NaNs from 0/0 set to zero, less the
+        streaming contribution vscale*|v|^2 if v is given
+    """
+
+    if (v is None):
+        return ratio(num, den, denscale=denscale, out=out)
+
+    ndims = v.shape[-1]
+    if (fusable(num, den, v)):
+        names = {'v'+str(i): v[..., i:i+1] for i in range(ndims)}
+        vsq = ' + '.join([n + '*' + n for n in sorted(names)])
+        r = 'num/(denscale*den)' if (denscale != 1.0) else 'num/den'
+        scalar = np.result_type(num, den, v).type
+        names.update({'num': num, 'den': den, 'zero': scalar(0.),
+                      'denscale': scalar(denscale), 'vscale': scalar(vscale)})
+        return numexpr.evaluate('where({0} != {0}, zero, {0}) - vscale*({1})'.format(
+                                r, vsq), local_dict=names, out=out)
+
+    out = ratio(num, den, denscale=denscale, out=out)
+    v2 = square_sum(v)
+    v2 *= vscale
+    out -= v2
+    return out
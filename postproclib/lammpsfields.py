@@ -1,6 +1,7 @@
 import numpy as np
 
 from .field import Field
+from .kernels import ratio
 from .lammpsrawdata import LAMMPS_RawData
 
 class LAMMPSField(Field):
@@ -124,8 +125,7 @@ class LAMMPS_vField(LAMMPS_complexField):
         pdata = self.pField.read(startrec, endrec, binlimits=binlimits, **kwargs)
 
         # Divide and patch any NaNs
-        vdata = np.divide(pdata, mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(pdata, mdata)
 
         return vdata 
 
@@ -139,8 +139,7 @@ class LAMMPS_vField(LAMMPS_complexField):
             pdata = np.sum(pdata, axis=avgaxes) 
 
         # Divide and patch any NaNs
-        vdata = np.divide(pdata, mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(pdata, mdata)
 
         return vdata
 
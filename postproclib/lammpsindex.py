@@ -0,0 +1,227 @@
+#! /usr/bin/env python
+import numpy as np
+import threading
+import json
+import os
+
+"""
+
+    Record offsets of LAMMPS fix ave/chunk output
+
+    A LAMMPS chunk file is a series of records, each a header line
+
+        timestep nchunks totalcount
+
+    followed by one line per chunk. The index stores a row for every
+    complete record,
+
+        timestep, header offset, data offset, end offset, nchunks
+
+    (offsets in bytes) in the results directory,
+
+        fdir/.ppl/index/<fname>.offsets        rows of int64
+        fdir/.ppl/index/<fname>.offsets.json   rows stored, bytes scanned
+
+    so a record can be read as one contiguous block and parsed in C.
+    The file is scanned a large block at a time, finding line ends with
+    numpy, and only the headers are handled in Python. As the file grows
+    only the new part is scanned and rows appended. On each update, and
+    when a stored index is loaded, the index is rebuilt if the file is
+    shorter than scanned or the last indexed header no longer matches.
+
+    One index object is kept per file in each process, obtain them with
+    the class method for_file(fdir, fname).
+
+"""
+
+class LAMMPS_OffsetIndex(object):
+
+    # Values stored per record
+    rowitems = 5
+    # Bytes read at a time while scanning
+    blocksize = 64*1024**2
+
+    # Shared index objects, one per file
+    registry = {}
+    registrylock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, fdir, fname, indexdir='.ppl/index'):
+
+        """
+            Return the offset index of fdir+fname, up to date with the
+            records written so far
+        """
+
+        if (fdir[-1] != '/'): fdir += '/'
+        path = fdir + indexdir + '/' + fname + '.offsets'
+        with cls.registrylock:
+            try:
+                index = cls.registry[path]
+            except KeyError:
+                index = cls(fdir + fname, path)
+                cls.registry[path] = index
+        index.update()
+        return index
+
+    def __init__(self, filepath, path):
+
+        """
+            filepath   -  LAMMPS chunk file, string
+            path       -  location of the sidecar file, string
+        """
+
+        self.filepath = filepath
+        self.path = path
+        self.metapath = path + '.json'
+        self.lock = threading.Lock()
+        self.rows = np.zeros([0, self.rowitems], dtype=np.int64)
+        self.scanned = 0
+        self.loaded = False
+
+    def __len__(self):
+        return self.rows.shape[0]
+
+    def read_header(self, fobj, offset):
+        fobj.seek(offset)
+        return fobj.readline().split()
+
+    def matches(self, rows, scanned):
+
+        """
+            True if the file still holds the records indexed in rows,
+            i.e. it is at least scanned bytes long and the last indexed
+            header is unchanged
+        """
+
+        try:
+            if (os.path.getsize(self.filepath) < scanned):
+                return False
+            if (rows.shape[0] == 0):
+                return True
+            with open(self.filepath, 'rb') as fobj:
+                header = self.read_header(fobj, rows[-1,1])
+            return ([int(header[0]), int(header[1])] == [rows[-1,0], rows[-1,4]])
+        except (IOError, OSError, ValueError, IndexError):
+            return False
+
+    def load(self):
+
+        """
+            Read the stored index if it still matches the file
+        """
+
+        try:
+            with open(self.metapath, 'r') as f:
+                meta = json.load(f)
+            nrows = meta['nrows']
+            rows = np.fromfile(self.path, dtype=np.int64,
+                               count=nrows*self.rowitems)
+            rows = rows.reshape([-1, self.rowitems])
+        except (IOError, ValueError, KeyError):
+            return
+        if (rows.shape[0] != nrows or nrows == 0):
+            return
+
+        # Source rewritten or truncated since indexed
+        if (not self.matches(rows, meta['scanned'])):
+            return
+
+        self.rows = rows
+        self.scanned = meta['scanned']
+
+    def save(self, newrows):
+
+        """
+            Append newrows to the sidecar, silently skipped if the
+            results directory is read only
+        """
+
+        try:
+            indexdir = os.path.dirname(self.path)
+            if (not os.path.isdir(indexdir)):
+                os.makedirs(indexdir)
+            mode = 'ab' if (len(self) > newrows.shape[0]) else 'wb'
+            with open(self.path, mode) as f:
+                newrows.tofile(f)
+            with open(self.metapath + '.tmp', 'w') as f:
+                json.dump({'nrows': len(self), 'scanned': int(self.scanned)}, f)
+            os.replace(self.metapath + '.tmp', self.metapath)
+        except (IOError, OSError):
+            pass
+
+    def scan(self, start):
+
+        """
+            Rows of the complete records from byte offset start to the
+            end of the file, and the offset after the last of them
+        """
+
+        rows = []
+        base = start
+        carry = b''
+        with open(self.filepath, 'rb') as fobj:
+            fobj.seek(start)
+            while True:
+                block = fobj.read(self.blocksize)
+                if (block == b''):
+                    break
+                data = carry + block
+
+                # Start of each complete line of data
+                ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10)
+                starts = np.concatenate([[0], ends[:-1] + 1])
+                nlines = ends.size
+
+                line = 0
+                while (line < nlines):
+                    linestart = starts[line]
+                    header = data[linestart:ends[line]].split()
+                    if (len(header) != 3 or header[0].startswith(b'#')):
+                        line += 1
+                        continue
+                    nchunks = int(header[1])
+                    last = line + nchunks
+                    if (last >= nlines):
+                        break
+                    rows.append([int(header[0]), base + linestart,
+                                 base + starts[line+1], base + ends[last] + 1,
+                                 nchunks])
+                    line = last + 1
+
+                consumed = starts[line] if (line < nlines) else len(data)
+                if (nlines > 0):
+                    consumed = min(consumed, ends[-1] + 1)
+                else:
+                    consumed = 0
+                carry = data[consumed:]
+                base += consumed
+
+        rows = np.array(rows, dtype=np.int64).reshape([-1, self.rowitems])
+        return rows, base
+
+    def update(self):
+
+        """
+            Index records written since the last update, returns the
+            number of new records (all of them if the file has been
+            rewritten and the index rebuilt)
+        """
+
+        with self.lock:
+            rebuilt = False
+            if (not self.loaded):
+                self.load()
+                self.loaded = True
+            elif (not self.matches(self.rows, self.scanned)):
+                self.rows = np.zeros([0, self.rowitems], dtype=np.int64)
+                self.scanned = 0
+                rebuilt = True
+
+            newrows, scanned = self.scan(self.scanned)
+            self.scanned = scanned
+            if (newrows.shape[0] == 0 and not rebuilt):
+                return 0
+            self.rows = np.concatenate([self.rows, newrows])
+            self.save(newrows)
+            return newrows.shape[0]
@@ -1,7 +1,166 @@
 import numpy as np
+import threading
+import io
+import os
 
 from .rawdata import RawData
 from .pplexceptions import DataNotAvailable
+from .lammpsindex import LAMMPS_OffsetIndex
+
+class LAMMPS_ChunkFile(object):
+
+    """
+        Shared reader of a LAMMPS fix ave/chunk file
+
+        Several LAMMPS fields read different columns of the same file.
+        One reader is kept per file in each process, owning the file's
+        offset index and a single file descriptor. Records are read with
+        positional reads (os.pread), which don't move a shared file
+        position, so fields and prefetch threads can read different
+        records concurrently without locking each other out.
+
+        Obtain the reader with the class method for_file(fdir, fname),
+        which brings an existing reader up to date with the file, 
+        rebuilding its index if the file has been rewritten.
+    """
+
+    # Shared readers, one per file
+    registry = {}
+    registrylock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, fdir, fname):
+
+        if (fdir[-1] != '/'): fdir += '/'
+        key = os.path.abspath(fdir + fname)
+        with cls.registrylock:
+            try:
+                chunkfile = cls.registry[key]
+            except KeyError:
+                chunkfile = cls(fdir, fname)
+                cls.registry[key] = chunkfile
+                return chunkfile
+        chunkfile.update()
+        return chunkfile
+
+    def __init__(self, fdir, fname):
+
+        self.fname = fname
+        self.filepath = fdir + fname
+        self.fd = os.open(self.filepath, os.O_RDONLY)
+        # Descriptors of files since replaced, kept open while this
+        # reader exists as other threads may still be reading them
+        self.oldfds = []
+        # Only used where os.pread is not available
+        self.lock = threading.Lock()
+        self.offsets = LAMMPS_OffsetIndex.for_file(fdir, fname)
+        self.columns = self.get_columns()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def reopen(self):
+
+        """
+            Open the file again if it has been replaced by a new one
+            (a different inode) since it was opened
+        """
+
+        try:
+            if (os.stat(self.filepath).st_ino == os.fstat(self.fd).st_ino):
+                return
+            fd = os.open(self.filepath, os.O_RDONLY)
+        except OSError:
+            print(('Unable to open ' + self.filepath))
+            raise DataNotAvailable
+        self.oldfds.append(self.fd)
+        self.fd = fd
+
+    def update(self):
+
+        """
+            Index records written since the last update, returns the
+            number of new records (all of them if the file has been
+            rewritten)
+        """
+
+        self.reopen()
+        nnew = self.offsets.update()
+        if (nnew > 0 and len(self.offsets) == nnew):
+            self.columns = self.get_columns()
+        return nnew
+
+    def __del__(self):
+        try:
+            for fd in [self.fd] + self.oldfds:
+                os.close(fd)
+        except (OSError, AttributeError):
+            pass
+
+    def pread(self, nbytes, offset):
+
+        """
+            nbytes of the file from offset, without changing any file
+            position
+        """
+
+        if (not hasattr(os, 'pread')):
+            with self.lock:
+                os.lseek(self.fd, offset, os.SEEK_SET)
+                return os.read(self.fd, nbytes)
+
+        parts = []
+        while (nbytes > 0):
+            part = os.pread(self.fd, nbytes, offset)
+            if (part == b''):
+                break
+            parts.append(part)
+            nbytes -= len(part)
+            offset += len(part)
+        return b''.join(parts)
+
+    def get_columns(self):
+
+        """
+            Names of the columns of each chunk line, from the third
+            comment line of the file header. The header is read from
+            the start of the file, as the index is empty until the
+            first record is complete
+        """
+
+        header = b''
+        while (header.count(b'\n') < 3):
+            part = self.pread(4096, len(header))
+            if (part == b''):
+                break
+            header += part
+        lines = header.split(b'\n')
+        if (len(lines) < 4 or b"Chunk Coord1 Coord2 Coord3" not in lines[2]):
+            print("Couldn't find Chunk coordinate info in "+self.fname)
+            raise DataNotAvailable
+
+        # Ignore # character at beginning
+        return lines[2].decode("ascii").split()[1:] 
+
+    def read_record(self, rec, usecols):
+
+        """
+            Columns usecols of the chunk lines of record rec, as a 2D 
+            array [nchunks, len(usecols)]
+        """
+
+        timestep, header, start, end, nchunks = self.offsets.rows[rec]
+        block = self.pread(int(end - start), int(start))
+        try:
+            values = np.loadtxt(io.BytesIO(block), usecols=usecols, ndmin=2)
+        except ValueError:
+            values = None
+        if (values is None or values.shape[0] != nchunks):
+            print(('Unable to parse record at timestep ' + str(timestep) 
+                   + ' of ' + self.fname))
+            raise DataNotAvailable
+        return values
+
 
 class LAMMPS_RawData(RawData):
 
@@ -10,37 +169,40 @@ class LAMMPS_RawData(RawData):
         if (fdir[-1] != '/'): fdir += '/' 
         self.fdir = fdir
         self.fname = fname
-        self.fobj = open(fdir + fname, 'rb')
-        self.recoffsets = self.get_recoffsets()
-        self.maxrec = len(self.recoffsets) - 1
+        self.chunkfile = LAMMPS_ChunkFile.for_file(fdir, fname)
+        self.maxrec = len(self.chunkfile) - 1
+        if (self.maxrec < 0):
+            print(('No complete records in ' + fdir + fname))
+            raise DataNotAvailable
         self.plotfreq = self.get_plotfreq()
         self.grid = self.get_grid()
         self.nbins = [len(self.grid[i]) for i in range(len(self.grid))]
         self.readindices = self.get_readindices(readnames)
         self.nperbin = len(self.readindices) 
-    
-    def get_recoffsets(self):
-    
-        offsets = []
-        while True:
 
-            tell = self.fobj.tell()
-            line = self.fobj.readline()
+    @property
+    def recoffsets(self):
+        return self.chunkfile.offsets.rows[:,1]
 
-            if (len(line.split()) == 3):
-                offsets.append(tell) 
-
-            if (line == '' or line == b''):
-                break
-
-        return offsets
+    def refresh(self):
+        self.chunkfile.update()
+        oldmaxrec = self.maxrec
+        self.maxrec = len(self.chunkfile) - 1
+        return self.maxrec - oldmaxrec
 
     def get_plotfreq(self):
+        return int(self.chunkfile.offsets.rows[0,0])
+
+    def read_blocks(self, startrec, endrec, usecols):
 
-        self.fobj.seek(self.recoffsets[0])
-        it, ngpoints, nsamples = self.fobj.readline().split()
+        """
+            Columns usecols of the chunk lines of records startrec to 
+            endrec, each record read as one block and parsed to a 2D 
+            array [nchunks, len(usecols)]
+        """
 
-        return int(it)
+        return [self.chunkfile.read_record(rec, usecols) 
+                for rec in range(startrec, endrec+1)]
 
     def get_grid(self):
 
@@ -52,20 +214,11 @@ class LAMMPS_RawData(RawData):
             seen_add = seen.add
             return [ x for x in seq if not (x in seen or seen_add(x))]
 
-        self.fobj.seek(self.recoffsets[0])
-        it, ngpoints, nsamples = self.fobj.readline().split()
-        xlist = []
-        ylist = []
-        zlist = []
-        for point in range(int(ngpoints)):
-            lineitems = self.fobj.readline().split()
-            xlist.append(float(lineitems[1]))
-            ylist.append(float(lineitems[2]))
-            zlist.append(float(lineitems[3]))
+        coords = self.read_blocks(0, 0, usecols=(1,2,3))[0]
         
-        gridx = np.array(uniqueify(xlist))
-        gridy = np.array(uniqueify(ylist))
-        gridz = np.array(uniqueify(zlist))
+        gridx = np.array(uniqueify(coords[:,0].tolist()))
+        gridy = np.array(uniqueify(coords[:,1].tolist()))
+        gridz = np.array(uniqueify(coords[:,2].tolist()))
 
         self.domain = [gridx.max(), gridy.max(), gridz.max()]
         
@@ -73,18 +226,10 @@ class LAMMPS_RawData(RawData):
 
     def get_readindices(self, readnames):
        
-        self.fobj.seek(0)
-        self.fobj.readline()
-        self.fobj.readline()
-        line = self.fobj.readline()
-        if (b"Chunk Coord1 Coord2 Coord3" in line):
-            readindices = []
-            linesplit = line.decode("ascii").split()[1:] # Ignore # character at beginning
-            for name in readnames:
-                readindices.append(linesplit.index(name))
-        else:
-            print("Couldn't find Chunk coordinate info in "+self.fname)
-            raise DataNotAvailable
+        columns = self.chunkfile.columns
+        readindices = []
+        for name in readnames:
+            readindices.append(columns.index(name))
 
         return readindices
 
@@ -96,27 +241,17 @@ class LAMMPS_RawData(RawData):
         # Allocate enough memory in the C library to efficiently insert
         # into bindata
         recitems = np.product(self.nbins)*self.nperbin
-        bindata  = np.empty(nrecs*recitems)
+        bindata  = np.empty(nrecs*recitems, dtype=self.workdtype)
 
         if (verbose):
             print(('Reading {0:s} recs {1:5d} to {2:5d}'.format(
                   self.fname,startrec,endrec)))
 
-        cnt = 0
-        for plusrec in range(0, nrecs):
-
-            # Go to the record, read how many lines            
-            self.fobj.seek(self.recoffsets[startrec + plusrec]) 
-            recdetails = self.fobj.readline().split()
-            reclines = int(recdetails[1])
-
+        # Each record parsed as a block, keeping the columns read
+        blocks = self.read_blocks(startrec, endrec, usecols=self.readindices)
+        for plusrec, block in enumerate(blocks):
             pos = plusrec*recitems
-            # Loop over record's lines
-            for plusline in range(reclines):
-                lineitems = self.fobj.readline().split()
-                for index in self.readindices:
-                    bindata[cnt] = float(lineitems[index])
-                    cnt += 1
+            bindata[pos:pos+recitems] = np.ravel(block)
 
         bindata = np.reshape(bindata,[nrecs,
                                       self.nbins[0],
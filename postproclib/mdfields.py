@@ -1,17 +1,28 @@
 #! /usr/bin/env python
 import numpy as np
 from .field import Field
+from .kernels import ratio, square_sum, peculiar_ratio
 from .mdrawdata import MD_RawData
+from .archiverawdata import MD_ArchiveRawData, archived
 from .pplexceptions import DataMismatch, DataNotAvailable
 
 # ============================================================================
 # MDField base class
 
 class MDField(Field):
+
+    # Read records as memory mapped views, see MD_RawData.read
+    memmap = False
       
-    def __init__(self, fdir):
-        Raw = MD_RawData(fdir, self.fname, self.dtype, 
-                         self.nperbin)
+    def __init__(self, fdir, memmap=None):
+        if (memmap is not None):
+            self.memmap = memmap
+        if (archived(fdir, self.fname)):
+            Raw = MD_ArchiveRawData(fdir, self.fname, self.dtype, 
+                                    self.nperbin)
+        else:
+            Raw = MD_RawData(fdir, self.fname, self.dtype, 
+                             self.nperbin, memmap=self.memmap)
         Field.__init__(self,Raw)
         self.header = self.Raw.header
         self.cpol_bins = bool(int(self.header.cpol_bins))
@@ -405,6 +416,19 @@ class MD_complexField(MDField):
         self.axislabels = subfieldobj.axislabels
         self.labels = subfieldobj.labels
 
+    def streaming_velocity(self, mdata, startrec, endrec, **kwargs):
+
+        """
+            Velocity from the momentum field pField and mass mdata 
+            already read, or from vField when evaluated in a FieldGraph
+            where the velocity is shared with other fields
+        """
+
+        if (self.vField.graph is not None):
+            return self.vField.read(startrec, endrec, **kwargs)
+        pdata = self.pField.read(startrec, endrec, **kwargs)
+        return ratio(pdata, mdata)
+
 
 class MD_vField(MD_complexField):
 
@@ -435,23 +459,20 @@ class MD_vField(MD_complexField):
         pdata = self.pField.read(startrec, endrec, **kwargs)
 
         # Divide and patch any NaNs
-        vdata = np.divide(pdata, mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(pdata, mdata)
 
         return vdata 
 
-    def averaged_data(self,startrec,endrec,avgaxes=(),**kwargs):
+    def averaged_data(self,startrec,endrec,avgaxes=(),chunksize=None,**kwargs):
         
-        mdata = self.mField.read(startrec, endrec, **kwargs)
-        pdata = self.pField.read(startrec, endrec, **kwargs)
-
-        if (avgaxes != ()):
-            mdata = np.sum(mdata, axis=avgaxes) 
-            pdata = np.sum(pdata, axis=avgaxes) 
+        # Sum over axes, reading chunksize records at a time
+        mdata, count = self.mField.summed_data(startrec, endrec, avgaxes, 
+                                               chunksize, **kwargs)
+        pdata, count = self.pField.summed_data(startrec, endrec, avgaxes, 
+                                               chunksize, **kwargs)
 
         # Divide and patch any NaNs
-        vdata = np.divide(pdata,mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(pdata, mdata)
 
         return vdata
 
@@ -470,23 +491,19 @@ class MD_Centre_of_Mass_Field(MD_complexField):
         comdata = self.comField.read(startrec,endrec,**kwargs)
 
         # Divide and patch any NaNs
-        vdata = np.divide(comdata,mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(comdata, mdata)
 
         return vdata 
 
-    def averaged_data(self,startrec,endrec,avgaxes=(),**kwargs):
+    def averaged_data(self,startrec,endrec,avgaxes=(),chunksize=None,**kwargs):
         
-        mdata = self.mField.read(startrec,endrec,**kwargs)
-        comdata = self.comField.read(startrec,endrec,**kwargs)
-
-        if (avgaxes != ()):
-            mdata = np.sum(mdata,axis=avgaxes) 
-            comdata = np.sum(comdata,axis=avgaxes) 
+        mdata, count = self.mField.summed_data(startrec, endrec, avgaxes, 
+                                               chunksize, **kwargs)
+        comdata, count = self.comField.summed_data(startrec, endrec, avgaxes, 
+                                                   chunksize, **kwargs)
 
         # Divide and patch any NaNs
-        vdata = np.divide(comdata,mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(comdata, mdata)
 
         return vdata
 
@@ -518,26 +535,27 @@ class MD_rhouuField(MD_complexField):
 
         return rhouudata
 
-    def averaged_data(self, startrec, endrec, avgaxes=(), **kwargs):
+    def averaged_data(self, startrec, endrec, avgaxes=(), chunksize=None, 
+                      **kwargs):
         
-        vdata = self.vField.read(startrec, endrec, **kwargs)
-        momdata = self.momField.read(startrec, endrec, **kwargs)
+        def readfn(srec, erec):
+            return [self.vField.read(srec, erec, **kwargs),
+                    self.momField.read(srec, erec, **kwargs)]
 
-        if (avgaxes != ()):
-            #Get shape after axes have been removed
-            indx = [x for x in [0, 1, 2, 3] if x not in avgaxes]
-            vvshapelist = list(vdata.shape)
-            newshape = tuple([vvshapelist[i] for i in indx]+[self.nperbin])
+        #Calculate mean over average axes
+        (vdata, momdata), count = self.streamed_sums(readfn, startrec, endrec, 
+                                                     avgaxes, chunksize)
+        vdata = vdata/float(count)
+        momdata = momdata/float(count)
 
-            #Remove axes from einsum expression
-            ltrs = ["a", "b", "c", "d"]
-            einsumstr = 'abcdj,abcdk->abcdjk'
-            for a in avgaxes:
-                einsumstr = einsumstr.replace(ltrs[a],"")
+        #Get shape after axes have been removed
+        newshape = tuple(list(vdata.shape[:-1])+[self.nperbin])
 
-            #Calculate sum over average axes
-            vdata = np.mean(vdata, axis=avgaxes) 
-            momdata = np.mean(momdata, axis=avgaxes)
+        #Remove axes from einsum expression
+        ltrs = ["a", "b", "c", "d"]
+        einsumstr = 'abcdj,abcdk->abcdjk'
+        for a in avgaxes:
+            einsumstr = einsumstr.replace(ltrs[a],"")
 
         # Find outer product of v*v and reshape to 1x9 rather than 3x3
         rhouudata = np.einsum(einsumstr, momdata, vdata)
@@ -569,6 +587,13 @@ class MD_pVAField(MD_complexField):
         self.inherit_parameters(self.PField)
         self.peculiar = peculiar
 
+        # Streaming momentum flux removed from kinetic pressure
+        if (self.fname=='pVA_k' or self.fname=='pVA_ck'):
+            try:
+                self.rhouuField = MD_rhouuField(self.fdir)
+            except DataNotAvailable:
+                self.rhouuField = None
+
     def read(self, startrec, endrec, peculiar=None, 
              verbose=False,**kwargs):
 
@@ -589,8 +614,9 @@ class MD_pVAField(MD_complexField):
 
                 #Not sure if this is a good idea, might hide errors
                 try:
-                    rhouuField = MD_rhouuField(self.fdir)
-                    rhouudata =  rhouuField.read(startrec,endrec,**kwargs)
+                    if (self.rhouuField is None):
+                        raise DataNotAvailable
+                    rhouudata =  self.rhouuField.read(startrec,endrec,**kwargs)
 
                     # Remove square of streaming velocity
                     Pdata = Pdata - rhouudata
@@ -622,9 +648,9 @@ class MD_pVAField(MD_complexField):
 
                 #Not sure if this is a good idea, might hide errors
                 try:
-
-                    rhouuField = MD_rhouuField(self.fdir)
-                    rhouudata =  rhouuField.averaged_data(startrec, endrec, 
+                    if (self.rhouuField is None):
+                        raise DataNotAvailable
+                    rhouudata =  self.rhouuField.averaged_data(startrec, endrec, 
                                                         avgaxes=avgaxes, **kwargs)
 
                     # Remove square of streaming velocity
@@ -640,6 +666,7 @@ class MD_TField(MD_complexField):
     def __init__(self, fdir, peculiar=True):
         self.mField = MD_mField(fdir)
         self.pField = MD_pField(fdir)
+        self.vField = MD_vField(fdir)
         self.KEField = MD_EField(fdir,fname='Tbins')
         Field.__init__(self,self.KEField.Raw)
         self.inherit_parameters(self.KEField)
@@ -665,53 +692,54 @@ class MD_TField(MD_complexField):
         mdata = self.mField.read(startrec, endrec, **kwargs)
         KEdata = self.KEField.read(startrec, endrec, **kwargs)
 
-        # Temperature (no streaming consideration)
-        Tdata = np.divide(KEdata,(3.0*mdata))
-        Tdata[np.isnan(Tdata)] = 0.0
-
         # Remove average of streaming component
         if peculiar==None:
             peculiar = self.peculiar
 
         if (peculiar==True):
-            pdata = self.pField.read(startrec, endrec, **kwargs)
-            vdata = np.divide(pdata, mdata)
-            vdata[np.isnan(vdata)] = 0.0
-            v2data = np.sum((vdata**2.0),axis=4,keepdims=True)
-            Tdata = Tdata - (1./3.)*v2data
+            vdata = self.streaming_velocity(mdata, startrec, endrec, **kwargs)
+        else:
+            vdata = None
+
+        # Temperature, less streaming part if peculiar
+        Tdata = peculiar_ratio(KEdata, mdata, vdata, 
+                               denscale=3.0, vscale=1./3.)
 
         return Tdata 
 
     def averaged_data(self, startrec, endrec, 
-                      avgaxes=(), peculiar=None, **kwargs):
+                      avgaxes=(), peculiar=None, chunksize=None, **kwargs):
         
-        # Read 4D time series from startrec to endrec
-        mdata = self.mField.read(startrec, endrec, **kwargs)
-        KEdata = self.KEField.read(startrec, endrec, **kwargs)
-
         # Consider streaming velocity
         if peculiar == None:
             peculiar = self.peculiar
 
-        if (peculiar):
-            pdata = self.pField.read(startrec, endrec, **kwargs)
-            vdata = np.divide(pdata, mdata)
-            vdata[np.isnan(vdata)] = 0.0
-            v2data = np.sum((vdata**2.0),axis=4,keepdims=True)
+        # Without streaming velocity only sums of mass and kinetic 
+        # energy are needed, which may come from an index
+        if (not peculiar):
+            mdata, count = self.mField.summed_data(startrec, endrec, avgaxes,
+                                                   chunksize, **kwargs)
+            KEdata, count = self.KEField.summed_data(startrec, endrec, avgaxes,
+                                                     chunksize, **kwargs)
+            Tdata = ratio(KEdata, mdata, denscale=3.0)
+            return Tdata
 
-        if (avgaxes != ()):
-            mdata = np.sum(mdata, axis=avgaxes) 
-            KEdata = np.sum(KEdata, axis=avgaxes) 
-
-        # Temperature (no streaming consideration)
-        Tdata = np.divide(KEdata,(3.0*mdata))
-        Tdata[np.isnan(Tdata)] = 0.0
-
-        # Remove streaming velocity
-        if (peculiar):
-            if (avgaxes != ()):
-                v2data = np.mean(v2data,axis=avgaxes) 
-            Tdata = Tdata - (1./3.)*v2data
+        # Read 4D time series from startrec to endrec
+        def readfn(srec, erec):
+            mdata = self.mField.read(srec, erec, **kwargs)
+            KEdata = self.KEField.read(srec, erec, **kwargs)
+            vdata = self.streaming_velocity(mdata, srec, erec, **kwargs)
+            v2data = square_sum(vdata)
+            return [mdata, KEdata, v2data]
+
+        # Sum over axes, reading chunksize records at a time
+        sums, count = self.streamed_sums(readfn, startrec, endrec, 
+                                         avgaxes, chunksize)
+        mdata, KEdata, v2data = sums
+
+        # Temperature with streaming velocity removed
+        Tdata = ratio(KEdata, mdata, denscale=3.0)
+        Tdata -= (1./3.)*v2data/float(count)
 
         return Tdata
 
@@ -758,6 +786,7 @@ class MD_EnergyField(MD_complexField):
     def __init__(self, fdir, peculiar=False):
         self.mField = MD_mField(fdir)
         self.pField = MD_pField(fdir)
+        self.vField = MD_vField(fdir)
         self.EField = MD_EField(fdir,fname='ebins')
         Field.__init__(self,self.EField.Raw)
         self.inherit_parameters(self.EField)
@@ -782,54 +811,50 @@ class MD_EnergyField(MD_complexField):
         mdata = self.mField.read(startrec, endrec, **kwargs)
         Edata = self.EField.read(startrec, endrec, **kwargs)
 
-        # Energy (no streaming consideration)
-        Eout = np.divide(Edata,mdata)
-        Eout[np.isnan(Eout)] = 0.0
-
         # Remove average of streaming component
         if peculiar == None:
             peculiar = self.peculiar
 
         if (peculiar):
+            vdata = self.streaming_velocity(mdata, startrec, endrec, **kwargs)
+        else:
+            vdata = None
 
-            pdata = self.pField.read(startrec, endrec, **kwargs)
-            vdata = np.divide(pdata, mdata)
-            vdata[np.isnan(vdata)] = 0.0
-            v2data = np.sum((vdata**2.0), axis=4, keepdims=True)
-            Eout = Eout - v2data/2.
+        # Energy, less streaming part if peculiar
+        Eout = peculiar_ratio(Edata, mdata, vdata, vscale=0.5)
 
         return Eout 
 
     def averaged_data(self, startrec, endrec, 
-                      avgaxes=(), peculiar=None, **kwargs):
+                      avgaxes=(), peculiar=None, chunksize=None, **kwargs):
         
-        # Read 4D time series from startrec to endrec
-        mdata = self.mField.read(startrec, endrec, **kwargs)
-        Edata = self.EField.read(startrec, endrec, **kwargs)
-
         # Consider streaming velocity
         if peculiar == None:
             peculiar = self.peculiar
 
-        if (peculiar):
-            pdata = self.pField.read(startrec, endrec, **kwargs)
-            vdata = np.divide(pdata,mdata)
-            vdata[np.isnan(vdata)] = 0.0
-            v2data = np.sum((vdata**2.0), axis=4, keepdims=True)
+        # Read 4D time series from startrec to endrec
+        def readfn(srec, erec):
+            mdata = self.mField.read(srec, erec, **kwargs)
+            Edata = self.EField.read(srec, erec, **kwargs)
+            if (not peculiar):
+                return [mdata, Edata]
 
-        if (avgaxes != ()):
-            mdata = np.sum(mdata, axis=avgaxes) 
-            Edata = np.sum(Edata, axis=avgaxes) 
+            vdata = self.streaming_velocity(mdata, srec, erec, **kwargs)
+            v2data = square_sum(vdata)
+            return [mdata, Edata, v2data]
+
+        # Sum over axes, reading chunksize records at a time
+        sums, count = self.streamed_sums(readfn, startrec, endrec, 
+                                         avgaxes, chunksize)
+        mdata, Edata = sums[0:2]
 
         # Energy (no streaming consideration)
-        Edata = np.divide(Edata, mdata)
-        Edata[np.isnan(Edata)] = 0.0
+        Edata = ratio(Edata, mdata)
 
         # Remove streaming velocity
         if (peculiar):
-            if (avgaxes != ()):
-                v2data = np.mean(v2data, axis=avgaxes) 
-            Edata = Edata - v2data/2.
+            v2data = sums[2]/float(count)
+            Edata -= v2data/2.
 
         return Edata
 
@@ -872,28 +897,27 @@ class MD_potEnergyField(MD_complexField):
         potdata = Edata - Tdata/2.
 
         # Energy (no streaming consideration)
-        potout = np.divide(potdata,mdata)
-        potout[np.isnan(potout)] = 0.0
+        potout = ratio(potdata, mdata)
 
         return potout
 
     def averaged_data(self, startrec, endrec, 
-                      avgaxes=(), **kwargs):
+                      avgaxes=(), chunksize=None, **kwargs):
         
         # Read 4D time series from startrec to endrec
-        mdata = self.mField.read(startrec, endrec, **kwargs)
-        Tdata = self.TField.read(startrec, endrec, **kwargs)
-        Edata = self.EField.read(startrec, endrec, **kwargs)
-        potdata = Edata - Tdata/2.
+        def readfn(srec, erec):
+            mdata = self.mField.read(srec, erec, **kwargs)
+            Tdata = self.TField.read(srec, erec, **kwargs)
+            Edata = self.EField.read(srec, erec, **kwargs)
+            potdata = Edata - Tdata/2.
+            return [mdata, potdata]
 
-        # Average
-        if (avgaxes != ()):
-            mdata = np.sum(mdata, axis=avgaxes) 
-            potdata = np.sum(potdata, axis=avgaxes) 
+        # Average, reading chunksize records at a time
+        (mdata, potdata), count = self.streamed_sums(readfn, startrec, endrec, 
+                                                     avgaxes, chunksize)
 
         # Energy (no streaming consideration)
-        potdata = np.divide(potdata, mdata)
-        potdata[np.isnan(potdata)] = 0.0
+        potdata = ratio(potdata, mdata)
 
         return potdata
 
@@ -932,14 +956,11 @@ class MD_rhoEnergyField(MD_complexField):
         return Edata 
 
     def averaged_data(self, startrec, endrec, avgaxes=(),
-                      binlimits=None, peculiar=None, **kwargs):
+                      binlimits=None, peculiar=None, chunksize=None, **kwargs):
         
         gridvolumes = self.EField.Raw.get_gridvolumes(binlimits=binlimits)
         gridvolumes = np.expand_dims(gridvolumes,axis=-1)
 
-        Edata = self.EField.read(startrec, endrec, **kwargs)
-        Edata = np.divide(Edata, float(self.plotfreq))
-
         # Consider streaming velocity
         if peculiar == None:
             peculiar = self.peculiar
@@ -947,8 +968,14 @@ class MD_rhoEnergyField(MD_complexField):
         if (peculiar):
             quit('Peculiar not developed for MD_rhoEnergyField')
 
+        def readfn(srec, erec):
+            Edata = self.EField.read(srec, erec, **kwargs)
+            return [np.divide(Edata, float(self.plotfreq))]
+
+        # Sum over axes, reading chunksize records at a time
+        (Edata,), count = self.streamed_sums(readfn, startrec, endrec, 
+                                             avgaxes, chunksize)
         if (avgaxes != ()):
-            Edata = np.sum(Edata, axis=avgaxes) 
             gridvolumes = np.sum(gridvolumes, axis=avgaxes) 
 
         # Energy (no streaming consideration)
@@ -1193,6 +1220,7 @@ class MD_dField(MD_complexField):
 
         gridvolumes = self.mField.Raw.get_gridvolumes(binlimits=binlimits)
         gridvolumes = np.expand_dims(gridvolumes,axis=-1)
+        gridvolumes = self.mField.Raw.to_workdtype(gridvolumes)
 
         # Read 4D time series from startrec to endrec
         mdata = self.mField.read(startrec, endrec, binlimits=binlimits, **kwargs)
@@ -1202,23 +1230,29 @@ class MD_dField(MD_complexField):
         
         return density
 
-    def averaged_data(self,startrec,endrec,avgaxes=(),binlimits=None, **kwargs):
+    def averaged_data(self,startrec,endrec,avgaxes=(),binlimits=None, 
+                      chunksize=None, **kwargs):
 
-        nrecs = endrec - startrec + 1
         gridvolumes = self.mField.Raw.get_gridvolumes(binlimits=binlimits)
         gridvolumes = np.expand_dims(gridvolumes,axis=-1)
 
-        # Read 4D time series from startrec to endrec
-        mdata = self.mField.read(startrec, endrec, binlimits=binlimits, **kwargs)
-        mdata = np.divide(mdata,float(self.plotfreq))
+        # Read 4D time series from startrec to endrec, counting 
+        # records actually returned
+        nrecs = 0
+        def readfn(srec, erec):
+            nonlocal nrecs
+            mdata = self.mField.read(srec, erec, binlimits=binlimits, **kwargs)
+            nrecs += mdata.shape[3]
+            return [np.divide(mdata,float(self.plotfreq))]
+
+        (mdata,), count = self.streamed_sums(readfn, startrec, endrec, 
+                                             avgaxes, chunksize)
 
         #Check for missing or skipped records here
-        if (mdata.shape[3] != nrecs):
+        if (nrecs != endrec - startrec + 1):
             print("Missing record detected so normalising by number of records")
-            nrecs = mdata.shape[3]
 
         if (avgaxes != ()):
-            mdata = np.sum(mdata, axis=avgaxes) 
             # gridvolumes should only be length=1 in time & component axis
             gridvolumes = np.sum(gridvolumes, axis=avgaxes) 
 
@@ -1247,18 +1281,22 @@ class MD_momField(MD_complexField):
         
         return momdensity
 
-    def averaged_data(self, startrec, endrec, binlimits=None, avgaxes=(), **kwargs):
+    def averaged_data(self, startrec, endrec, binlimits=None, avgaxes=(), 
+                      chunksize=None, **kwargs):
 
         nrecs = endrec - startrec + 1
         gridvolumes = self.pField.Raw.get_gridvolumes(binlimits=binlimits)
         gridvolumes = np.expand_dims(gridvolumes, axis=-1)
 
         # Read 4D time series from startrec to endrec
-        pdata = self.pField.read(startrec, endrec, binlimits=binlimits, **kwargs)
-        pdata = np.divide(pdata,float(self.plotfreq))
+        def readfn(srec, erec):
+            pdata = self.pField.read(srec, erec, binlimits=binlimits, **kwargs)
+            return [np.divide(pdata,float(self.plotfreq))]
+
+        (pdata,), count = self.streamed_sums(readfn, startrec, endrec, 
+                                             avgaxes, chunksize)
 
         if (avgaxes != ()):
-            pdata = np.sum(pdata, axis=avgaxes) 
             # gridvolumes should only be length=1 in time & component axis 
             gridvolumes = np.sum(gridvolumes, axis=avgaxes) 
         
@@ -1279,21 +1317,12 @@ class MD_eFieldatsurface(MD_complexField):
                         "xtop","ytop","ztop"]
         self.nperbin = 6
 
-    def read(self, startrec, endrec, **kwargs):
-
-        edata   = self.EField.read(startrec, endrec, **kwargs)
-        #Get v on surface
-        esurface = np.zeros([edata.shape[0],
-                             edata.shape[1],
-                             edata.shape[2],
-                             edata.shape[3], 6],order='F')
-
-        for rec in range(endrec-startrec+1):
-            esurface[:,:,:,rec,:] = self.cellcentre2surface(edata[:,:,:,rec])
+    def read(self, startrec, endrec, binlimits=None, **kwargs):
 
-        eeshapelist = list(edata.shape)
-        newshape = tuple(eeshapelist[0:4]+[self.nperbin])
-        esurface = np.reshape(esurface, newshape)
+        #Read the whole domain, interpolate and then trim
+        edata   = self.EField.read(startrec, endrec, binlimits=None, **kwargs)
+        #Get e on surface, all records at once
+        esurface = self.cellcentre2surface(edata)
 
         if (binlimits):
             esurface = self.trim_binlimits(binlimits, esurface)
@@ -1399,18 +1428,8 @@ class MD_mFieldatsurface(MD_complexField):
 
         #Read the whole domain, interpolate and then trim
         mdata   = self.mField.read(startrec, endrec, binlimits=None, **kwargs)
-        #Get v on surface
-        msurface = np.zeros([mdata.shape[0],
-                             mdata.shape[1],
-                             mdata.shape[2],
-                             mdata.shape[3], 6],order='F')
-
-        for rec in range(endrec-startrec+1):
-            msurface[:,:,:,rec,:] = self.cellcentre2surface(mdata[:,:,:,rec])
-
-        mmshapelist = list(mdata.shape)
-        newshape = tuple(mmshapelist[0:4]+[self.nperbin])
-        msurface = np.reshape(msurface, newshape)
+        #Get m on surface, all records at once
+        msurface = self.cellcentre2surface(mdata)
 
         if (binlimits):
             msurface = self.trim_binlimits(binlimits, msurface)
@@ -1467,24 +1486,21 @@ class MD_CVvField(MD_complexField):
         momdata = self.momField.read(startrec, endrec, **kwargs)  
 
         # Divide and patch any NaNs
-        vdata = np.divide(momdata, mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(momdata, mdata)
 
         return vdata 
 
 
-    def averaged_data(self, startrec, endrec, avgaxes=(), **kwargs):
+    def averaged_data(self, startrec, endrec, avgaxes=(), chunksize=None, 
+                      **kwargs):
         
-        mdata   = self.mField.read(startrec, endrec, **kwargs)  
-        momdata = self.momField.read(startrec, endrec, **kwargs)  
-
-        if (avgaxes != ()):
-            mdata = np.sum(mdata, axis=avgaxes) 
-            momdata = np.sum(momdata, axis=avgaxes) 
+        mdata, count = self.mField.summed_data(startrec, endrec, avgaxes, 
+                                               chunksize, **kwargs)
+        momdata, count = self.momField.summed_data(startrec, endrec, avgaxes, 
+                                                   chunksize, **kwargs)
 
         # Divide and patch any NaNs
-        vdata = np.divide(momdata, mdata) 
-        vdata[np.isnan(vdata)] = 0.0
+        vdata = ratio(momdata, mdata)
 
         return vdata
 
@@ -1507,19 +1523,8 @@ class MD_vFieldatsurface(MD_complexField):
     def read(self, startrec, endrec, binlimits=None, **kwargs):
 
         vdata   = self.vField.read(startrec, endrec, binlimits=None, **kwargs)
-        #Get v on surface
-        vsurface = np.zeros([vdata.shape[0],
-                             vdata.shape[1],
-                             vdata.shape[2],
-                             vdata.shape[3], 6, 3],order='F')
-
-        for dim in range(3):
-            for rec in range(endrec-startrec+1):
-                vsurface[:,:,:,rec,:,dim] = self.cellcentre2surface(vdata[:,:,:,rec,dim])
-
-        vvshapelist = list(vdata.shape)
-        newshape = tuple(vvshapelist[0:4]+[self.nperbin])
-        vsurface = np.reshape(vsurface, newshape)
+        #Get v on surface, all records and components at once
+        vsurface = self.cellcentre2surface(vdata)
 
         if (binlimits):
             vsurface = self.trim_binlimits(binlimits, vsurface)
@@ -1583,20 +1588,22 @@ class MD_rhouuCVField(MD_complexField):
 
         return rhouudata
 
-    def averaged_data(self, startrec, endrec, avgaxes=(), **kwargs):
+    def averaged_data(self, startrec, endrec, avgaxes=(), chunksize=None, 
+                      **kwargs):
         
-        momdata = self.momField.read(startrec, endrec, **kwargs)
-        vdata = self.vField.read(startrec, endrec, **kwargs)
+        def readfn(srec, erec):
+            return [self.momField.read(srec, erec, **kwargs),
+                    self.vField.read(srec, erec, **kwargs)]
+
+        #Calculate mean over average axes
+        (momdata, vdata), count = self.streamed_sums(readfn, startrec, endrec, 
+                                                     avgaxes, chunksize)
+        momdata = momdata/float(count)
+        vdata = vdata/float(count)
 
         if (avgaxes != ()):
             #Get shape after axes have been removed
-            indx = [x for x in [0, 1, 2, 3] if x not in avgaxes]
-            vvshapelist = list(vdata.shape)
-            newshape = tuple([vvshapelist[i] for i in indx]+[self.nperbin])
-
-            #Calculate sum over average axes
-            vdata = np.mean(vdata, axis=avgaxes) 
-            momdata = np.mean(momdata, axis=avgaxes)
+            newshape = tuple(list(vdata.shape[:-1])+[self.nperbin])
 
             #Setup einsum and arrays
             if self.velocity_loc is "centre":
@@ -1646,6 +1653,13 @@ class MD_pCVField(MD_complexField):
         self.peculiar = peculiar
         self.moving_ref = moving_ref
 
+        # Streaming momentum flux removed from kinetic pressure
+        if self.fname in ['total', 'vflux']:
+            try:
+                self.rhouuField = MD_rhouuCVField(self.fdir)
+            except DataNotAvailable:
+                self.rhouuField = None
+
     def read(self, startrec, endrec, peculiar=None,
              verbose=False, moving_ref=None, **kwargs):
 
@@ -1662,8 +1676,9 @@ class MD_pCVField(MD_complexField):
 
             # Take off peculiar momenta if specified
             if peculiar:
-                rhouuField = MD_rhouuCVField(self.fdir)
-                rhouudata = rhouuField.read(startrec, endrec, **kwargs)
+                if (self.rhouuField is None):
+                    raise DataNotAvailable
+                rhouudata = self.rhouuField.read(startrec, endrec, **kwargs)
                 pflux = pflux - rhouudata
 
             #Add psurface if required
@@ -1698,8 +1713,9 @@ class MD_pCVField(MD_complexField):
 
                 # Take off peculiar momenta if specified
                 if peculiar:
-                    rhouuField = MD_rhouuCVField(self.fdir)
-                    rhouudata = rhouuField.averaged_data(startrec, endrec, 
+                    if (self.rhouuField is None):
+                        raise DataNotAvailable
+                    rhouudata = self.rhouuField.averaged_data(startrec, endrec, 
                                                   avgaxes=avgaxes, **kwargs)
                     pflux = pflux - rhouudata
 
@@ -1761,18 +1777,8 @@ class MD_eFieldatsurface(MD_complexField):
     def read(self, startrec, endrec, binlimits=None, **kwargs):
 
         edata   = self.EField.read(startrec, endrec, binlimits=None, **kwargs)
-        #Get v on surface
-        esurface = np.zeros([edata.shape[0],
-                             edata.shape[1],
-                             edata.shape[2],
-                             edata.shape[3], 6],order='F')
-
-        for rec in range(endrec-startrec+1):
-            esurface[:,:,:,rec,:] = self.cellcentre2surface(edata[:,:,:,rec])
-
-        eeshapelist = list(edata.shape)
-        newshape = tuple(eeshapelist[0:4]+[self.nperbin])
-        esurface = np.reshape(esurface, newshape)
+        #Get e on surface, all records at once
+        esurface = self.cellcentre2surface(edata)
 
 
         return esurface
@@ -2053,6 +2059,8 @@ class MD_heatfluxapprox(MD_complexField):
 
 class MD_strainField(MD_complexField):
 
+    streamable = False
+
     def __init__(self,fdir,rectype='bins'):
         self.vField = MD_vField(fdir)
 
@@ -2086,6 +2094,8 @@ class MD_strainField(MD_complexField):
 
 class MD_vortField(MD_complexField):
 
+    streamable = False
+
     def __init__(self,fdir,rectype='bins'):
         self.vField = MD_vField(fdir)
         self.strainField = MD_strainField(fdir)
@@ -2116,6 +2126,8 @@ class MD_vortField(MD_complexField):
 
 class MD_dissipField(MD_complexField):
 
+    streamable = False
+
     def __init__(self,fdir,rectype='bins'):
         self.vField = MD_vField(fdir)
         self.strainField = MD_strainField(fdir)
@@ -2155,6 +2167,8 @@ class MD_dissipField(MD_complexField):
 
 class MD_dTdrField(MD_complexField):
 
+    streamable = False
+
     def __init__(self,fdir,rectype='bins', peculiar=True):
         self.TField = MD_TField(fdir, peculiar=peculiar)
 
@@ -3,12 +3,13 @@ import os
 import numpy as np
 import sys
 import math as maths
-import glob
 #import collections
 
 from .mdfields import *
 from .headerdata import *
 from .postproc import PostProc
+from .archiverawdata import archived_fnames
+from .dirindex import DirectoryIndex
 from .pplexceptions import NoResultsInDir, DataMismatch
 
     
@@ -18,7 +19,13 @@ class MD_PostProc(PostProc):
         Post processing class for MD runs
     """
 
-    def __init__(self,resultsdir,**kwargs):
+    def __init__(self,resultsdir,memmap=False,**kwargs):
+
+        """
+            memmap - read records as memory mapped views rather than
+                     copies, see MD_RawData.read
+        """
+
         self.resultsdir = resultsdir
         self.plotlist = {} #collections.OrderedDict
         self.error = {}
@@ -40,12 +47,16 @@ class MD_PostProc(PostProc):
             print(("Directory " +  self.resultsdir + " not found"))
             raise IOError
             
+        # Directory listed once, see DirectoryIndex
+        index = DirectoryIndex.for_dir(self.resultsdir)
         self.fields_present = []
         for fname in self.potentialfiles:
-            if (glob.glob(self.resultsdir+fname)):
+            if (index.has_file(fname)):
                 self.fields_present.append(fname)
-            if (glob.glob(self.resultsdir+fname+'.*')):
+            if (index.has_records(fname)):
                 self.fields_present.append(fname.strip().split('.')[0])
+        # Outputs converted to an archive, see archive_results
+        self.fields_present += archived_fnames(self.resultsdir)
 
         self.fieldfiles1 = list(set(self.fields_present) & set(self.potentialfiles))
 
@@ -447,6 +458,9 @@ class MD_PostProc(PostProc):
         if (len(self.plotlist) == 0):
             raise NoResultsInDir
 
+        if (memmap):
+            self.set_memmap(memmap)
+
         #Encode latex names
 #        for key in self.plotlist.keys():
 #            print(key,latex_encode(key))
@@ -1,12 +1,16 @@
 #! /usr/bin/env python
 import numpy as np 
-import glob
 import os
 import sys
+import zlib
+import threading
 
 from .rawdata import RawData
 from .headerdata import MDHeaderData
 from .pplexceptions import DataNotAvailable
+from .recordstack import MD_RecordStack
+from .recordcache import record_cache
+from .dirindex import DirectoryIndex
 
 """
 
@@ -45,27 +49,36 @@ from .pplexceptions import DataNotAvailable
 """
 
 class MD_RawData(RawData):
+
+    # Decoded records shared between all MD readers in this process
+    record_cache = record_cache
+    # Runs of a binlimits box shorter than this are copied from a memory
+    # map rather than read one by one, see read_hyperslab
+    minrunbytes = 4096
+    # Samples of a single file checked when it has grown, and bytes
+    # per sample, see file_version
+    nsamples = 8
+    samplebytes = 512
+    # Versions of single files seen in this process, one per file
+    versions = {}
+    versionlock = threading.Lock()
     
-    def __init__(self, fdir, fname, dtype, nperbin):
+    def __init__(self, fdir, fname, dtype, nperbin, memmap=False):
 
         """
             fdir       -  file directory containing results, string
             fname      -  file path from which to read raw data, string
             dtype      -  datatype string, 'i' for integer, 'd' for float
             nperbin    -  number of items to read per bin, integer
+            memmap     -  default for read, return a memory mapped view
+                          instead of copying records into memory, bool
         """
 
         if (fdir[-1] != '/'): fdir += '/' 
         self.fdir = fdir
         self.fname = fname
-
-        if (glob.glob(fdir+fname)):
-            self.separate_outfiles = False
-        elif (glob.glob(fdir+fname+'.*')):
-            self.separate_outfiles = True 
-        else:
-            print(('Neither ' + fname + ' nor ' + fname + '.* exist.'))
-            raise DataNotAvailable
+        self.memmap = memmap
+        self.find_outfiles(fdir, fname)
 
         self.header = self.read_header(fdir)
         try:
@@ -79,6 +92,22 @@ class MD_RawData(RawData):
         self.dx = dxyz[0]; self.dy = dxyz[1]; self.dz = dxyz[2]
         self.maxrec = self.get_maxrec()
 
+    def find_outfiles(self, fdir, fname):
+
+        """
+            Check whether records are in a single file or written 
+            separately as fname.%07d
+        """
+
+        index = DirectoryIndex.for_dir(fdir)
+        if (index.has_file(fname)):
+            self.separate_outfiles = False
+        elif (index.has_records(fname)):
+            self.separate_outfiles = True 
+        else:
+            print(('Neither ' + fname + ' nor ' + fname + '.* exist.'))
+            raise DataNotAvailable
+
     def read_header(self,fdir):
         return MDHeaderData(fdir)
 
@@ -194,7 +223,8 @@ class MD_RawData(RawData):
 
     def get_maxrec(self):
 
-        if (glob.glob(self.fdir+self.fname)):
+        index = DirectoryIndex.for_dir(self.fdir)
+        if (index.has_file(self.fname)):
 
             filesize = os.path.getsize(self.fdir+self.fname)
             if (self.dtype == 'i'):
@@ -204,15 +234,9 @@ class MD_RawData(RawData):
             else:
                 sys.exit('Unrecognised dtype in MD_RawData.get_maxrec')
 
-        elif (glob.glob(self.fdir+self.fname+'.*')):
+        elif (index.has_records(self.fname)):
 
-            filelist = glob.glob(self.fdir+self.fname+'.*')
-            sortedlist = sorted(filelist)
-            try:
-                maxrec = int(sortedlist[-1].split('.')[-1])
-            except ValueError:
-                print(("Error in last record, maybe '*', in filename? = ", sortedlist[-1]))
-                maxrec = 0
+            maxrec = index.maxrec(self.fname)
             
         else:
             print(('Neither ' + self.fname + ' nor ' + self.fname + '.* exist.'))
@@ -221,9 +245,183 @@ class MD_RawData(RawData):
 
         return maxrec
 
+    def recordbytes(self):
+        itemsize = 4 if (self.dtype == 'i') else 8
+        return itemsize*self.nperbin*int(np.prod(self.nbins))
+
+    def refresh(self):
+
+        """
+            Extend maxrec to records written since it was last found
+            and return the number of new records. A single file is 
+            checked by its size and separate files by probing for the
+            next names in sequence, so only records which are fully 
+            written are counted and no directory listing is needed.
+        """
+
+        oldmaxrec = self.maxrec
+        recbytes = self.recordbytes()
+        if (self.separate_outfiles):
+            maxrec = int(self.maxrec)
+            while True:
+                try:
+                    size = os.path.getsize(self.fdir + self.fname 
+                                           + '.' + "%07d"%(maxrec+1))
+                except OSError:
+                    break
+                if (size < recbytes):
+                    break
+                maxrec += 1
+        else:
+            try:
+                maxrec = os.path.getsize(self.fdir+self.fname)//recbytes - 1
+            except OSError:
+                return 0
+
+        if (maxrec <= oldmaxrec):
+            return 0
+        self.maxrec = maxrec
+        return int(maxrec - oldmaxrec)
+
+    def prefix_crc(self, fd, size):
+
+        """
+            Checksum of samples spread over the first size bytes of the
+            file open as fd, ending with the bytes just before size
+        """
+
+        step = max(self.samplebytes, size//self.nsamples)
+        offsets = list(range(0, size, step)) + [max(0, size-self.samplebytes)]
+        crc = 0
+        for offset in offsets:
+            os.lseek(fd, offset, os.SEEK_SET)
+            crc = zlib.crc32(os.read(fd, min(self.samplebytes, size - offset)), 
+                             crc)
+        return crc
+
+    def file_version(self, filepath, fd, st):
+
+        """
+            Version of a single file, as 'size:mtime:checksum' of the 
+            file when first seen in its present form. The size and 
+            modification time are checked on every call, and any change
+            starts a new version unless the file has grown past its 
+            previous size, with the same inode and samples of the bytes
+            it held unchanged (see prefix_crc), i.e. records have only
+            been appended.
+        """
+
+        with self.versionlock:
+            version = self.versions.get(filepath)
+            if (version is not None and version['ino'] == st.st_ino
+                and version['size'] == st.st_size
+                and version['mtime'] == st.st_mtime_ns):
+                return version['base']
+
+            crc = self.prefix_crc(fd, st.st_size)
+            if (version is not None and version['ino'] == st.st_ino
+                and st.st_size > version['size']
+                and self.prefix_crc(fd, version['size']) == version['crc']):
+                base = version['base']
+            else:
+                base = '{0:d}:{1:d}:{2:08x}'.format(st.st_size, 
+                                                    st.st_mtime_ns, crc)
+            self.versions[filepath] = {'ino': st.st_ino, 'size': st.st_size,
+                                       'mtime': st.st_mtime_ns, 'crc': crc, 
+                                       'base': base}
+            return base
+
+    def range_stamps(self, filepath, ranges):
+
+        """
+            Stamps of the byte ranges (start, end) of a single file:
+            the path, inode, range and version of the file (see 
+            file_version), which is kept as records are appended after
+            them. A range not yet fully written is stamped as short.
+        """
+
+        try:
+            fd = os.open(filepath, os.O_RDONLY)
+        except OSError:
+            return [filepath + ':missing']*len(ranges)
+
+        stamps = []
+        try:
+            st = os.fstat(fd)
+            base = self.file_version(filepath, fd, st)
+            for start, end in ranges:
+                if (end > st.st_size):
+                    stamps.append(filepath + ':short')
+                    continue
+                stamps.append('{0:s}:{1:d}:{2:d}-{3:d}:{4:s}'.format(
+                              filepath, st.st_ino, start, end, base))
+        finally:
+            os.close(fd)
+        return stamps
+
+    def adopt_stamps(self, stamps, since):
+
+        """
+            Take the version of a single file in stamps stored at time
+            since (ns), e.g. with an index written in an earlier session,
+            as its version here if the file has not been modified since
+            they were stored. The session which stored them had already
+            checked that records were only appended to that version, so
+            results stored from it stay valid. Returns True if adopted
+        """
+
+        if (self.separate_outfiles):
+            return False
+
+        filepath = self.fdir + self.fname
+        for stamp in stamps:
+            if (not stamp.startswith(filepath + ':')):
+                continue
+            parts = stamp[len(filepath)+1:].split(':')
+            try:
+                ino, size, crc = int(parts[0]), int(parts[2]), int(parts[4], 16)
+            except (ValueError, IndexError):
+                continue
+
+            try:
+                fd = os.open(filepath, os.O_RDONLY)
+            except OSError:
+                return False
+            try:
+                st = os.fstat(fd)
+                base = self.file_version(filepath, fd, st)
+                # Only an older version than the one seen here, so
+                # stamps don't alternate between stored versions
+                if (ino != st.st_ino or st.st_mtime_ns > since
+                    or size >= int(base.split(':')[0])
+                    or self.prefix_crc(fd, size) != crc):
+                    continue
+                with self.versionlock:
+                    self.versions[filepath]['base'] = ':'.join(parts[2:5])
+                return True
+            finally:
+                os.close(fd)
+
+        return False
+
+    def source_stamps(self, startrec, endrec):
+
+        """
+            As RawData.source_stamps, but a single file is stamped by 
+            the byte range of records startrec to endrec (see range_stamps)
+            so results from it stay valid while a run appends records
+        """
+
+        if (self.separate_outfiles):
+            return RawData.source_stamps(self, startrec, endrec)
+        recbytes = self.recordbytes()
+        return self.range_stamps(self.fdir + self.fname,
+                                 [(int(startrec)*recbytes, 
+                                   (int(endrec)+1)*recbytes)])
+
 
     def read(self, startrec, endrec, binlimits=None, verbose=False, 
-             missingrec='raise'):
+             missingrec='raise', memmap=None):
 
         """
             Required inputs:
@@ -232,6 +430,13 @@ class MD_RawData(RawData):
                            from 0.
                 endrec   - record at which to finish (integer)
 
+            Optional inputs:
+
+                memmap   - return a read-only strided view of a memory 
+                           mapped file rather than a copy, so slicing by
+                           binlimits and later reductions only touch the
+                           pages they need (defaults to self.memmap)
+
             Return:
                 
                 bindata - 4D array of data in one record that was
@@ -241,8 +446,103 @@ class MD_RawData(RawData):
                 
         """
 
+        if memmap is None:
+            memmap = self.memmap
+
+        # Separate record files are memory mapped lazily, one file
+        # per record, through an MD_RecordStack
+        if (self.separate_outfiles and memmap):
+            return self.read_recordstack(startrec, endrec, binlimits=binlimits,
+                                         verbose=verbose, missingrec=missingrec)
+
+        # Only the bins inside binlimits are read from each record
+        lower, upper = self.get_binbox(binlimits)
+        if (not memmap and (lower != [0]*3 or upper != self.nbins)):
+            bindata = self.read_hyperslab(startrec, endrec, binlimits=binlimits,
+                                          verbose=verbose, missingrec=missingrec)
+            return self.to_workdtype(bindata)
+
+        # Store how many records are to be read
+        startrec = int(startrec)
+        endrec = int(endrec)
+        nrecs = endrec - startrec + 1 
+        recitems = np.prod(self.nbins)*self.nperbin
+
+        # Records already decoded by another field come from the 
+        # shared record cache, only the rest are read from disk
+        if (not memmap and self.record_cache.accepts(8*nrecs*recitems)):
+            bindata, nrecs = self.read_cached(startrec, endrec, 
+                                              verbose, missingrec)
+        else:
+            bindata, nrecs = self.read_files(startrec, endrec, 
+                                             verbose, missingrec, memmap)
+        if (bindata is None):
+            return
+
+        if (verbose):
+            print(('Reshaping and transposing {0:s} '.format(self.fname)))
+
+        # Reshape bindata
+        bindata = np.reshape( bindata,
+                             [ self.nbins[0],
+                               self.nbins[1],
+                               self.nbins[2],
+                               self.nperbin ,
+                               nrecs ],
+                              order='F')
+        bindata = np.transpose(bindata, (0,1,2,4,3))
+
+        # If bin limits are specified, return only those within range
+        if (binlimits):
+
+            if (verbose):
+                print(('bindata.shape = {0:s}'.format(str(bindata.shape))))
+                print(('Extracting bins {0:s} from {1:s} '.format(
+                      str(binlimits),self.fname)))
+            # Defaults
+            lower = [0]*3
+            upper = [i for i in bindata.shape] 
+    
+            for axis in range(3):
+                if (binlimits[axis] == None):
+                    continue
+                else:
+                    lower[axis] = binlimits[axis][0] 
+                    upper[axis] = binlimits[axis][1] 
+
+            bindata = bindata[lower[0]:upper[0],
+                              lower[1]:upper[1],
+                              lower[2]:upper[2], :, :]
+
+
+            if (verbose):
+                print(('new bindata.shape = {0:s}'.format(str(bindata.shape))))
+
+        # Strip the memmap subclass so results of later operations
+        # are plain arrays, the view still keeps the mapping open
+        if (memmap):
+            bindata = np.asarray(bindata)
+        else:
+            bindata = self.to_workdtype(bindata)
+
+        return bindata
+
+
+    def read_files(self, startrec, endrec, verbose=False, 
+                   missingrec='raise', memmap=False, dtype=None):
+
+        """
+            Read records startrec to endrec from disk and return the 
+            flat (Fortran ordered) data and number of records read.
+            Separate record files are read into an array of dtype,
+            by default the working type.
+        """
+
+        if (dtype is None):
+            dtype = self.workdtype
+
         #return_zeros or skip_rec if data cannot be obtained?
-        return_zeros = False; skip_rec = False; skiprecs = []
+        return_zeros = False; skip_rec = False
 
         # Store how many records are to be read
         startrec = int(startrec)
@@ -251,94 +551,31 @@ class MD_RawData(RawData):
         # Allocate enough memory in the C library to efficiently insert
         # into bindata
         recitems = np.product(self.nbins)*self.nperbin
-        bindata  = np.empty(int(nrecs*recitems))
-
-        #Ideally we'd have a memory map which defers reads to when they are
-        #needed. The problem is how to handle multiple files
-        #It seem dask would be a solution to concat these per file
-        #bindata = np.memmap(fobj, dtype=self.dtype, mode='r', 
-        #                     shape=(self.nbins[0],
-        #                       self.nbins[1],
-        #                       self.nbins[2],
-        #                       self.nperbin ,
-        #                       nrecs ),
-        #                      order='F'))
-
-        #Solution using dask causes OSError: [Errno 24] Too many open files 
-        #a = da.from_array(np.memmap(fobj, dtype="d",  mode="r", 
-        #          shape=(self.nbins[0],
-        #                self.nbins[1],
-        #                self.nbins[2],
-        #                1),  order='F'))
-        #for plusrec in range(0,nrecs):
-        #   filepath = self.fdir+self.fname+'.'+"%07d"%(startrec+plusrec)
-        #   s = da.from_array(filepath, dtype="d",  mode="r", 
-        #          shape=(self.nbins[0],
-        #                self.nbins[1],
-        #                self.nbins[2],
-        #                1),order='F'))
-        #   a = da.concatenate([a, s],axis=3) 
-
+        bindata  = np.empty(int(nrecs*recitems), dtype=dtype)
 
         # Check whether the records are written separately
         # If so
         if (self.separate_outfiles):
 
-            # Loop through files and append data
-            for plusrec in range(0,nrecs):
-                filepath = self.fdir+self.fname+'.'+"%07d"%(startrec+plusrec)
-                try: 
-                    fobj = open(filepath,'rb')
-                except:
-                    if missingrec is 'raise':
-                        print(('Unable to find file ' + filepath))    
-                        raise DataNotAvailable
-                    elif missingrec is 'returnzeros':
-                        print(('Unable to find file ' + filepath, '. Returning zeros'))
-                        return_zeros = True
-                    elif missingrec is 'skip':
-                        print(('Unable to find file ' + filepath, '. Reducing returned records by one'))
-                        skip_rec = True
-
-                istart = plusrec*recitems
-                iend = istart + recitems
-                if (verbose):
-                    print(('Reading {0:s} rec {1:5d}'.format(
-                          self.fname,startrec+plusrec)))
-                if return_zeros:
-                    bindata = np.zeros([ self.nbins[0],self.nbins[1],
-                                         self.nbins[2],self.nperbin ,nrecs ])
-                elif skip_rec:
-                    skiprecs.append(plusrec)
-                else:
-                    try:
-                        #Using dask stack with memmap would work like istart:iend I think
-                        #da.stack(np.memmap(fobj, dtype=self.dtype, mode='r'))
-                        #Followed by a reshape at the end (or using axis in concatenate).
-                        #da.concatenate(np.memmap(fobj, dtype=self.dtype, mode='r', 
-        #                     shape=(self.nbins[0],
-        #                       self.nbins[1],
-        #                       self.nbins[2],
-        #                       self.nperbin ,
-        #                       nrecs ),
-        #                      order='F')), axis=4)
-                        #Another option is to memmap and assign to location in array 
-                        #but I think this loads the data anyway
-                        #bindata[istart:iend] = np.memmap(fobj, dtype=self.dtype, mode='r')#np.fromfile(fobj,dtype=self.dtype)
-                        bindata[istart:iend] = np.fromfile(fobj,dtype=self.dtype)
-                    except ValueError:
-                        raise
-                    fobj.close()
-
-                #Reset ready for next record
-                return_zeros = False
-                skip_rec = False
+            # Read files concurrently, each into its own row
+            filepaths = [self.fdir+self.fname+'.'+"%07d"%(startrec+plusrec) 
+                         for plusrec in range(0,nrecs)]
+            bindata = bindata.reshape([nrecs, recitems])
+
+            def readrec(filepath, plusrec):
+                bindata[plusrec,:] = np.fromfile(filepath,dtype=self.dtype)
+
+            bindata = self.read_records(filepaths, readrec, bindata, recaxis=0,
+                                        missingrec=missingrec, verbose=verbose)
+            nrecs = bindata.shape[0]
+            bindata = bindata.ravel()
 
        # Else
         else:
 
+            filepath = self.fdir+self.fname
             try: 
-                fobj = open(self.fdir+self.fname,'rb')
+                fobj = open(filepath,'rb')
             except:
                 if missingrec is 'raise':
                     print(('Unable to find file ' + filepath))    
@@ -368,60 +605,286 @@ class MD_RawData(RawData):
             # Get data and reshape with fortran array ordering
             if return_zeros:
                 bindata = np.zeros([ self.nbins[0],self.nbins[1],
-                                     self.nbins[2],self.nperbin ,nrecs ])
+                                     self.nbins[2],self.nperbin ,nrecs ],
+                                   dtype=self.workdtype)
             elif skip_rec:
-                return
+                return None, 0
+            elif memmap:
+                # Fortran ordered view of the requested records, data is 
+                # only paged in from disk when it is actually indexed
+                bindata = np.memmap(fobj, dtype=self.dtype, mode='r', 
+                                    offset=seekbyte,
+                                    shape=(self.nbins[0],
+                                           self.nbins[1],
+                                           self.nbins[2],
+                                           self.nperbin,
+                                           nrecs),
+                                    order='F')
             else:
                 bindata = np.fromfile(fobj, dtype=self.dtype,
                                       count=nrecs*recitems)  
 
             fobj.close()
 
+        return bindata, nrecs
+
+    def read_cached(self, startrec, endrec, verbose=False, missingrec='raise'):
+
+        """
+            As read_files, but records are taken from the shared record 
+            cache where possible. Runs of records not in the cache are
+            read together and added to it. Records are keyed by the stamp
+            of their file, or of their bytes in a single file, so changes
+            are picked up but appending records to a single file doesn't
+            invalidate those already cached. Cached records are kept in
+            the type of the file, whatever the working type of the reader
+            which read them, and converted by the caller.
+        """
+
+        nrecs = endrec - startrec + 1 
+        recitems = np.prod(self.nbins)*self.nperbin
+
+        # Stamps for each record, any missing record is left to 
+        # read_files to deal with as requested by missingrec
+        if (self.separate_outfiles):
+            stamps = RawData.source_stamps(self, startrec, endrec)
+        else:
+            recbytes = self.recordbytes()
+            stamps = self.range_stamps(self.fdir + self.fname,
+                                       [(rec*recbytes, (rec+1)*recbytes) 
+                                        for rec in range(startrec, endrec+1)])
+        if (any([s.endswith((':missing', ':short')) for s in stamps])):
+            return self.read_files(startrec, endrec, verbose, missingrec)
+
+        keys = [(self.dtype, self.nperbin, startrec+plusrec, stamps[plusrec])
+                for plusrec in range(nrecs)]
+        blocks = [self.record_cache.get(key) for key in keys]
+
+        plusrec = 0
+        while (plusrec < nrecs):
+            if (blocks[plusrec] is not None):
+                plusrec += 1
+                continue
+
+            # Read run of uncached records in one go
+            lastrec = plusrec
+            while (lastrec+1 < nrecs and blocks[lastrec+1] is None):
+                lastrec += 1
+            data, n = self.read_files(startrec+plusrec, startrec+lastrec, 
+                                      verbose, missingrec, dtype=self.dtype)
+            if (data is None or n != lastrec-plusrec+1):
+                return self.read_files(startrec, endrec, verbose, missingrec)
+
+            for i in range(plusrec, lastrec+1):
+                istart = (i-plusrec)*recitems
+                block = np.array(data[istart:istart+recitems])
+                self.record_cache.put(keys[i], block)
+                blocks[i] = block
+            plusrec = lastrec + 1
+
         if (verbose):
-            print(('Reshaping and transposing {0:s} '.format(self.fname)))
+            print(('Assembling {0:s} recs {1:5d} to {2:5d} from record cache'.format(
+                  self.fname,startrec,endrec)))
 
-        # Reshape bindata
-        bindata = np.reshape( bindata,
-                             [ self.nbins[0],
-                               self.nbins[1],
-                               self.nbins[2],
-                               self.nperbin ,
-                               nrecs ],
-                              order='F')
-        bindata = np.transpose(bindata, (0,1,2,4,3))
+        bindata = np.concatenate(blocks)
+        return bindata, nrecs
 
-        #If records were missing and skip record requested
-        if skiprecs != []:
-            bindata = np.delete(bindata,skiprecs,axis=3)
+    def get_binbox(self, binlimits):
 
-        # If bin limits are specified, return only those within range
+        """
+            Lower and upper (exclusive) bin indices along each axis of
+            the box selected by binlimits
+        """
+
+        # Defaults
+        lower = [0]*3
+        upper = [int(n) for n in self.nbins]
         if (binlimits):
+            for axis in range(3):
+                if (binlimits[axis] == None):
+                    continue
+                else:
+                    # Same bins as slicing lower:upper would select
+                    start, stop, step = slice(*binlimits[axis]).indices(upper[axis])
+                    lower[axis] = start
+                    upper[axis] = max(start, stop)
+        return lower, upper
 
-            if (verbose):
-                print(('bindata.shape = {0:s}'.format(str(bindata.shape))))
-                print(('Extracting bins {0:s} from {1:s} '.format(
-                      str(binlimits),self.fname)))
-            # Defaults
-            lower = [0]*3
-            upper = [i for i in bindata.shape] 
-    
+    def hyperslab_runs(self, lower, upper):
+
+        """
+            Offsets (in items from the start of a record) and length of
+            the contiguous runs making up the box lower:upper of every
+            item in a Fortran ordered record, in the order they appear
+            in the file
+        """
+
+        dims = [int(n) for n in self.nbins] + [self.nperbin]
+        lo = lower + [0]
+        hi = upper + [self.nperbin]
+        strides = [int(np.prod(dims[:axis])) for axis in range(4)]
+
+        # Leading axes covered in full join onto the run along the
+        # first partly selected axis
+        k = 0
+        while (k < 3 and lo[k] == 0 and hi[k] == dims[k]):
+            k += 1
+        runitems = strides[k]*(hi[k] - lo[k])
+        offsets = np.array([strides[k]*lo[k]])
+        for axis in range(k+1, 4):
+            offsets = (np.arange(lo[axis], hi[axis])[:,np.newaxis]*strides[axis]
+                       + offsets[np.newaxis,:]).ravel()
+
+        return offsets, runitems
+
+    def read_hyperslab(self, startrec, endrec, binlimits=None, verbose=False,
+                       missingrec='raise'):
+
+        """
+            Read only the bins inside binlimits for records startrec to 
+            endrec, returning the same 5D array as read. Each contiguous
+            run of the box in the Fortran ordered file is read straight 
+            into the output, so a thin slab costs its own size rather 
+            than whole records. Where runs are shorter than a page (a 
+            box limited along the first axis), a strided view of a 
+            memory map is copied instead of issuing many tiny reads.
+        """
+
+        startrec = int(startrec)
+        endrec = int(endrec)
+        nrecs = endrec - startrec + 1 
+        recitems = int(np.prod(self.nbins))*self.nperbin
+        itemsize = np.dtype(self.dtype).itemsize
+
+        lower, upper = self.get_binbox(binlimits)
+        boxshape = [upper[axis] - lower[axis] for axis in range(3)] + [self.nperbin]
+        box = tuple([slice(lower[axis], upper[axis]) for axis in range(3)])
+        offsets, runitems = self.hyperslab_runs(lower, upper)
+        runbytes = runitems*itemsize
+
+        if (self.separate_outfiles):
+            filepaths = [self.fdir+self.fname+'.'+"%07d"%(startrec+plusrec) 
+                         for plusrec in range(0,nrecs)]
+            recoffsets = [0]*nrecs
+        else:
+            filepaths = [self.fdir+self.fname]*nrecs
+            recoffsets = [(startrec+plusrec)*recitems*itemsize
+                          for plusrec in range(0,nrecs)]
+
+        if (verbose):
+            print(('Reading bins {0:s} of {1:s} recs {2:5d} to {3:5d}'.format(
+                  str(binlimits),self.fname,startrec,endrec)))
+
+        bindata = np.empty([nrecs, int(np.prod(boxshape))], dtype=self.dtype)
+
+        def readrec(filepath, plusrec):
+            out = bindata[plusrec,:]
+            if (runbytes < self.minrunbytes):
+                try:
+                    recdata = np.memmap(filepath, dtype=self.dtype, mode='r',
+                                        offset=recoffsets[plusrec],
+                                        shape=tuple(self.nbins)+(self.nperbin,),
+                                        order='F')
+                except ValueError:
+                    raise IOError('Record ended early in ' + filepath)
+                out.reshape(boxshape, order='F')[...] = recdata[box]
+                del recdata
+                return
+            outbytes = memoryview(out).cast('B')
+            with open(filepath, 'rb', buffering=0) as fobj:
+                for n, offset in enumerate(offsets):
+                    fobj.seek(recoffsets[plusrec] + int(offset)*itemsize)
+                    run = outbytes[n*runbytes:(n+1)*runbytes]
+                    if (fobj.readinto(run) != runbytes):
+                        raise IOError('Record ended early in ' + filepath)
+
+        bindata = self.read_records(filepaths, readrec, bindata, recaxis=0,
+                                    missingrec=missingrec, verbose=False)
+        nrecs = bindata.shape[0]
+
+        # Reshape to box with records along axis 3
+        bindata = np.reshape(bindata.ravel(), boxshape + [nrecs], order='F')
+        bindata = np.transpose(bindata, (0,1,2,4,3))
+
+        return bindata
+
+    def get_recordstack(self, maxopen=128):
+
+        """
+            Return an MD_RecordStack presenting the separate record 
+            files fname.%07d as a single lazily memory mapped array
+            [nx, ny, nz, nrecs, nperbin]. The stack is kept so open
+            mappings are reused between reads.
+        """
+
+        if (not self.separate_outfiles):
+            print(('Record stack requires separate files ' + self.fname + '.*'))
+            raise DataNotAvailable
+
+        try:
+            stack = self.recordstack
+        except AttributeError:
+            stack = MD_RecordStack(self.fdir, self.fname, self.dtype, 
+                                   self.nbins, self.nperbin, self.maxrec, 
+                                   maxopen=maxopen)
+            self.recordstack = stack
+
+        stack.maxrec = self.maxrec
+        return stack
+
+    def read_recordstack(self, startrec, endrec, binlimits=None, 
+                         verbose=False, missingrec='raise'):
+
+        """
+            Read records startrec to endrec from separate record files 
+            using the record stack. Only the bins inside binlimits are 
+            copied out of each mapped file, so the full records are never 
+            brought into memory. Returns the same 5D array as read.
+        """
+
+        stack = self.get_recordstack()
+
+        # Defaults
+        lower = [0]*3
+        upper = [i for i in self.nbins]
+        if (binlimits):
             for axis in range(3):
                 if (binlimits[axis] == None):
                     continue
                 else:
                     lower[axis] = binlimits[axis][0] 
                     upper[axis] = binlimits[axis][1] 
+        box = tuple([slice(lower[axis], upper[axis]) for axis in range(3)]) 
+        box = box + (slice(None),)
 
-            bindata = bindata[lower[0]:upper[0],
-                              lower[1]:upper[1],
-                              lower[2]:upper[2], :, :]
-
+        nrecs = endrec - startrec + 1
+        shape = [len(range(self.nbins[axis])[box[axis]]) for axis in range(3)]
+        bindata = np.empty(shape + [nrecs, self.nperbin], dtype=self.workdtype)
 
+        skiprecs = []
+        for plusrec in range(0,nrecs):
+            rec = startrec + plusrec
             if (verbose):
-                print(('new bindata.shape = {0:s}'.format(str(bindata.shape))))
+                print(('Mapping {0:s} rec {1:5d}'.format(self.fname,rec)))
+            try:
+                bindata[:,:,:,plusrec,:] = stack.get_record(rec)[box]
+            except IOError:
+                filepath = stack.filepath(rec)
+                if missingrec == 'raise':
+                    print(('Unable to find file ' + filepath))    
+                    raise DataNotAvailable
+                elif missingrec == 'returnzeros':
+                    print(('Unable to find file ' + filepath, '. Returning zeros'))
+                    bindata[:,:,:,plusrec,:] = 0.
+                elif missingrec == 'skip':
+                    print(('Unable to find file ' + filepath, '. Reducing returned records by one'))
+                    skiprecs.append(plusrec)
 
-        return bindata
+        #If records were missing and skip record requested
+        if skiprecs != []:
+            bindata = np.delete(bindata,skiprecs,axis=3)
 
+        return bindata
 
     def write(self, data, fdir, fname, startrec=0, endrec=None, 
               dryrun=False, verbose=False):
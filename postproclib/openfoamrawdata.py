@@ -2,6 +2,8 @@
 import numpy as np
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from .rawdata import RawData
 from .headerdata import openfoam_HeaderData
@@ -12,6 +14,13 @@ from .OF_mesh_parser import FoamMesh
 
 
 class OpenFOAM_RawData(RawData):
+
+    # Processes parsing the processor directories of a decomposed case
+    # concurrently, None for one per core or 1 to parse serially
+    nprocs = None
+    # Pool of these processes, started by the first read and kept
+    # until the reader is closed
+    pool = None
     
     def __init__(self, fdir, fname, nperbin, parallel_run=None):
 
@@ -78,6 +87,38 @@ class OpenFOAM_RawData(RawData):
         self.header.initialstep = str(initialstep)
 
 
+    def get_pool(self):
+
+        """
+            Process pool parsing the processor files of a decomposed
+            case, None to parse them serially
+        """
+
+        nprocs = self.nprocs if (self.nprocs is not None) else os.cpu_count()
+        nprocs = min(int(nprocs), self.procs)
+        if (not self.parallel_run or nprocs <= 1):
+            return None
+        if (self.pool is None):
+            self.pool = ProcessPoolExecutor(max_workers=nprocs)
+        return self.pool
+
+    def close(self, wait=True):
+
+        """
+            Shut down the process pool, a later read starts a new one
+        """
+
+        pool = self.pool
+        self.pool = None
+        if (pool is not None):
+            pool.shutdown(wait=wait)
+
+    def __del__(self):
+        try:
+            self.close(wait=False)
+        except Exception:
+            pass
+
     def get_npercell(self):
      
         # Read first record (reclist[0]) as example 
@@ -276,6 +317,32 @@ class OpenFOAM_RawData(RawData):
         return []
 
 
+    def scatter_processors(self, vlists, fpaths):
+
+        """
+            Global list of cell values [ncells, npercell] from the
+            internal field of each processor (as parse_internal_field)
+            using the cellProcAddressing maps in cellmap
+        """
+
+        olist = np.zeros([self.ncx*self.ncy*self.ncz, self.npercell])
+        for proc, vlist in enumerate(vlists):
+            if (vlist is None):
+                raise IOError('Unable to read ' + fpaths[proc])
+            vlist = np.asarray(vlist, dtype=float)
+            cells = self.cellmap[proc]
+            # Uniform value for all cells of this processor
+            if (vlist.size == 1 or vlist.size == self.npercell):
+                olist[cells, :] = vlist.reshape(-1)
+            elif (vlist.size == cells.size*self.npercell):
+                olist[cells, :] = vlist.reshape(cells.size, self.npercell)
+            else:
+                print(('Number of values in ' + fpaths[proc] + ' does not '
+                       + 'match cellProcAddressing'))
+                raise DataNotAvailable
+
+        return olist
+
     def read_cells(self, fobj, ncells):
 
         def read_list(fobj, nitems, line):
@@ -418,18 +485,16 @@ class OpenFOAM_RawData(RawData):
                 fdir = self.fdir+"processor" + str(proc) + "/"
                 fpath = fdir + "/constant/polyMesh/cellProcAddressing"
 
-                #cellProcAddressing = parse_internal_field(fpath)
-                with open(fpath,'r') as fobj:
-                    nperprocx = int(self.ncx/float(self.procxyz[0]))
-                    nperprocy = int(self.ncy/float(self.procxyz[1]))
-                    nperprocz = int(self.ncz/float(self.procxyz[2]))
-
-                    celllist = self.read_cells(fobj, nperprocx*nperprocy*nperprocz)
-                    #Mapping from local to global cells
-                    self.cellmap.append(celllist)
+                #Mapping from local to global cells, ascii or binary
+                celllist = FoamMesh.parse_mesh_file(fpath, 
+                                FoamMesh.parse_cellProcAddressing_content)
+                if (celllist is None):
+                    raise DataNotAvailable
+                celllist = np.asarray(celllist, dtype=np.intp)
+                self.cellmap.append(celllist)
 
-                    #Keep min/max process method to get halos
-                    ctemp = self.reshape_list_to_cells(celllist, 1)
+                #Keep min/max process method to get halos
+                ctemp = self.reshape_list_to_cells(celllist, 1)
 
                 # This will only work for proc decompositions in x
                 # I have no idea how OpenFOAM maps 3D processor
@@ -489,85 +554,35 @@ class OpenFOAM_RawData(RawData):
         else:
             return [rectime+'/' for rectime in records[:]]
 
-    def read(self, startrec, endrec, binlimits=None, verbose=False, **kwargs):
+    def read(self, startrec, endrec, binlimits=None, verbose=False, 
+             missingrec='raise', **kwargs):
 
         nrecs = endrec - startrec + 1
 
         # Allocate storage (despite ascii read!)
-        odata = np.zeros((self.ncx,self.ncy,self.ncz,nrecs,self.npercell))
-
-        # Loop through files and insert data
-        for plusrec in range(0,nrecs):
-
-            if self.parallel_run:
-                olist = np.zeros([self.ncx*self.ncy*self.ncz,self.npercell])
-                for proc in range(self.procs):
-                    fdir = self.fdir+"processor" + str(proc) + "/"
-                    fpath = fdir + self.reclist[startrec+plusrec] + self.fname
+        odata = np.zeros((self.ncx,self.ncy,self.ncz,nrecs,self.npercell),
+                         dtype=self.workdtype)
 
-                    try:
-#                        #Switch to OpenFOAM pp which handles binary
-#                        vtemp = parse_internal_field(fpath)
-
-#                        if (vtemp.shape[0] == 1):
-#                            odata[:,:,:,plusrec,:] = vtemp[0,:]
-#                        else:
-#                            # Loop through cellProcAddress mapping and assign
-#                            # values to global cells
-#                            for i in range(len(vlist)):
-#                                olist[int(self.cellmap[proc][i]),:] = vtemp.ravel()[i]
-#                            odata[:,:,:,plusrec,:] = self.reshape_list_to_cells(olist.T.ravel(), self.npercell, glob=True)
-
-                        with open(fpath,'r') as fobj:
-                            try:
-                                vlist = self.read_list_named_entry(fobj, 'internalField')
-                            except UnicodeDecodeError:
-                                print("OpenFOAM Binary data cannot be read in parallel, " +
-                                      "use reconstructPar, delete processor* folders " +
-                                      "and run pyDataView again.")
-                                sys.exit(1)
-                            #Case when field is constant has a single value
-                            if len(vlist) is self.npercell:
-                                for dim in range(self.npercell):
-                                    odata[:,:,:,plusrec,dim] = float(vlist[dim])
-                            else:
-                                # Loop through cellProcAddress mapping and assign
-                                # values to global cells
-                                for i in range(len(vlist)):
-                                    olist[int(self.cellmap[proc][i]),:] = vlist[i]
-
-                                #Reshape global list to cells
-                                vtemp = self.reshape_list_to_cells(olist.T.ravel(), self.npercell, glob=True)
-                                odata[:,:,:,plusrec,:] = vtemp
-
-                    except IOError:
-                        raise
-#                        if use_pyfoam:
-#                            # Commented this out as it's slower than custom routines...
-#                            try:
-#                                from PyFoam.RunDictionary.ParsedParameterFile import ParsedParameterFile
-#                                with ParsedParameterFile(fpath) as f:
-#                                    odata[:,:,:,plusrec,:] = np.array(f['internalField']).reshape([self.ncx, self.ncy, self.ncz, self.npercell])
-#                            except ImportError:
-#                                print("Failed to load PyFoam, falling back on PyDataView reader")
-
-#                        else:
-#                            raise
-    
-                    #Try a quick read based on assumed data format, otherwise switch 
-#                    try:
-#                        data = np.genfromtxt(fpath, skip_footer=self.ncx*self.ncz+36, skip_header=22) #64 by 64 footer of 4134
-#                        print(data.shape, self.ncx,self.ncy,self.ncz,nrecs,self.npercell)
-#                        vtemp = data.reshape(self.ncx,self.ncy,self.ncz,self.npercell)
-#                        odata[:,:,:,plusrec,:] = vtemp
+        recnames = [self.reclist[startrec+plusrec] for plusrec in range(0,nrecs)]
 
-#                    except:
-#                        print("Quick read failed")
-#                        raise
+        # Read a record from its time directory (or from each processor
+        # directory in turn) and insert into odata
+        def readrec(recname, plusrec):
 
+            if self.parallel_run:
+                # Parse each processor's file on the process pool,
+                # then scatter into the global list of cells
+                fpaths = [self.fdir + "processor" + str(proc) + "/" 
+                          + recname + self.fname 
+                          for proc in range(self.procs)]
+                vlists = mapfn(parse_internal_field, fpaths)
+                olist = self.scatter_processors(vlists, fpaths)
+                odata[:,:,:,plusrec,:] = self.reshape_list_to_cells(olist.T.ravel(), 
+                                                                    self.npercell, 
+                                                                    glob=True)
 
             else:
-                fpath = self.fdir + self.reclist[startrec+plusrec] + self.fname
+                fpath = self.fdir + recname + self.fname
 
                 #Switch to OpenFOAM pp which handles binary
                 vtemp = parse_internal_field(fpath)
@@ -595,8 +610,26 @@ class OpenFOAM_RawData(RawData):
 #                        odata[:,:,:,plusrec,:] = 0.
 #                    else:
 #                        vtemp = self.reshape_list_to_cells(vlist, self.npercell)
-#                        odata[:,:,:,plusrec,:] = vtemp 
-                
+#                        odata[:,:,:,plusrec,:] = vtemp
+
+        # Loop through records concurrently and insert data, the
+        # processors of decomposed cases are parsed on the reader's 
+        # process pool, reused between reads
+        pool = self.get_pool()
+
+        def mapfn(fn, args):
+            if (pool is None):
+                return [fn(arg) for arg in args]
+            return list(pool.map(fn, args))
+
+        try:
+            odata = self.read_records(recnames, readrec, odata, recaxis=3,
+                                      missingrec=missingrec, verbose=verbose)
+        except BrokenProcessPool:
+            # e.g. a worker was killed, start afresh on the next read
+            self.close(wait=False)
+            raise
+
         # If bin limits are specified, return only those within range
         if (binlimits):
 
@@ -633,7 +666,8 @@ class OpenFOAM_RawData(RawData):
         nrecs = endrec - startrec + 1
 
         # Allocate storage (despite ascii read!)
-        odata = np.empty((self.ncx,1,self.ncz,nrecs,self.npercell))
+        odata = np.empty((self.ncx,1,self.ncz,nrecs,self.npercell),
+                         dtype=self.workdtype)
 
         # Loop through files and insert data
         for plusrec in range(0,nrecs):
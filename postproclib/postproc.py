@@ -1,3 +1,6 @@
+from .fieldgraph import FieldGraph
+from .follow import Follower
+
 class PostProc:
 
     def __str__(self):
@@ -8,3 +11,93 @@ class PostProc:
             line = '\t{0:<24s}=\t{1:>10f},\n'.format(key, field.maxrec)
             string += line
         return string 
+
+    def set_workdtype(self, workdtype):
+
+        """
+            Floating point type data of all fields is read in, e.g. 'f'
+            for single precision, see Field.set_workdtype
+        """
+
+        for field in self.plotlist.values():
+            try:
+                field.set_workdtype(workdtype)
+            except AttributeError:
+                pass
+
+    def set_memmap(self, memmap):
+
+        """
+            Read records of all fields as memory mapped views where 
+            supported, see Field.set_memmap
+        """
+
+        for field in self.plotlist.values():
+            try:
+                field.set_memmap(memmap)
+            except AttributeError:
+                pass
+
+    def enable_cumulative_index(self):
+
+        """
+            Average over records of all fields using sidecar indexes
+            of running sums, see Field.enable_cumulative_index
+        """
+
+        for field in self.plotlist.values():
+            try:
+                field.enable_cumulative_index()
+            except AttributeError:
+                pass
+
+    def enable_plane_index(self):
+
+        """
+            Answer profiles of all fields from sidecar indexes of
+            plane sums, see Field.enable_plane_index
+        """
+
+        for field in self.plotlist.values():
+            try:
+                field.enable_plane_index()
+            except AttributeError:
+                pass
+
+    def refresh(self):
+
+        """
+            Extend all fields to records written since they were 
+            opened, see Field.refresh. Returns a dictionary of the
+            number of new records of each field which has grown.
+        """
+
+        grown = {}
+        for name, field in self.plotlist.items():
+            try:
+                nnew = field.refresh()
+            except AttributeError:
+                continue
+            if (nnew > 0):
+                grown[name] = nnew
+        return grown
+
+    def follow(self, callback=None, interval=2.0):
+
+        """
+            Follower watching the results directory and refreshing 
+            the fields as records are written, see follow.Follower
+        """
+
+        return Follower(self, callback=callback, interval=interval)
+
+    def field_graph(self, names=None):
+
+        """
+            FieldGraph evaluating the named fields of plotlist (all by
+            default) together, so shared inputs are only computed once
+        """
+
+        if (names is None):
+            names = list(self.plotlist.keys())
+        return FieldGraph({name: self.plotlist[name] for name in names})
@@ -1,6 +1,11 @@
 #! /usr/bin/env python
+import numpy as np
 import sys
 import os
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
+from .pplexceptions import DataNotAvailable
 
 class RawData(object):
 
@@ -28,6 +33,18 @@ class RawData(object):
                data file in a results folder from the MD code.
 
     """
+
+    # Number of files read concurrently by read_records. Reading one
+    # file per record is dominated by per-file latency on parallel
+    # filesystems, so this can usefully exceed the number of cores.
+    # Set to 1 to read records serially.
+    nthreads = 8
+    # Floating point type of the arrays returned by read, None for the
+    # double precision data as read. Single precision ('f') halves the
+    # memory and bandwidth of reads where full precision isn't needed,
+    # e.g. interactive plotting. See Field.set_workdtype
+    workdtype = None
+
     def __init__(self, fdir, fname, dtype, nperbin):
 
         """
@@ -101,6 +118,15 @@ class RawData(object):
         """
         sys.exit("get_maxrec not defined")
 
+    def refresh(self):
+        """
+            Extend maxrec in place to any records written since it 
+            was found, e.g. by a running simulation, and return the 
+            number of new records. Readers which can't cheaply find
+            new records return 0
+        """
+        return 0
+
     def get_gridtopology(self):
         """
             Get topology of underlying grid 
@@ -147,6 +173,134 @@ class RawData(object):
         sys.exit("read not defined")
 
 
+    def to_workdtype(self, data):
+
+        """
+            Return data as workdtype, without a copy if it already is
+        """
+
+        if (self.workdtype is None or data is None):
+            return data
+        return data.astype(self.workdtype, copy=False)
+
+
+    def source_files(self, startrec, endrec):
+        """
+            List of files read to obtain records startrec to endrec,
+            used to check cached results are still current. Covers 
+            readers with a single file or one fname.%07d file per record, 
+            otherwise an empty list (unknown) is returned
+        """
+
+        try:
+            separate_outfiles = self.separate_outfiles
+        except AttributeError:
+            return []
+
+        if (separate_outfiles):
+            return [self.fdir+self.fname+'.'+"%07d"%rec 
+                    for rec in range(int(startrec), int(endrec)+1)]
+        else:
+            return [self.fdir+self.fname]
+
+    def source_stamps(self, startrec, endrec):
+        """
+            Stamp of each of the source_files of records startrec to
+            endrec, in the same order, which changes whenever the data
+            they hold may have. Here the path, size and modification
+            time, missing files are stamped so their creation is seen.
+        """
+
+        stamps = []
+        for filepath in self.source_files(startrec, endrec):
+            try:
+                st = os.stat(filepath)
+                stamps.append(filepath + ':' + str(st.st_size)
+                                       + ':' + str(st.st_mtime_ns))
+            except OSError:
+                stamps.append(filepath + ':missing')
+        return stamps
+
+    def adopt_stamps(self, stamps, since):
+        """
+            Bring the stamps of this reader in line with stamps stored
+            at time since (ns) still valid for its files, returns True 
+            if any changed. Stamps here only change with the files so
+            this does nothing
+        """
+        return False
+
+    def read_records(self, filepaths, readrec, out, recaxis=3, 
+                     missingrec='raise', nthreads=None, verbose=False):
+
+        """
+            Shared engine for readers with one file per record. Each
+            record is read on a thread pool and written by readrec 
+            straight into its slot of the preallocated output array.
+
+            Required inputs:
+
+                filepaths - list with the file (or record name) for each 
+                            record, passed in turn to readrec
+                readrec   - function readrec(filepath, plusrec) which reads
+                            one record and stores it in record plusrec of 
+                            out, raising IOError if it cannot be found
+                out       - preallocated array for all records
+
+            Optional inputs:
+
+                recaxis    - axis of out along which records are stored
+                missingrec - if a record cannot be found, 'raise' 
+                             DataNotAvailable, 'returnzeros' to zero its 
+                             slot or 'skip' to remove it from out
+                nthreads   - size of the thread pool (default self.nthreads)
+
+            Return:
+                
+                out - the filled array, less any skipped records
+                
+        """
+
+        if (nthreads is None):
+            nthreads = self.nthreads
+
+        def readslot(plusrec):
+            if (verbose):
+                print(('Reading {0:s}'.format(filepaths[plusrec])))
+            try:
+                readrec(filepaths[plusrec], plusrec)
+            except IOError:
+                return plusrec
+
+        nrecs = len(filepaths)
+        nthreads = max(1, min(int(nthreads), nrecs))
+        if (nthreads == 1):
+            missing = [readslot(plusrec) for plusrec in range(nrecs)]
+        else:
+            with ThreadPoolExecutor(max_workers=nthreads) as pool:
+                missing = list(pool.map(readslot, range(nrecs)))
+
+        skiprecs = []
+        for plusrec in missing:
+            if (plusrec is None):
+                continue
+            filepath = filepaths[plusrec]
+            if missingrec == 'raise':
+                print(('Unable to find file ' + filepath))    
+                raise DataNotAvailable
+            elif missingrec == 'returnzeros':
+                print(('Unable to find file ' + filepath, '. Returning zeros'))
+                out[(slice(None),)*recaxis + (plusrec,)] = 0.
+            elif missingrec == 'skip':
+                print(('Unable to find file ' + filepath, '. Reducing returned records by one'))
+                skiprecs.append(plusrec)
+
+        #If records were missing and skip record requested
+        if skiprecs != []:
+            out = np.delete(out, skiprecs, axis=recaxis)
+
+        return out
+
     def write(self, data, fdir, fname, startrec=0, endrec=None, 
               dryrun=False, verbose=False, separate_outfiles=True):
         """
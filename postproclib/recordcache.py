@@ -0,0 +1,110 @@
+#! /usr/bin/env python
+import threading
+from collections import OrderedDict
+
+"""
+
+    RecordCache Class
+
+    Process-wide, memory bounded, least-recently-used cache of decoded
+    records. Composite fields (temperature, energy, pressure with the
+    streaming part removed, ...) read the same primitive files such as
+    mbins and vbins through several separate MD_RawData objects. With
+    every reader consulting the one shared cache, each record of a
+    primitive file is only read from disk once per redraw.
+
+    Records are stored under a key chosen by the reader, which should
+    include the stamp of the record's source (see RawData.source_stamps
+    and MD_RawData.range_stamps) so that records are re-read if the 
+    file changes. Stored arrays are made read-only and
+    callers must copy out of them rather than modify them.
+
+    The shared instance used by the readers is record_cache; its size
+    may be changed with set_record_cache_size (0 disables caching).
+
+"""
+
+class RecordCache(object):
+
+    def __init__(self, maxbytes=256*1024**2):
+
+        """
+            maxbytes   -  upper bound on the memory held by cached
+                          records, integer number of bytes
+        """
+
+        self.maxbytes = int(maxbytes)
+        self.nbytes = 0
+        self.records = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def accepts(self, nbytes):
+
+        """
+            True if a request of nbytes could be held in the cache,
+            larger requests would only evict everything else
+        """
+
+        return (0 < nbytes <= self.maxbytes)
+
+    def get(self, key):
+
+        """
+            Return the record stored for key, or None if not present
+        """
+
+        with self.lock:
+            try:
+                record = self.records.pop(key)
+            except KeyError:
+                return None
+            self.records[key] = record
+            return record
+
+    def put(self, key, record):
+
+        """
+            Store a record for key, evicting the least recently used
+            records as required to stay within maxbytes
+        """
+
+        if (record.nbytes > self.maxbytes):
+            return
+        record.flags.writeable = False
+
+        with self.lock:
+            old = self.records.pop(key, None)
+            if (old is not None):
+                self.nbytes -= old.nbytes
+            while (self.records and self.nbytes + record.nbytes > self.maxbytes):
+                evictkey, evicted = self.records.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+            self.records[key] = record
+            self.nbytes += record.nbytes
+
+    def resize(self, maxbytes):
+
+        """
+            Change the memory bound, evicting records if it is reduced
+        """
+
+        with self.lock:
+            self.maxbytes = int(maxbytes)
+            while (self.records and self.nbytes > self.maxbytes):
+                evictkey, evicted = self.records.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.nbytes = 0
+
+
+# Shared by all readers in this process
+record_cache = RecordCache()
+
+def set_record_cache_size(maxbytes):
+    record_cache.resize(maxbytes)
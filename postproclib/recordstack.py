@@ -0,0 +1,132 @@
+#! /usr/bin/env python
+import numpy as np
+from collections import OrderedDict
+
+"""
+
+    MD_RecordStack Class
+
+    When the MD code writes each record to a separate file
+    (fname.0000000, fname.0000001, ...) there is no single file to
+    memory map. The MD_RecordStack presents the whole series as one
+    virtual array in the same form returned by RawData readers,
+
+        stack[nx, ny, nz, nrecs, nperbin]
+
+    but only memory maps the file for a record when that record is
+    actually indexed. A bounded least-recently-used collection of
+    open mappings is kept, so runs with very many record files do not
+    exhaust file descriptors (each mapping holds one open descriptor)
+    or memory.
+
+    Example:
+
+        stack = MD_RecordStack(fdir, 'vbins', 'd', [8,8,8], 3, maxrec)
+        u = stack[:, 2:4, :, 100:200, 0]
+
+"""
+
+class MD_RecordStack(object):
+
+    def __init__(self, fdir, fname, dtype, nbins, nperbin, maxrec,
+                 maxopen=128):
+
+        """
+            fdir       -  file directory containing results, string
+            fname      -  base file name, records are fname.%07d, string
+            dtype      -  datatype string, 'i' for integer, 'd' for float
+            nbins      -  length-3 list of number of bins, integers
+            nperbin    -  number of items per bin, integer
+            maxrec     -  last record available (counted from 0), integer
+            maxopen    -  maximum number of memory mapped files kept open
+        """
+
+        if (fdir[-1] != '/'): fdir += '/'
+        self.fdir = fdir
+        self.fname = fname
+        self.dtype = dtype
+        self.nbins = [int(n) for n in nbins]
+        self.nperbin = int(nperbin)
+        self.maxrec = int(maxrec)
+        self.maxopen = maxopen
+        self.maps = OrderedDict()
+
+    @property
+    def shape(self):
+        return (self.nbins[0], self.nbins[1], self.nbins[2],
+                self.maxrec+1, self.nperbin)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def filepath(self, rec):
+        return self.fdir + self.fname + '.' + "%07d"%rec
+
+    def get_record(self, rec):
+
+        """
+            Return a read-only memory mapped view of a single record
+            with shape [nx, ny, nz, nperbin]. Raises IOError if the
+            file for this record does not exist.
+        """
+
+        try:
+            mm = self.maps.pop(rec)
+        except KeyError:
+            mm = np.memmap(self.filepath(rec), dtype=self.dtype, mode='r',
+                           shape=(self.nbins[0],
+                                  self.nbins[1],
+                                  self.nbins[2],
+                                  self.nperbin),
+                           order='F')
+
+            # Drop least recently used mappings, the file is closed
+            # once no views of it remain
+            while (len(self.maps) >= self.maxopen):
+                self.maps.popitem(last=False)
+
+        self.maps[rec] = mm
+        return mm
+
+    def close(self):
+        self.maps.clear()
+
+    def __getitem__(self, key):
+
+        """
+            Index the virtual [nx, ny, nz, nrecs, nperbin] array,
+            only the files for the selected records are opened and
+            only the selected part of each is copied into the result
+        """
+
+        if (not isinstance(key, tuple)):
+            key = (key,)
+
+        # Expand any Ellipsis to full slices
+        if (any(k is Ellipsis for k in key)):
+            i = [k is Ellipsis for k in key].index(True)
+            fill = (slice(None),)*(len(self.shape) - len(key) + 1)
+            key = key[:i] + fill + key[i+1:]
+        key = key + (slice(None),)*(len(self.shape) - len(key))
+
+        recs = np.arange(self.shape[3])[key[3]]
+        singlerec = (np.ndim(recs) == 0)
+        recs = np.atleast_1d(recs)
+
+        # Shape of the selection from one record, found without
+        # allocating a full record
+        recslice = key[0:3] + (key[4],)
+        recshape = np.broadcast_to(0., self.shape[0:3]
+                                       + (self.nperbin,))[recslice].shape
+        recaxis = sum([not isinstance(k, (int, np.integer))
+                       for k in key[0:3]])
+
+        out = np.empty(recshape[:recaxis] + (len(recs),)
+                       + recshape[recaxis:], dtype=self.dtype)
+        for n, rec in enumerate(recs):
+            out[(slice(None),)*recaxis + (n,)] = self.get_record(rec)[recslice]
+
+        if (singlerec):
+            out = out[(slice(None),)*recaxis + (0,)]
+
+        return out
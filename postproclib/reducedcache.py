@@ -0,0 +1,139 @@
+#! /usr/bin/env python
+import numpy as np
+import hashlib
+import os
+
+"""
+
+    ReducedCache Class
+
+    Stores the reduced (averaged) output of a field on disk so repeated
+    requests for the same profile or contour, including in a later
+    session, are loaded from a small .npz file instead of re-reading
+    and re-averaging the raw data.
+
+    Entries are written to a cache directory inside the results folder,
+
+        fdir/.ppl/cache/<key>.npz
+
+    and keyed by the field class, output file name, record range,
+    averaging axes, binlimits, peculiar/moving_ref flags and any other
+    keyword arguments. Each entry also stores the stamps of the source
+    files it was computed from (see RawData.source_stamps) and is 
+    discarded if any of these have changed. Records appended to a
+    single output file after those averaged don't change its stamp
+    (see MD_RawData.file_version).
+
+"""
+
+class ReducedCache(object):
+
+    def __init__(self, fdir, cachedir='.ppl/cache'):
+
+        """
+            fdir       -  results directory, string
+            cachedir   -  cache location relative to fdir, string
+        """
+
+        if (fdir[-1] != '/'): fdir += '/'
+        self.fdir = fdir
+        self.cachedir = fdir + cachedir + '/'
+
+    def key(self, field, startrec, endrec, avgaxes, kwargs):
+
+        """
+            Hash of everything which determines the reduced result
+        """
+
+        flags = {}
+        for attr in ['fname', 'peculiar', 'moving_ref']:
+            try:
+                flags[attr] = getattr(field, attr)
+            except AttributeError:
+                pass
+        try:
+            flags['rawfname'] = field.Raw.fname
+            if (field.Raw.workdtype is not None):
+                flags['workdtype'] = np.dtype(field.Raw.workdtype).str
+        except AttributeError:
+            pass
+
+        kwargs = dict(kwargs)
+        kwargs.pop('chunksize', None)
+
+        keyparts = [type(field).__module__, type(field).__name__,
+                    sorted(flags.items()), int(startrec), int(endrec),
+                    tuple(avgaxes), sorted(kwargs.items())]
+        return hashlib.sha1(repr(keyparts).encode('utf-8')).hexdigest()
+
+    def signature(self, stamps):
+
+        """
+            Stamps of the source files as a single string
+        """
+
+        return ';'.join(sorted(set(stamps)))
+
+    def stored_stamps(self, key):
+
+        """
+            Stamps stored with the entry for key and the time (ns) it 
+            was written, an empty list if there is no entry
+        """
+
+        filepath = self.cachedir + key + '.npz'
+        try:
+            since = os.stat(filepath).st_mtime_ns
+            with np.load(filepath) as cached:
+                return str(cached['signature']).split(';'), since
+        except (IOError, OSError, ValueError, KeyError):
+            return [], 0
+
+    def load(self, key, stamps):
+
+        """
+            Return cached data for key or None if it is not present
+            or the source files have changed since it was stored
+        """
+
+        filepath = self.cachedir + key + '.npz'
+        if (not os.path.isfile(filepath)):
+            return None
+
+        try:
+            with np.load(filepath) as cached:
+                if (str(cached['signature']) != self.signature(stamps)):
+                    return None
+                return cached['data']
+        except (IOError, ValueError, KeyError):
+            return None
+
+    def save(self, key, stamps, data):
+
+        """
+            Store data for key, failure to write (e.g. a read-only
+            results directory) is not an error and is only reported
+        """
+
+        filepath = self.cachedir + key + '.npz'
+        tmppath = self.cachedir + key + '.' + str(os.getpid()) + '.tmp.npz'
+        try:
+            if (not os.path.isdir(self.cachedir)):
+                os.makedirs(self.cachedir)
+            np.savez(tmppath, data=data,
+                     signature=np.array(self.signature(stamps)))
+            os.replace(tmppath, filepath)
+        except (IOError, OSError) as e:
+            print(('Unable to write cache file ' + filepath + ' ' + str(e)))
+
+    def clear(self):
+
+        """
+            Remove all cached entries
+        """
+
+        if (not os.path.isdir(self.cachedir)):
+            return
+        for f in os.listdir(self.cachedir):
+            if f.endswith('.npz'):
+                os.remove(self.cachedir + f)
@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+import numpy as np
+from functools import lru_cache
+
+"""
+
+    Remapping data between linear and cosine (Chebyshev) grids
+
+    Cubic spline interpolation is linear in the data, so interpolating
+    from one set of points to another is a fixed matrix applied to each
+    column of data. The matrix is built once for each grid, by
+    interpolating the columns of the identity, and cached. Remapping an
+    axis of any array is then one matrix product over all the other
+    axes (records, components and the other directions) at once.
+
+    The interpolation is the same as scipy.interpolate.griddata with
+    method='cubic' (a not-a-knot cubic spline), with points outside the
+    data set to the last value.
+
+"""
+
+def cosine_points(Ny, a, b):
+
+    """
+        Linear and cosine grids of Ny points between a and b
+    """
+
+    ycells = np.linspace(0, Ny, Ny)
+    ylin = np.linspace(a, b, Ny)
+    ycos = 0.5*(b+a) - 0.5*(b-a)*np.cos((ycells*np.pi)/(Ny-1))
+    return ylin, ycos
+
+
+def interpolation_matrix(xfrom, xto):
+
+    """
+        Matrix W such that W.dot(values) is the cubic spline through
+        values at points xfrom evaluated at points xto
+    """
+
+    from scipy.interpolate import interp1d
+
+    n = len(xfrom)
+    spline = interp1d(xfrom, np.eye(n), kind='cubic', axis=0,
+                      bounds_error=False, fill_value=np.nan)
+    W = spline(xto)
+
+    # Points outside the data take the last value
+    outside = np.isnan(W).any(axis=1)
+    W[outside, :] = 0.
+    W[outside, -1] = 1.
+
+    W.flags.writeable = False
+    return W
+
+
+@lru_cache(maxsize=32)
+def lineartocosine_matrix(Ny, a, b):
+    ylin, ycos = cosine_points(Ny, a, b)
+    return interpolation_matrix(ylin, ycos)
+
+
+@lru_cache(maxsize=32)
+def cosinetolinear_matrix(Ny, a, b):
+    ylin, ycos = cosine_points(Ny, a, b)
+    return interpolation_matrix(ycos, ylin)
+
+
+def remap_axis(data, W, axis=0):
+
+    """
+        Apply interpolation matrix W along axis of data
+    """
+
+    data = np.asarray(data)
+    if (data.shape[axis] != W.shape[1]):
+        raise ValueError('Remap of ' + str(W.shape[1]) + ' points applied '
+                         'to axis of length ' + str(data.shape[axis]))
+
+    out = np.tensordot(W, data, axes=([1], [axis]))
+    return np.moveaxis(out, 0, axis)
+
+
+def lineartocosine(data, Ny, a, b, axis=0):
+
+    """
+        Data on Ny linearly spaced points along axis mapped to the
+        cosine grid between a and b
+    """
+
+    return remap_axis(data, lineartocosine_matrix(int(Ny), float(a), float(b)),
+                      axis)
+
+
+def cosinetolinear(data, Ny, a, b, axis=0):
+
+    """
+        Data on Ny cosine grid points along axis mapped to the linear
+        grid between a and b
+    """
+
+    return remap_axis(data, cosinetolinear_matrix(int(Ny), float(a), float(b)),
+                      axis)
@@ -3,6 +3,7 @@ import numpy as np
 
 from .field import Field
 from .serial_cfdrawdata import Serial_CFD_RawData
+from .archiverawdata import Serial_CFD_ArchiveRawData, archived
 
 # ============================================================================
 # CFDField base class
@@ -12,8 +13,12 @@ class Serial_CFDField(Field):
     nhalos = [0, 1, 0]
 
     def __init__(self,fdir):
-        Raw = Serial_CFD_RawData(fdir, self.fname, self.dtype, 
-                         self.nperbin)
+        if (archived(fdir, self.fname)):
+            Raw = Serial_CFD_ArchiveRawData(fdir, self.fname, self.dtype, 
+                                            self.nperbin)
+        else:
+            Raw = Serial_CFD_RawData(fdir, self.fname, self.dtype, 
+                             self.nperbin)
         Field.__init__(self,Raw)
         self.header = self.Raw.header
         self.axislabels = ['x','y','z']
@@ -2,13 +2,14 @@ import os
 import numpy as np
 import sys
 import math as maths
-import glob
 #import collections
 
 
 from .serial_cfdfields import *
 from .headerdata import *
 from .postproc import PostProc
+from .archiverawdata import archived_fnames
+from .dirindex import DirectoryIndex
 from .pplexceptions import NoResultsInDir 
 
 class Serial_CFD_PostProc(PostProc):
@@ -33,12 +34,16 @@ class Serial_CFD_PostProc(PostProc):
             print(("Directory " +  self.resultsdir + " not found"))
             raise IOError
             
+        # Directory listed once, see DirectoryIndex
+        index = DirectoryIndex.for_dir(self.resultsdir)
         self.fields_present = []
         for fname in self.potentialfiles:
-            if (glob.glob(self.resultsdir+fname)):
+            if (index.has_file(fname)):
                 self.fields_present.append(fname)
-            if (glob.glob(self.resultsdir+fname+'.*')):
+            if (index.has_records(fname)):
                 self.fields_present.append(fname.strip().split('.')[0])
+        # Outputs converted to an archive, see archive_results
+        self.fields_present += archived_fnames(self.resultsdir)
 
         self.fieldfiles1 = list(set(self.fields_present) & set(self.potentialfiles)) 
 
@@ -121,36 +121,24 @@ class Serial_CFD_RawData(RawData):
         # Allocate enough memory in the C library to efficiently insert
         # into bindata
         recitems = self.nrx*self.nry*self.nrz*self.nperbin
-        bindata  = np.empty(nrecs*recitems)
+        bindata  = np.empty(nrecs*recitems, dtype=self.workdtype)
 
         # Check whether the records are written separately
         # If so
         if (self.separate_outfiles):
 
-            # Loop through files and append data
-            for plusrec in range(0,nrecs):
-
-                filepath = self.fdir+self.fname+'.'+"%07d"%(startrec+plusrec)
-                try: 
-                    fobj = open(filepath,'rb')
-                except:
-                    if missingrec is 'raise':
-                        quit('Unable to find file ' + filepath)    
-                    else:
-                        print(('Unable to find file ' + filepath))
-                        return_zeros = True
-
-                istart = plusrec*recitems
-                iend = istart + recitems
-                if (verbose):
-                    print(('Reading {0:s} rec {1:5d}'.format(
-                          self.fname,startrec+plusrec)))
-                if return_zeros:
-                    bindata = np.zeros([ self.nrx,self.nry,self.nrz,
-                                         self.nperbin ,nrecs ])
-                else:
-                    bindata[istart:iend] = np.fromfile(fobj,dtype=self.dtype)
-                    fobj.close()
+            # Read files concurrently, each into its own row
+            filepaths = [self.fdir+self.fname+'.'+"%07d"%(startrec+plusrec) 
+                         for plusrec in range(0,nrecs)]
+            bindata = bindata.reshape([nrecs, recitems])
+
+            def readrec(filepath, plusrec):
+                bindata[plusrec,:] = np.fromfile(filepath,dtype=self.dtype)
+
+            bindata = self.read_records(filepaths, readrec, bindata, recaxis=0,
+                                        missingrec=missingrec, verbose=verbose)
+            nrecs = bindata.shape[0]
+            bindata = bindata.ravel()
 
        # Else
         else:
@@ -188,7 +176,7 @@ class Serial_CFD_RawData(RawData):
             # Get data and reshape with fortran array ordering
             if return_zeros:
                 bindata = np.zeros([ self.nrx,self.nry,self.nrz,
-                                     self.nperbin ,nrecs ])
+                                     self.nperbin ,nrecs ], dtype=self.workdtype)
             else:
                 bindata = np.fromfile(fobj, dtype=self.dtype,
                                       count=nrecs*recitems)  
@@ -234,5 +222,5 @@ class Serial_CFD_RawData(RawData):
             if (verbose):
                 print(('new bindata.shape = {0:s}'.format(str(bindata.shape))))
 
-        return bindata
+        return self.to_workdtype(bindata)
         
@@ -0,0 +1,137 @@
+#! /usr/bin/env python
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+
+    Power spectra of 5D field data
+
+    energy_spectrum transforms real data with a real-to-complex FFT
+    (numpy.fft.rfftn), which only computes the non-negative wavenumbers
+    along the last transformed axis, so takes about half the work and
+    memory of a full complex transform. The energy of the negative
+    wavenumbers along the other transformed axes is then folded onto
+    the positive ones with array slicing. The result holds wavenumbers
+    0 to n//2 along each transformed axis and sums to the energy of the
+    data (Parseval).
+
+    Long runs are averaged with Welch's method: the records are split
+    into overlapping segments, each segment is read and transformed on
+    its own and the spectra averaged, so only a few segments are held
+    in memory at once. Segments may be transformed on a thread pool.
+
+"""
+
+def fold_negatives(E, axis):
+
+    """
+        Add the energy of negative wavenumbers along axis of a full
+        transform onto the matching positive wavenumbers, returning
+        wavenumbers 0 to n//2
+    """
+
+    n = E.shape[axis]
+    nneg = (n - 1)//2
+
+    index = [slice(None)]*E.ndim
+    index[axis] = slice(0, n//2 + 1)
+    folded = E[tuple(index)].copy()
+
+    if (nneg > 0):
+        index[axis] = slice(1, nneg + 1)
+        negatives = [slice(None)]*E.ndim
+        negatives[axis] = slice(n - 1, n - 1 - nneg, -1)
+        folded[tuple(index)] += E[tuple(negatives)]
+
+    return folded
+
+
+def double_halfspectrum(E, axis, n):
+
+    """
+        Count the negative wavenumbers of a real-to-complex transform of
+        length n along axis, which mirror the positive ones, in place
+    """
+
+    nneg = (n - 1)//2
+    if (nneg > 0):
+        index = [slice(None)]*E.ndim
+        index[axis] = slice(1, nneg + 1)
+        E[tuple(index)] *= 2.
+
+    return E
+
+
+def energy_spectrum(data, fftaxes):
+
+    """
+        Energy in each wavenumber (0 to n//2) along fftaxes of data,
+        normalised by the number of points transformed
+    """
+
+    fftaxes = tuple(fftaxes)
+    N = int(np.prod([data.shape[axis] for axis in fftaxes]))
+
+    if (fftaxes == ()):
+        E = np.abs(data)**2.0
+
+    elif (np.iscomplexobj(data)):
+        fftdata = np.fft.fftn(data, axes=fftaxes)
+        E = np.abs(fftdata)**2.0
+        del fftdata
+        for axis in fftaxes:
+            E = fold_negatives(E, axis)
+
+    else:
+        fftdata = np.fft.rfftn(data, axes=fftaxes)
+        E = np.square(fftdata.real)
+        E += np.square(fftdata.imag)
+        del fftdata
+        for axis in fftaxes[:-1]:
+            E = fold_negatives(E, axis)
+        double_halfspectrum(E, fftaxes[-1], data.shape[fftaxes[-1]])
+
+    E /= float(N)
+    return E
+
+
+def welch_segments(startrec, endrec, nperseg, noverlap=None):
+
+    """
+        (startrec, endrec) of each segment of nperseg records, with
+        consecutive segments sharing noverlap records (default half).
+        Records after the last whole segment are not used.
+    """
+
+    nrecs = endrec - startrec + 1
+    if (nperseg >= nrecs):
+        return [(startrec, endrec)]
+
+    if (noverlap is None):
+        noverlap = nperseg//2
+    step = nperseg - noverlap
+    if (step < 1):
+        raise ValueError('noverlap must be less than nperseg')
+
+    return [(rec, rec + nperseg - 1)
+            for rec in range(startrec, endrec - nperseg + 2, step)]
+
+
+def map_segments(function, segments, nthreads=1):
+
+    """
+        Yield function(segment) for each segment in turn, evaluating up
+        to nthreads segments at a time on a thread pool
+    """
+
+    nthreads = max(1, min(int(nthreads), len(segments)))
+    if (nthreads == 1):
+        for segment in segments:
+            yield function(segment)
+        return
+
+    with ThreadPoolExecutor(max_workers=nthreads) as pool:
+        for first in range(0, len(segments), nthreads):
+            batch = segments[first:first+nthreads]
+            for result in pool.map(function, batch):
+                yield result
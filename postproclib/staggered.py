@@ -0,0 +1,136 @@
+#! /usr/bin/env python
+import numpy as np
+
+"""
+
+    Interpolation of cell centred data onto staggered grid locations
+
+    The first three axes of the data are spatial (x, y, z) and any
+    further axes (records, components) are carried through, so a whole
+    [nx, ny, nz, nrecs, ndata] array is converted in one call.
+
+    Values on the faces between cells are linear interpolations of the
+    cell centres either side, and on the outer faces are extrapolated
+    from the two cells nearest the boundary, as RegularGridInterpolator
+    with fill_value=None. Vertices follow by interpolating onto the
+    faces along each axis in turn. On uniform grids this is direct
+    averaging of neighbouring cells, on non-uniform grids the faces lie
+    midway between cell centres.
+
+"""
+
+def uniform(centres, rtol=1e-8):
+    spacing = np.diff(centres)
+    return np.allclose(spacing, spacing[0], rtol=rtol, atol=0.)
+
+
+def face_weights(centres):
+
+    """
+        For the n+1 faces of n cells, the index of the cell below each
+        face and the weight given to the cell above it
+    """
+
+    centres = np.asarray(centres, dtype=float)
+    n = centres.size
+    faces = np.empty(n+1)
+    faces[1:-1] = 0.5*(centres[:-1] + centres[1:])
+    faces[0] = centres[0] - 0.5*(centres[1] - centres[0])
+    faces[-1] = centres[-1] + 0.5*(centres[-1] - centres[-2])
+
+    below = np.clip(np.arange(-1, n), 0, n-2)
+    weight = (faces - centres[below])/(centres[below+1] - centres[below])
+    return below, weight
+
+
+def faces_along(data, axis, centres=None):
+
+    """
+        Values of data on the n+1 faces along axis between its n cells,
+        centres are the cell centre coordinates along axis (needed only
+        for non-uniform grids)
+    """
+
+    n = data.shape[axis]
+    shape = list(data.shape)
+    shape[axis] = n + 1
+    out = np.empty(shape, dtype=np.result_type(data, 1.0))
+
+    def sl(start, stop):
+        index = [slice(None)]*data.ndim
+        index[axis] = slice(start, stop)
+        return tuple(index)
+
+    # A single cell is constant along axis
+    if (n < 2):
+        out[...] = data
+        return out
+
+    if (centres is None or uniform(centres)):
+        np.add(data[sl(None, -1)], data[sl(1, None)], out=out[sl(1, -1)])
+        out[sl(1, -1)] *= 0.5
+        out[sl(0, 1)] = 1.5*data[sl(0, 1)] - 0.5*data[sl(1, 2)]
+        out[sl(-1, None)] = 1.5*data[sl(-1, None)] - 0.5*data[sl(-2, -1)]
+    else:
+        below, weight = face_weights(centres)
+        wshape = [1]*data.ndim
+        wshape[axis] = n + 1
+        weight = np.reshape(weight, wshape)
+        np.multiply(np.take(data, below, axis=axis), 1. - weight, out=out)
+        out += np.take(data, below+1, axis=axis)*weight
+
+    return out
+
+
+def cellcentre_to_vertex(data, grid=None):
+
+    """
+        Values of data at the (nx+1, ny+1, nz+1) cell vertices, grid is
+        a length-3 list of cell centre coordinates (optional if uniform)
+    """
+
+    if (grid is None):
+        grid = [None]*3
+
+    vertexdata = data
+    for axis in range(3):
+        vertexdata = faces_along(vertexdata, axis, grid[axis])
+    return vertexdata
+
+
+def cellcentre_to_surface(data, grid=None):
+
+    """
+        Values of data on the 6 surfaces of each cell, ordered xbottom,
+        ybottom, zbottom, xtop, ytop, ztop. For data with trailing
+        axes [nx, ny, nz, ..., ndata] the result is
+        [nx, ny, nz, ..., 6*ndata], with surface s of component d at
+        index s*ndata + d of the last axis, otherwise [nx, ny, nz, 6]
+    """
+
+    if (grid is None):
+        grid = [None]*3
+
+    if (data.ndim > 3):
+        shape = data.shape[:-1] + (6, data.shape[-1])
+    else:
+        shape = data.shape + (6,)
+    surfacedata = np.empty(shape, dtype=np.result_type(data, 1.0))
+
+    for axis in range(3):
+        faces = faces_along(data, axis, grid[axis])
+        below = [slice(None)]*data.ndim
+        above = [slice(None)]*data.ndim
+        below[axis] = slice(None, -1)
+        above[axis] = slice(1, None)
+        if (data.ndim > 3):
+            surfacedata[..., axis, :] = faces[tuple(below)]
+            surfacedata[..., axis+3, :] = faces[tuple(above)]
+        else:
+            surfacedata[..., axis] = faces[tuple(below)]
+            surfacedata[..., axis+3] = faces[tuple(above)]
+        del faces
+
+    if (data.ndim > 3):
+        surfacedata = np.reshape(surfacedata, data.shape[:-1] + (6*data.shape[-1],))
+    return surfacedata
@@ -16,6 +16,8 @@ from postproclib.allpostproc import All_PostProc
 from postproclib.headerdata import MDHeaderData
 from postproclib.mdmols import MolAllPostProc, read_grid
 from postproclib import PostProc
+from postproclib.field import Field
+from postproclib.follow import Follower
 import postproclib as ppl
 from misclib import unicodetolatex, round_to_n
 
@@ -30,6 +32,13 @@ def showMessageDlg(msg, title='Information', style=wx.OK|wx.ICON_INFORMATION):
 
 
 class VisualiserPanel(wx.Panel):
+
+    # Fields are read in single precision for plotting, which halves
+    # memory and bandwidth (averages are still summed in double)
+    workdtype = 'f'
+    # Milliseconds between checks for records written by a running
+    # simulation, which extend the record slider. None to switch off
+    followinterval = 2000
  
     def __init__(self,parent,fdir,**kwargs):
 
@@ -42,6 +51,12 @@ class VisualiserPanel(wx.Panel):
             fieldfound = True
         except NoResultsInDir:
             fieldfound=False
+        else:
+            for field in self.PP.plotlist.values():
+                try:
+                    field.set_workdtype(self.workdtype)
+                except AttributeError:
+                    pass
 
         try:
             self.MM = MolAllPostProc(self.fdir)
@@ -89,6 +104,8 @@ class VisualiserPanel(wx.Panel):
     def initialise_visuals(self,item):
         print(('Trying to initialise visuals with ', item))
         self.fieldname, self.field = item
+        if isinstance(self.field, Field):
+            self.field.enable_cache()
         self.pyplotp = PyplotPanel(self)
         self.vispyp = VispyPanel(self)
         self.vispyp.Hide()
@@ -108,6 +125,7 @@ class VisualiserPanel(wx.Panel):
 
         self.set_bindings()
         self.set_defaults()
+        self.start_follow()
 
 
     def set_defaults(self):
@@ -334,6 +352,8 @@ class VisualiserPanel(wx.Panel):
             pass
         else:
             self.field = self.PP.plotlist[ftype]
+            if isinstance(self.field, Field):
+                self.field.enable_cache()
             self.fieldname = ftype
 
         if self.plottype == 'Profile':
@@ -455,6 +475,33 @@ class VisualiserPanel(wx.Panel):
         self.choosep.maxpspin.SetValue(event.GetString())
         self.set_limits([self.minp,self.maxp])
 
+    def start_follow(self):
+        if (self.followinterval is None or not isinstance(self.PP, PostProc)
+            or hasattr(self, 'followtimer')):
+            return
+        self.follower = Follower(self.PP, watchdirs=[self.fdir])
+        self.followtimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.handle_follow, self.followtimer)
+        self.followtimer.Start(self.followinterval)
+
+    def handle_follow(self, event):
+
+        # Extend the record slider to new records, keeping up
+        # with the latest record if it was already shown
+        if (not self.follower.poll()):
+            return
+        try:
+            maxrec = int(self.field.maxrec)
+        except AttributeError:
+            return
+        if (maxrec <= self.maxrec):
+            return
+        atend = (self.rec + self.recwidth >= self.maxrec)
+        self.maxrec = maxrec
+        self.slidersp.recslider.SetMax(self.maxrec)
+        if (atend):
+            self.SetRecord(self.maxrec)
+
     def handle_recslider(self, event):
         self.SetRecord(event.GetInt())
 
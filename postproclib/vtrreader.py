@@ -0,0 +1,231 @@
+#! /usr/bin/env python
+import numpy as np
+import base64
+import zlib
+import lzma
+import re
+
+"""
+
+    Reader of VTK XML rectilinear grid (.vtr) files
+
+    Reads the arrays of a .vtr file straight from its bytes, without
+    building a VTK dataset. The layout common to every file of a time
+    series (header type, byte order, compressor, encoding of appended
+    data and the type, components and format of each cell array) is
+    parsed from the XML header of the first file and kept. Each record
+    then only needs the position of its array, found with a search of
+    the header, before the array is decoded into the output.
+
+    Supports ascii, inline binary (base64) and appended (raw or base64)
+    arrays, uncompressed or compressed with zlib or lzma. Anything else
+    raises ValueError so the caller can fall back on a full VTK reader.
+
+"""
+
+vtktypes = {'Int8': 'i1', 'UInt8': 'u1', 'Int16': 'i2', 'UInt16': 'u2',
+            'Int32': 'i4', 'UInt32': 'u4', 'Int64': 'i8', 'UInt64': 'u8',
+            'Float32': 'f4', 'Float64': 'f8'}
+
+decompressors = {'vtkZLibDataCompressor': zlib.decompress,
+                 'vtkLZMADataCompressor': lzma.decompress}
+
+# Raised by files this reader can't decode
+decode_errors = (ValueError, KeyError, IndexError, zlib.error, lzma.LZMAError)
+
+attribute_re = re.compile(rb'([\w:]+)\s*=\s*"([^"]*)"')
+
+def attributes(tag):
+
+    """
+        Dictionary of the attributes of an XML start tag (bytes)
+    """
+
+    return {k.decode('ascii'): v.decode('ascii')
+            for k, v in attribute_re.findall(tag)}
+
+
+def b64len(nbytes):
+    return 4*((nbytes + 2)//3)
+
+
+class VTR_Layout(object):
+
+    def __init__(self, filepath):
+
+        """
+            Layout of the series of files like filepath
+        """
+
+        with open(filepath, 'rb') as f:
+            buf = f.read()
+
+        start = buf.find(b'<VTKFile')
+        if (start < 0):
+            raise ValueError(filepath + ' is not a VTK XML file')
+        vtkfile = attributes(buf[start:buf.find(b'>', start)])
+        if (vtkfile.get('type') != 'RectilinearGrid'):
+            raise ValueError(filepath + ' is not a RectilinearGrid')
+
+        self.byteorder = '>' if (vtkfile.get('byte_order') == 'BigEndian') else '<'
+        self.headertype = np.dtype(self.byteorder
+                                   + vtktypes[vtkfile.get('header_type', 'UInt32')])
+        compressor = vtkfile.get('compressor')
+        if (compressor is not None and compressor not in decompressors):
+            raise ValueError('Unsupported compressor ' + compressor)
+        self.decompress = decompressors.get(compressor)
+
+        appended = buf.find(b'<AppendedData')
+        self.encoding = None
+        if (appended >= 0):
+            self.encoding = attributes(buf[appended:buf.find(b'>', appended)]).get('encoding')
+
+        # Cell arrays in order, with their type, components and format
+        self.cellarrays = []
+        self.arrays = {}
+        celldata = buf.find(b'<CellData')
+        cellend = buf.find(b'</CellData>', celldata)
+        for tag, attrs, tagend in self.data_arrays(buf, celldata, cellend):
+            name = attrs['Name']
+            self.cellarrays.append(name)
+            self.arrays[name] = attrs
+
+        # Grid is the same for every record
+        coords = buf.find(b'<Coordinates')
+        if (coords < 0):
+            raise ValueError(filepath + ' has no Coordinates')
+        self.coordinates = [self.decode(buf, attrs, tagend) for tag, attrs, tagend
+                            in self.data_arrays(buf, coords,
+                                                buf.find(b'</Coordinates>', coords))]
+        if (len(self.coordinates) != 3):
+            raise ValueError(filepath + ' does not have 3 coordinate arrays')
+
+    def data_arrays(self, buf, start, end):
+
+        """
+            (tag, attributes, end of tag) of each DataArray between
+            start and end of buf
+        """
+
+        found = []
+        if (start < 0 or end < 0):
+            return found
+        pos = buf.find(b'<DataArray', start, end)
+        while (pos >= 0):
+            tagend = buf.find(b'>', pos) + 1
+            tag = buf[pos:tagend]
+            found.append((tag, attributes(tag), tagend))
+            pos = buf.find(b'<DataArray', tagend, end)
+        return found
+
+    def dtype(self, attrs):
+        return np.dtype(self.byteorder + vtktypes[attrs['type']])
+
+    def decompress_blocks(self, data, header):
+
+        """
+            Data of the compressed blocks listed in header
+        """
+
+        nblocks = int(header[0])
+        csizes = header[3:3+nblocks].astype(np.int64)
+        ends = np.cumsum(csizes)
+        return b''.join([self.decompress(data[e-c:e])
+                         for c, e in zip(csizes, ends)])
+
+    def read_raw(self, buf, pos):
+
+        """
+            Bytes of the array at pos of raw appended data
+        """
+
+        hs = self.headertype.itemsize
+        n0 = int(np.frombuffer(buf, self.headertype, 1, pos)[0])
+        if (self.decompress is None):
+            return buf[pos+hs:pos+hs+n0]
+
+        header = np.frombuffer(buf, self.headertype, 3+n0, pos)
+        start = pos + hs*(3+n0)
+        return self.decompress_blocks(buf[start:start+int(np.sum(header[3:]))],
+                                      header)
+
+    def read_base64(self, text, pos):
+
+        """
+            Bytes of the array at pos of base64 text. The header is
+            encoded on its own if compressed, and otherwise may be
+            encoded with the data
+        """
+
+        hs = self.headertype.itemsize
+        first = base64.b64decode(text[pos:pos+b64len(hs)])
+        n0 = int(np.frombuffer(first[:hs], self.headertype)[0])
+
+        if (self.decompress is not None):
+            hbytes = hs*(3+n0)
+            header = np.frombuffer(base64.b64decode(text[pos:pos+b64len(hbytes)]),
+                                   self.headertype)
+            start = pos + b64len(hbytes)
+            ndata = int(np.sum(header[3:3+n0]))
+            data = base64.b64decode(text[start:start+b64len(ndata)])
+            return self.decompress_blocks(data, header)
+
+        if (text[pos+b64len(hs)-1:pos+b64len(hs)] == b'='):
+            start = pos + b64len(hs)
+            return base64.b64decode(text[start:start+b64len(n0)])[:n0]
+        return base64.b64decode(text[pos:pos+b64len(hs+n0)])[hs:hs+n0]
+
+    def decode(self, buf, attrs, tagend):
+
+        """
+            Values of the DataArray with attributes attrs whose start
+            tag ends at tagend of buf, as a 1D array
+        """
+
+        dtype = self.dtype(attrs)
+        fmt = attrs.get('format', 'ascii')
+
+        if (fmt == 'appended'):
+            start = buf.find(b'_', buf.find(b'<AppendedData')) + 1
+            pos = start + int(attrs['offset'])
+            if (self.encoding == 'raw'):
+                data = self.read_raw(buf, pos)
+            else:
+                data = self.read_base64(buf, pos)
+            return np.frombuffer(data, dtype)
+
+        text = buf[tagend:buf.find(b'<', tagend)]
+        if (fmt == 'binary'):
+            return np.frombuffer(self.read_base64(b''.join(text.split()), 0), dtype)
+        elif (fmt == 'ascii'):
+            return np.fromstring(text, sep=' ').astype(dtype)
+        raise ValueError('Unsupported DataArray format ' + fmt)
+
+    def read_cell_array(self, filepath, name, out=None):
+
+        """
+            Cell array name of filepath, [ncells, ncomponents], written
+            into out if given
+        """
+
+        with open(filepath, 'rb') as f:
+            buf = f.read()
+
+        # Only the position of the array differs between records
+        match = re.search(rb'<DataArray[^>]*\sName="' + re.escape(name.encode())
+                          + rb'"[^>]*>', buf)
+        if (match is None):
+            raise ValueError('No cell array ' + name + ' in ' + filepath)
+        attrs = self.arrays[name].copy()
+        attrs.update(attributes(match.group(0)))
+        values = self.decode(buf, attrs, match.end())
+
+        ncomps = int(attrs.get('NumberOfComponents', 1))
+        if (values.size % ncomps != 0):
+            raise ValueError('Cell array ' + name + ' of ' + filepath
+                             + ' is truncated')
+        values = values.reshape([-1, ncomps])
+        if (out is None):
+            return values
+        out[...] = values
+        return out
@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+
+    Bulk writers for exporting field data
+
+    Values are formatted a block of rows at a time with a single string
+    formatting operation, or written as one binary payload, rather than
+    one write per value. Each function writes a whole file from an
+    array so files for different records can be written concurrently
+    by write_records on a pool of processes.
+
+        write_dx    - OpenDX scalar grid (as read by VMD)
+        write_vtk   - legacy VTK structured points, binary or ascii
+        write_ascii - one value per line
+
+"""
+
+# Rows formatted per string operation, limits the size of the
+# temporary strings for large arrays
+blockrows = 65536
+
+def write_columns(fobj, values, fmt, ncols=1, linend='\n', partialend=None):
+
+    """
+        Write the flattened values ncols to a line, each formatted with
+        fmt and each line ended with linend. A last line with fewer
+        than ncols values is ended with partialend (default linend).
+    """
+
+    values = np.ravel(values)
+    if (partialend is None):
+        partialend = linend
+
+    nfull = values.size//ncols
+    rowfmt = fmt*ncols + linend
+    for first in range(0, nfull, blockrows):
+        nrows = min(blockrows, nfull - first)
+        block = values[first*ncols:(first+nrows)*ncols]
+        fobj.write((rowfmt*nrows) % tuple(block.tolist()))
+
+    remainder = values[nfull*ncols:]
+    if (remainder.size > 0):
+        fobj.write((fmt*remainder.size) % tuple(remainder.tolist()) + partialend)
+
+
+def write_dx(filename, data, origin, delta, name):
+
+    """
+        Write 3D data at grid points to an OpenDX file, see
+        http://www.ks.uiuc.edu/Research/vmd/plugins/molfile/dxplugin.html
+    """
+
+    Nx_v, Ny_v, Nz_v = data.shape[0], data.shape[1], data.shape[2]
+    with open(filename,'w+') as f:
+
+        # - - Write Header - -
+        f.write("object 1 class gridpositions counts%8.0f%8.0f%8.0f\n" % (Nx_v,Ny_v,Nz_v))
+        f.write("origin%16g%16g%16g\n" % tuple(origin))
+        f.write("delta %16g 0 0\n" % delta[0])
+        f.write("delta 0 %16g 0\n" % delta[1])
+        f.write("delta 0 0 %16g\n" % delta[2])
+        f.write("object 2 class gridconnections counts%8.0f%8.0f%8.0f\n" % (Nx_v,Ny_v,Nz_v))
+        f.write("object 3 class array type double rank 0 items%8.0f follows\n" % (Nx_v*Ny_v*Nz_v))
+
+        # - - Write Data - - (three per line, z fastest)
+        write_columns(f, data, "%16E", ncols=3,
+                      linend=' \n', partialend='           \n')
+
+        # - - Write Footer - -
+        f.write('object "' + name + '" class field \n')
+
+    return filename
+
+
+def write_vtk(filename, data, origin, spacing, name='data', binary=True,
+              title='pyDataView field'):
+
+    """
+        Write cell centred data [nx, ny, nz, ndata] as CELL_DATA of a
+        legacy VTK structured points file with (nx+1, ny+1, nz+1)
+        points from origin (the lower corner of the first cell).
+        Three components are written as VECTORS, up to four as
+        SCALARS and otherwise as a FIELD array.
+    """
+
+    if (data.ndim == 3):
+        data = data[..., np.newaxis]
+    nx, ny, nz, ndata = data.shape
+    ncells = nx*ny*nz
+
+    # VTK points run x fastest, components together
+    values = np.reshape(np.transpose(data, (2, 1, 0, 3)), [-1])
+
+    header = ["# vtk DataFile Version 3.0",
+              title[:255],
+              "BINARY" if binary else "ASCII",
+              "DATASET STRUCTURED_POINTS",
+              "DIMENSIONS {0:d} {1:d} {2:d}".format(nx+1, ny+1, nz+1),
+              "ORIGIN {0!r} {1!r} {2!r}".format(*[float(o) for o in origin]),
+              "SPACING {0!r} {1!r} {2!r}".format(*[float(s) for s in spacing]),
+              "CELL_DATA {0:d}".format(ncells)]
+    if (ndata == 3):
+        header.append("VECTORS {0:s} double".format(name))
+    elif (ndata <= 4):
+        header.append("SCALARS {0:s} double {1:d}".format(name, ndata))
+        header.append("LOOKUP_TABLE default")
+    else:
+        header.append("FIELD FieldData 1")
+        header.append("{0:s} {1:d} {2:d} double".format(name, ndata, ncells))
+
+    with open(filename, 'w+') as f:
+        f.write("\n".join(header) + "\n")
+        if (not binary):
+            write_columns(f, values, "%.17g ", ncols=ndata)
+
+    # Legacy VTK binary data is big endian
+    if (binary):
+        with open(filename, 'ab') as f:
+            f.write(values.astype('>f8').tobytes())
+            f.write(b"\n")
+
+    return filename
+
+
+def write_ascii(filename, data):
+
+    """
+        Write the flattened data one value per line
+    """
+
+    with open(filename, 'w+') as f:
+        write_columns(f, data, "%r")
+
+    return filename
+
+
+def write_records(writer, jobs, nprocs=1):
+
+    """
+        Call writer(*args) for each args in jobs, a list or generator
+        (read lazily so only a few records are held in memory), using
+        a pool of nprocs processes. Returns the list of results.
+    """
+
+    if (nprocs is None or nprocs <= 1):
+        return [writer(*args) for args in jobs]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=nprocs) as pool:
+        pending = []
+        for args in jobs:
+            pending.append(pool.submit(writer, *args))
+            # Bound the records waiting to be written
+            if (len(pending) >= 2*nprocs):
+                results.append(pending.pop(0).result())
+        for future in pending:
+            results.append(future.result())
+
+    return results
@@ -22,7 +22,8 @@ setup( name = "pyDataView",
        license = "GPL",
        install_requires=['numpy', 'scipy', 'matplotlib', 'wxpython', 'vispy', ],
        extras_require = {'Channelflow_plots':  ["h5py"], 
-                         'cpl_plots':["scikit-image"]},
+                         'cpl_plots':["scikit-image"],
+                         'fast_kernels':["numexpr"]},
        description = "Data Viewer GUI written in python, wxpython and matplotlib",
        long_description = long_description,
        long_description_content_type='text/markdown',